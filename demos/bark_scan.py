@@ -0,0 +1,227 @@
+import os
+import sys
+import csv
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Headless: never open a plot window from a worker process
+import matplotlib
+matplotlib.use("Agg")
+
+import numpy as np
+
+from dog_bark_detection import DogBarkDetector, SpectralFeatures
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from result_sink import ResultSink, ProgressMeter
+from bark_events import score_bark
+from profiling import stage, is_profiling, profile_from_env, write_reports, TIMERS
+
+
+AUDIO_EXTENSIONS = ('.wav', '.mp3', '.aac', '.flac', '.m4a', '.ogg')
+
+N_MFCC = 13
+
+COLUMNS = (
+    ["file", "size", "mtime", "duration", "bark_score", "classification", "bark_percentage",
+     "bark_ratio_mean", "max_amplitude", "spectral_centroid_mean", "spectral_centroid_std",
+     "spectral_rolloff_mean", "zero_crossing_rate_mean", "rms_mean", "rms_std", "spectral_bandwidth_mean"]
+    + [f"mfcc_mean_{i}" for i in range(N_MFCC)]
+    + [f"mfcc_std_{i}" for i in range(N_MFCC)]
+    + ["elapsed_time", "error"]
+)
+
+
+def find_audio_files(directory):
+    """All audio files below directory, sorted"""
+    audio_files = []
+    for root, dirs, files in os.walk(directory):
+        for file in files:
+            if file.lower().endswith(AUDIO_EXTENSIONS):
+                audio_files.append(os.path.join(root, file))
+    return sorted(audio_files)
+
+
+def analyze_file(path):
+    """
+    Score one recording without printing or plotting.
+
+    Loads the audio once, computes one shared STFT and returns a flat row: the
+    rule-based bark score, the combined bark percentage and the feature vector.
+    Errors are returned in the "error" column instead of raised, so one bad file
+    does not stop a scan.
+
+    Args:
+        path (str): Audio file path
+
+    Returns:
+        dict: One row with the keys in COLUMNS
+    """
+    start_time = time.time()
+    stat = os.stat(path)
+    row = {"file": path, "size": stat.st_size, "mtime": stat.st_mtime, "error": ""}
+    try:
+        detector = DogBarkDetector()
+        with stage("bark_load"):
+            y, sr = detector.load_audio(path)
+        if y is None or len(y) == 0:
+            raise ValueError("could not load audio")
+
+        with stage("bark_features"):
+            spectral = SpectralFeatures(y, sr)
+            features = detector.extract_features(y, sr, spectral=spectral)
+        with stage("bark_detect"):
+            bark_segments, freq_ratio, _ = detector.detect_barks_combined(y, sr, spectral=spectral)
+
+        max_amplitude = float(np.max(np.abs(y)))
+        bark_ratio_mean = float(np.mean(freq_ratio))
+        bark_score, classification = score_bark(max_amplitude, bark_ratio_mean, features["spectral_centroid_mean"])
+
+        row.update({
+            "duration": len(y) / sr,
+            "bark_score": bark_score,
+            "classification": classification,
+            "bark_percentage": float(np.mean(bark_segments) * 100) if len(bark_segments) else 0.0,
+            "bark_ratio_mean": bark_ratio_mean,
+            "max_amplitude": max_amplitude,
+        })
+        for key, value in features.items():
+            if np.ndim(value):
+                row.update({f"{key}_{i}": float(v) for i, v in enumerate(value)})
+            else:
+                row[key] = float(value)
+    except Exception as e:
+        row["error"] = f"Error: {e}"
+    row["elapsed_time"] = time.time() - start_time
+    return row
+
+
+def load_scan_results(path):
+    """
+    Read an existing result table (CSV or Parquet).
+
+    Returns:
+        dict: file -> row, empty if the table does not exist yet
+    """
+    if not os.path.exists(path):
+        return {}
+    if path.endswith(".parquet"):
+        import pandas as pd
+        rows = pd.read_parquet(path).to_dict("records")
+    else:
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            rows = list(csv.DictReader(f))
+    return {row["file"]: row for row in rows}
+
+
+def _is_current(row, path):
+    """Whether a stored row is a successful analysis of the file as it is now"""
+    if row is None or row.get("error"):
+        return False
+    stat = os.stat(path)
+    return int(row["size"]) == stat.st_size and float(row["mtime"]) == stat.st_mtime
+
+
+def journal_path(results_path):
+    """JSONL journal that rows are appended to while a scan runs, next to the result table"""
+    return os.path.splitext(results_path)[0] + ".jsonl"
+
+
+def write_scan_results(rows, results_path):
+    """
+    Write rows to a CSV or Parquet table, replacing it atomically.
+
+    Parquet requires pandas and pyarrow.
+    """
+    tmp_path = results_path + ".tmp"
+    if results_path.endswith(".parquet"):
+        import pandas as pd
+        pd.DataFrame(rows, columns=COLUMNS).to_parquet(tmp_path, index=False)
+    else:
+        with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+    os.replace(tmp_path, results_path)
+
+
+def scan_directory(directory, results_path, workers=None, resume=True):
+    """
+    Analyze every audio file below a directory with a process pool.
+
+    Rows are appended to a JSONL journal (journal_path) through a ResultSink as files
+    finish, so an interrupted scan keeps its progress whatever the table format. The
+    .csv or .parquet table is written from the journal once at the end, one row per
+    file. A table from an older scan without a journal seeds the journal on resume.
+
+    Args:
+        directory (str): Directory of recordings
+        results_path (str): Output table, .csv or .parquet (Parquet requires pandas and pyarrow)
+        workers (int): Worker processes (default: CPU count); when profiling is enabled
+            files are analyzed in this process instead, so every stage is captured
+        resume (bool): Skip files already analyzed with the same size and mtime
+
+    Returns:
+        list: Rows produced by this run
+    """
+    journal = journal_path(results_path)
+    if not resume and os.path.exists(journal):
+        os.remove(journal)
+
+    rows = []
+    executor = None
+    with ResultSink(journal) as sink:
+        if resume and not len(sink):
+            for path, row in load_scan_results(results_path).items():
+                sink.write(path, row)
+
+        audio_files = find_audio_files(directory)
+        todo = [path for path in audio_files if not _is_current(sink.results.get(path), path)]
+        print(f"{len(audio_files)} audio files, {len(audio_files) - len(todo)} already analyzed, {len(todo)} to scan")
+
+        progress = ProgressMeter(len(todo), every=10)
+        try:
+            if is_profiling():
+                completed = map(analyze_file, todo)
+            else:
+                executor = ProcessPoolExecutor(max_workers=workers)
+                completed = (future.result() for future in
+                             as_completed([executor.submit(analyze_file, path) for path in todo]))
+            for row in completed:
+                rows.append(row)
+                if row["error"]:
+                    print(f"{row['file']}: {row['error']}")
+                sink.write(row["file"], row)
+                progress.update()
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        write_scan_results([sink.results[path] for path in sorted(sink.results)], results_path)
+
+    return rows
+
+
+def main():
+    """Scan AUDIOS_PATH and write one row per recording to BARK_RESULTS_PATH"""
+    audios_path = os.environ.get("AUDIOS_PATH", "/Users/william/Work/VoiceData/data")
+    results_path = os.environ.get("BARK_RESULTS_PATH", "data/results/bark_scan.csv")
+    workers = int(os.environ.get("BARK_WORKERS", "0")) or None
+    resume = os.environ.get("RESUME", "1") == "1"
+    profiling = profile_from_env()
+
+    start_time = time.time()
+    rows = scan_directory(audios_path, results_path, workers=workers, resume=resume)
+
+    high = [row for row in rows if not row["error"] and row["bark_score"] >= 4]
+    print(f"\nScanned {len(rows)} files in {time.time() - start_time:.2f} seconds")
+    print(f"{len(high)} files scored HIGH; results in {results_path}")
+    for row in sorted(high, key=lambda r: -r["bark_percentage"]):
+        print(f"  {row['file']}: score {row['bark_score']}/5, {row['bark_percentage']:.2f}% bark frames")
+    if profiling:
+        TIMERS.report()
+        print(f"Profiles written to {os.environ['PROFILE_DIR']} ({len(write_reports())} files)")
+
+
+if __name__ == "__main__":
+    main()
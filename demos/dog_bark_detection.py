@@ -1,4 +1,7 @@
+import os
+import sys
 import librosa
+import librosa.display
 import numpy as np
 import matplotlib.pyplot as plt
 from scipy import signal
@@ -6,6 +9,10 @@ from scipy.stats import skew, kurtosis
 import warnings
 warnings.filterwarnings('ignore')
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from spectral_features import SpectralFeatures, frame_rms
+from waveform_plot import new_figure, plot_envelope, plot_spectrogram, decimate_series, finish_figure
+
 class DogBarkDetector:
     def __init__(self):
         self.bark_frequency_range = (200, 2000)  # Hz - typical dog bark frequencies
@@ -21,55 +28,18 @@ class DogBarkDetector:
             print(f"Error loading audio file: {e}")
             return None, None
     
-    def extract_features(self, y, sr):
+    def extract_features(self, y, sr, spectral=None):
         """Extract audio features that might indicate dog barks"""
-        features = {}
-        
-        # 1. Spectral features
-        # Mel-frequency cepstral coefficients (MFCC)
-        mfcc = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13)
-        features['mfcc_mean'] = np.mean(mfcc, axis=1)
-        features['mfcc_std'] = np.std(mfcc, axis=1)
-        
-        # 2. Spectral centroid (brightness of sound)
-        spectral_centroid = librosa.feature.spectral_centroid(y=y, sr=sr)[0]
-        features['spectral_centroid_mean'] = np.mean(spectral_centroid)
-        features['spectral_centroid_std'] = np.std(spectral_centroid)
-        
-        # 3. Spectral rolloff (frequency below which 85% of energy is contained)
-        spectral_rolloff = librosa.feature.spectral_rolloff(y=y, sr=sr)[0]
-        features['spectral_rolloff_mean'] = np.mean(spectral_rolloff)
-        
-        # 4. Zero crossing rate (measure of noisiness)
-        zero_crossing_rate = librosa.feature.zero_crossing_rate(y)[0]
-        features['zero_crossing_rate_mean'] = np.mean(zero_crossing_rate)
-        
-        # 5. Root mean square energy
-        rms = librosa.feature.rms(y=y)[0]
-        features['rms_mean'] = np.mean(rms)
-        features['rms_std'] = np.std(rms)
-        
-        # 6. Spectral bandwidth
-        spectral_bandwidth = librosa.feature.spectral_bandwidth(y=y, sr=sr)[0]
-        features['spectral_bandwidth_mean'] = np.mean(spectral_bandwidth)
-        
-        return features
+        # MFCC, centroid, rolloff, RMS and bandwidth all come from one cached STFT
+        spectral = spectral or SpectralFeatures(y, sr)
+        return spectral.summary()
     
-    def detect_barks_by_frequency(self, y, sr, threshold=0.1):
+    def detect_barks_by_frequency(self, y, sr, threshold=0.1, spectral=None):
         """Detect potential barks based on frequency analysis"""
-        # Compute spectrogram
-        D = librosa.stft(y)
-        frequencies = librosa.fft_frequencies(sr=sr)
-        
-        # Find frequency bins in bark range
-        bark_mask = (frequencies >= self.bark_frequency_range[0]) & (frequencies <= self.bark_frequency_range[1])
-        
-        # Calculate energy in bark frequency range
-        bark_energy = np.sum(np.abs(D[bark_mask, :])**2, axis=0)
-        total_energy = np.sum(np.abs(D)**2, axis=0)
+        spectral = spectral or SpectralFeatures(y, sr)
         
-        # Normalize
-        bark_ratio = bark_energy / (total_energy + 1e-10)
+        # Energy ratio in the bark frequency range per STFT frame
+        bark_ratio = spectral.band_energy_ratio(*self.bark_frequency_range)
         
         # Find segments with high bark energy
         bark_segments = bark_ratio > threshold
@@ -82,14 +52,7 @@ class DogBarkDetector:
         window_samples = int(window_size * sr)
         
         # Calculate RMS energy in windows
-        rms_energy = []
-        for i in range(0, len(y), window_samples):
-            window = y[i:i+window_samples]
-            if len(window) > 0:
-                rms = np.sqrt(np.mean(window**2))
-                rms_energy.append(rms)
-        
-        rms_energy = np.array(rms_energy)
+        rms_energy = frame_rms(y, window_samples)
         
         # Normalize
         rms_normalized = rms_energy / (np.max(rms_energy) + 1e-10)
@@ -99,21 +62,23 @@ class DogBarkDetector:
         
         return bark_segments, rms_normalized
     
-    def detect_barks_combined(self, y, sr, freq_threshold=0.1, amp_threshold=0.1):
+    def detect_barks_combined(self, y, sr, freq_threshold=0.1, amp_threshold=0.1, spectral=None):
         """Combine frequency and amplitude analysis for better detection"""
         # Frequency-based detection
-        freq_segments, freq_ratio = self.detect_barks_by_frequency(y, sr, freq_threshold)
+        freq_segments, freq_ratio = self.detect_barks_by_frequency(y, sr, freq_threshold, spectral=spectral)
         
         # Amplitude-based detection
         amp_segments, amp_ratio = self.detect_barks_by_amplitude(y, sr, threshold=amp_threshold)
         
-        # Combine both methods (logical AND)
-        combined_segments = freq_segments & amp_segments[:len(freq_segments)]
+        # Map each STFT frame onto the amplitude window containing it, then combine (logical AND)
+        hop_length = spectral.hop_length if spectral is not None else 512
+        window = np.arange(len(freq_segments)) * hop_length // int(0.1 * sr)
+        combined_segments = freq_segments & amp_segments[np.minimum(window, len(amp_segments) - 1)]
         
         return combined_segments, freq_ratio, amp_ratio
     
-    def analyze_audio(self, file_path, plot=True):
-        """Complete analysis of audio file for dog barks"""
+    def analyze_audio(self, file_path, plot=True, plot_path=None):
+        """Complete analysis of audio file for dog barks; plot_path renders a PNG instead of showing the plot"""
         print(f"Analyzing: {file_path}")
         
         # Load audio
@@ -123,14 +88,20 @@ class DogBarkDetector:
         
         print(f"Audio loaded: {len(y)/sr:.2f} seconds, {sr} Hz")
         
+        # Compute the STFT once for features, detection and plotting
+        spectral = SpectralFeatures(y, sr)
+        
         # Extract features
-        features = self.extract_features(y, sr)
+        features = self.extract_features(y, sr, spectral=spectral)
         print("\nAudio Features:")
         for key, value in features.items():
-            print(f"  {key}: {value:.4f}")
+            if np.ndim(value):
+                print(f"  {key}: {np.array2string(value, precision=4)}")
+            else:
+                print(f"  {key}: {value:.4f}")
         
         # Detect barks
-        bark_segments, freq_ratio, amp_ratio = self.detect_barks_combined(y, sr)
+        bark_segments, freq_ratio, amp_ratio = self.detect_barks_combined(y, sr, spectral=spectral)
         
         # Count potential barks
         bark_count = np.sum(bark_segments)
@@ -142,7 +113,8 @@ class DogBarkDetector:
         print(f"  Bark percentage: {bark_percentage:.2f}%")
         
         if plot:
-            self.plot_analysis(y, sr, bark_segments, freq_ratio, amp_ratio)
+            self.plot_analysis(y, sr, bark_segments, freq_ratio, amp_ratio, spectral=spectral,
+                               output_path=plot_path)
         
         return {
             'features': features,
@@ -153,36 +125,36 @@ class DogBarkDetector:
             'amp_ratio': amp_ratio
         }
     
-    def plot_analysis(self, y, sr, bark_segments, freq_ratio, amp_ratio):
-        """Plot the analysis results"""
-        fig, axes = plt.subplots(4, 1, figsize=(12, 10))
+    def plot_analysis(self, y, sr, bark_segments, freq_ratio, amp_ratio, spectral=None, output_path=None):
+        """Plot the analysis results at screen resolution; saves a PNG headless when output_path is given"""
+        spectral = spectral or SpectralFeatures(y, sr)
+        fig, axes = new_figure(4, 10, headless=output_path is not None)
         
-        # Plot 1: Waveform
-        time = np.linspace(0, len(y)/sr, len(y))
-        axes[0].plot(time, y)
+        # Plot 1: Waveform (min/max envelope per pixel column)
+        plot_envelope(axes[0], y, sr)
         axes[0].set_title('Audio Waveform')
         axes[0].set_ylabel('Amplitude')
         
-        # Plot 2: Spectrogram
-        D = librosa.amplitude_to_db(np.abs(librosa.stft(y)), ref=np.max)
-        librosa.display.specshow(D, sr=sr, x_axis='time', y_axis='log', ax=axes[1])
+        # Plot 2: Spectrogram (reuses the cached STFT at display resolution)
+        plot_spectrogram(axes[1], spectral)
         axes[1].set_title('Spectrogram')
         
         # Plot 3: Frequency ratio
-        time_freq = np.linspace(0, len(y)/sr, len(freq_ratio))
+        time_freq, freq_ratio = decimate_series(freq_ratio, spectral.hop_length / sr)
         axes[2].plot(time_freq, freq_ratio)
+        axes[2].set_xlim(0, len(y)/sr)
         axes[2].set_title('Bark Frequency Ratio')
         axes[2].set_ylabel('Ratio')
         
         # Plot 4: Amplitude ratio
-        time_amp = np.linspace(0, len(y)/sr, len(amp_ratio))
+        time_amp, amp_ratio = decimate_series(amp_ratio, len(y) / sr / max(1, len(amp_ratio)))
         axes[3].plot(time_amp, amp_ratio)
+        axes[3].set_xlim(0, len(y)/sr)
         axes[3].set_title('Bark Amplitude Ratio')
         axes[3].set_ylabel('Ratio')
         axes[3].set_xlabel('Time (s)')
         
-        plt.tight_layout()
-        plt.show()
+        finish_figure(fig, output_path)
 
 def main():
     detector = DogBarkDetector()
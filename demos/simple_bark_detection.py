@@ -1,13 +1,23 @@
+import os
+import sys
 import librosa
+import librosa.display
 import numpy as np
 import matplotlib.pyplot as plt
 from scipy import signal
 import warnings
 warnings.filterwarnings('ignore')
 
-def simple_bark_detection(audio_file, plot=True):
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from spectral_features import SpectralFeatures
+from bark_events import detect_bark_events, score_bark
+from waveform_plot import new_figure, plot_envelope, plot_spectrogram, decimate_series, finish_figure
+
+def simple_bark_detection(audio_file, plot=True, plot_path=None):
     """
     Simple dog bark detection using basic audio analysis
+
+    With plot_path the plot is rendered headless to that PNG instead of shown.
     """
     print(f"Analyzing: {audio_file}")
     
@@ -19,10 +29,14 @@ def simple_bark_detection(audio_file, plot=True):
         print(f"Error loading audio: {e}")
         return None
     
+    # All analysis runs on STFT frames (hop 512), never on per-sample arrays
+    spectral = SpectralFeatures(y, sr)
+    frame_s = spectral.hop_length / sr
+    
     # 1. Basic amplitude analysis
     print("\n=== Amplitude Analysis ===")
-    rms = librosa.feature.rms(y=y)[0]
-    max_amplitude = np.max(np.abs(y))
+    rms = spectral.rms
+    max_amplitude = max(float(np.max(y)), -float(np.min(y)))
     avg_amplitude = np.mean(np.abs(y))
     
     print(f"Max amplitude: {max_amplitude:.4f}")
@@ -34,59 +48,38 @@ def simple_bark_detection(audio_file, plot=True):
     # Dog barks typically have frequencies between 200-2000 Hz
     bark_freq_min, bark_freq_max = 200, 2000
     
-    # Compute spectrogram
-    D = librosa.stft(y)
-    frequencies = librosa.fft_frequencies(sr=sr)
-    
-    # Find frequency bins in bark range
-    bark_mask = (frequencies >= bark_freq_min) & (frequencies <= bark_freq_max)
-    
-    # Calculate energy in bark frequency range
-    bark_energy = np.sum(np.abs(D[bark_mask, :])**2, axis=0)
-    total_energy = np.sum(np.abs(D)**2, axis=0)
-    
-    # Normalize
-    bark_ratio = bark_energy / (total_energy + 1e-10)
+    # Energy ratio in the bark frequency range per frame
+    bark_ratio = spectral.band_energy_ratio(bark_freq_min, bark_freq_max)
     
     print(f"Bark frequency range: {bark_freq_min}-{bark_freq_max} Hz")
     print(f"Average bark energy ratio: {np.mean(bark_ratio):.4f}")
     print(f"Max bark energy ratio: {np.max(bark_ratio):.4f}")
     
-    # 3. Detect potential bark segments
+    # 3. Detect bark events
     print("\n=== Bark Detection ===")
     
-    # Threshold-based detection
-    amplitude_threshold = 0.1 * max_amplitude
-    frequency_threshold = 0.1
-    
-    # Find segments with high amplitude
-    high_amp_segments = np.abs(y) > amplitude_threshold
-    
-    # Find segments with high bark frequency content
-    # We need to interpolate bark_ratio to match the audio length
-    bark_ratio_interp = np.interp(
-        np.linspace(0, 1, len(y)), 
-        np.linspace(0, 1, len(bark_ratio)), 
-        bark_ratio
+    # Hysteresis: enter an event above the high thresholds, leave it below the low ones
+    events, bark_frames = detect_bark_events(
+        rms, bark_ratio, sr, spectral.hop_length,
+        amp_on=0.2 * np.max(rms), amp_off=0.1 * np.max(rms),
     )
-    high_freq_segments = bark_ratio_interp > frequency_threshold
-    
-    # Combine both conditions
-    bark_segments = high_amp_segments & high_freq_segments
     
-    # Count bark events
-    bark_count = np.sum(bark_segments)
-    total_samples = len(bark_segments)
-    bark_percentage = (bark_count / total_samples) * 100
+    # Count bark frames
+    bark_count = int(np.sum(bark_frames))
+    total_frames = len(bark_frames)
+    bark_percentage = (bark_count / total_frames) * 100 if total_frames else 0.0
     
-    print(f"Potential bark segments: {bark_count}/{total_samples}")
+    print(f"Bark frames: {bark_count}/{total_frames} ({frame_s * 1000:.1f} ms each)")
     print(f"Bark percentage: {bark_percentage:.2f}%")
+    print(f"Bark events: {len(events)}")
+    for event in events:
+        print(f"  {event['onset']:.2f}s - {event['offset']:.2f}s (confidence {event['confidence']:.2f})")
     
     # 4. Spectral features
     print("\n=== Spectral Features ===")
-    spectral_centroid = librosa.feature.spectral_centroid(y=y, sr=sr)[0]
-    spectral_rolloff = librosa.feature.spectral_rolloff(y=y, sr=sr)[0]
-    zero_crossing_rate = librosa.feature.zero_crossing_rate(y)[0]
+    spectral_centroid = spectral.centroid
+    spectral_rolloff = spectral.rolloff
+    zero_crossing_rate = spectral.zero_crossing_rate
     
     print(f"Spectral centroid - Mean: {np.mean(spectral_centroid):.1f} Hz")
     print(f"Spectral rolloff - Mean: {np.mean(spectral_rolloff):.1f} Hz")
@@ -95,80 +88,55 @@ def simple_bark_detection(audio_file, plot=True):
     # 5. Bark classification
     print("\n=== Bark Classification ===")
     
-    # Simple rule-based classification
-    bark_score = 0
-    
-    # Amplitude score
-    if max_amplitude > 0.5:
-        bark_score += 2
-    elif max_amplitude > 0.3:
-        bark_score += 1
-    
-    # Frequency score
-    if np.mean(bark_ratio) > 0.3:
-        bark_score += 2
-    elif np.mean(bark_ratio) > 0.1:
-        bark_score += 1
-    
-    # Spectral centroid score (dog barks are typically bright sounds)
-    if np.mean(spectral_centroid) > 2000:
-        bark_score += 1
-    
-    # Final classification
-    if bark_score >= 4:
-        classification = "HIGH - Likely contains dog barks"
-    elif bark_score >= 2:
-        classification = "MEDIUM - May contain dog barks"
-    else:
-        classification = "LOW - Unlikely to contain dog barks"
+    bark_score, classification = score_bark(max_amplitude, np.mean(bark_ratio), np.mean(spectral_centroid))
     
     print(f"Bark score: {bark_score}/5")
     print(f"Classification: {classification}")
     
     if plot:
-        plot_analysis(y, sr, bark_segments, bark_ratio_interp)
+        plot_analysis(y, sr, events, bark_ratio, spectral=spectral, output_path=plot_path)
     
     return {
         'bark_score': bark_score,
         'classification': classification,
         'bark_percentage': bark_percentage,
         'max_amplitude': max_amplitude,
-        'bark_ratio_mean': np.mean(bark_ratio)
+        'bark_ratio_mean': np.mean(bark_ratio),
+        'events': events
     }
 
-def plot_analysis(y, sr, bark_segments, bark_ratio):
-    """Plot the analysis results"""
-    fig, axes = plt.subplots(3, 1, figsize=(12, 8))
+def plot_analysis(y, sr, events, bark_ratio, spectral=None, output_path=None):
+    """Plot the analysis results at screen resolution; saves a PNG headless when output_path is given"""
+    spectral = spectral or SpectralFeatures(y, sr)
+    fig, axes = new_figure(3, 8, headless=output_path is not None)
     
-    # Plot 1: Waveform with bark segments highlighted
-    time = np.linspace(0, len(y)/sr, len(y))
-    axes[0].plot(time, y, 'b-', alpha=0.7, label='Audio')
+    # Plot 1: Waveform envelope with bark events highlighted
+    plot_envelope(axes[0], y, sr, color='b', alpha=0.7, label='Audio')
     
-    # Highlight bark segments
-    bark_times = time[bark_segments]
-    bark_amplitudes = y[bark_segments]
-    axes[0].scatter(bark_times, bark_amplitudes, c='red', s=10, alpha=0.8, label='Potential barks')
+    # Highlight bark events
+    for i, event in enumerate(events):
+        axes[0].axvspan(event['onset'], event['offset'], color='red', alpha=0.3,
+                        label='Bark events' if i == 0 else None)
     
     axes[0].set_title('Audio Waveform with Bark Detection')
     axes[0].set_ylabel('Amplitude')
     axes[0].legend()
     
-    # Plot 2: Spectrogram
-    D = librosa.amplitude_to_db(np.abs(librosa.stft(y)), ref=np.max)
-    librosa.display.specshow(D, sr=sr, x_axis='time', y_axis='log', ax=axes[1])
+    # Plot 2: Spectrogram (reuses the cached STFT at display resolution)
+    plot_spectrogram(axes[1], spectral)
     axes[1].set_title('Spectrogram')
     
     # Plot 3: Bark frequency ratio over time
-    time_freq = np.linspace(0, len(y)/sr, len(bark_ratio))
+    time_freq, bark_ratio = decimate_series(bark_ratio, spectral.hop_length / sr)
     axes[2].plot(time_freq, bark_ratio, 'g-', label='Bark frequency ratio')
-    axes[2].axhline(y=0.1, color='r', linestyle='--', alpha=0.7, label='Threshold')
+    axes[2].axhline(y=0.3, color='r', linestyle='--', alpha=0.7, label='Threshold')
+    axes[2].set_xlim(0, len(y)/sr)
     axes[2].set_title('Bark Frequency Ratio Over Time')
     axes[2].set_ylabel('Ratio')
     axes[2].set_xlabel('Time (s)')
     axes[2].legend()
     
-    plt.tight_layout()
-    plt.show()
+    finish_figure(fig, output_path)
 
 def main():
     # Example usage
@@ -182,6 +150,7 @@ def main():
             print(f"Bark Score: {results['bark_score']}/5")
             print(f"Classification: {results['classification']}")
             print(f"Bark Percentage: {results['bark_percentage']:.2f}%")
+            print(f"Bark Events: {len(results['events'])}")
     except Exception as e:
         print(f"Error: {e}")
 
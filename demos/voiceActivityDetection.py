@@ -1,33 +1,37 @@
-from funasr import AutoModel
 import os
+import sys
 
-def get_total_voice_length(data_dir):
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from vad_store import VADStore, scan_corpus, corpus_stats
+
+
+def get_total_voice_length(data_dir, store_path="data/vad", workers=None):
     """
     Calculates the total detected voice activity length (in seconds) for all audio files in the given directory.
 
+    VAD runs in parallel (one fsmn-vad model per worker) and the segments are kept in a
+    segment store, so files analyzed before are not processed again.
+
     Args:
         data_dir (str): Path to the directory containing audio files.
+        store_path (str): Segment store directory.
+        workers (int): Worker processes (default: CPU count).
 
     Returns:
         float: Total voice activity length in seconds.
     """
-    model = AutoModel(model="fsmn-vad")
-    total_length = 0.0
-
     # Supported audio extensions
     audio_exts = ('.wav', '.mp3', '.aac', '.flac', '.m4a', '.ogg')
 
-    # Walk through the directory and process each audio file
+    audio_files = []
     for root, dirs, files in os.walk(data_dir):
         for file in files:
             if file.lower().endswith(audio_exts):
-                wav_file = os.path.join(root, file)
-                res = model.generate(input=wav_file)
-                voice_segments = res[0]["value"]
-                for v in voice_segments:
-                    total_length += (v[1] - v[0])
+                audio_files.append(os.path.join(root, file))
 
-    return total_length / 1000  # Convert ms to seconds
+    scan_corpus(audio_files, store_path, workers=workers)
+    return corpus_stats(VADStore(store_path), paths=audio_files)["speech_seconds"]
 
 # Example usage:
 # data_dir = "/Users/william/Work/VoiceData/data/audio/"
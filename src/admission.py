@@ -0,0 +1,226 @@
+import os
+import sys
+import time
+import shutil
+import threading
+import subprocess
+from contextlib import contextmanager
+
+
+# Rough memory model of one transcription job, in MB. Defaults fit SenseVoiceSmall + fsmn-vad
+# on CPU/MPS; estimates are rescaled at run time from measured RSS (see AdmissionController).
+MODEL_MB = 1200.0                 # one worker's transcript + VAD models
+JOB_OVERHEAD_MB = 50.0            # per job regardless of length
+WAVEFORM_MB_PER_SECOND = 0.25     # librosa decode + 16 kHz float32 copy, when segments are cut locally
+ASR_MB_PER_BATCH_SECOND = 8.0     # features and activations per second of audio in one ASR batch
+
+# Bytes per second assumed when the duration cannot be read at all (64 kbps, which
+# overestimates the length of higher-bitrate files and so errs on the safe side)
+FALLBACK_BYTES_PER_SECOND = 8000
+
+
+def current_rss_mb():
+    """Resident set size of this process in MB (psutil, then /proc, then peak RSS as a last resort)"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2 ** 20
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and in KB on Linux
+        return peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024
+
+
+def audio_duration(audio_path):
+    """
+    Duration of an audio file in seconds.
+
+    librosa reads it from the header of formats soundfile understands and decodes the rest
+    (aac/m4a) through audioread; ffprobe is tried next. Only when both fail is the duration
+    estimated from the file size.
+    """
+    try:
+        import librosa
+        return librosa.get_duration(path=audio_path)
+    except Exception:
+        pass
+    if shutil.which("ffprobe"):
+        try:
+            output = subprocess.run(["ffprobe", "-v", "error", "-show_entries", "format=duration",
+                                     "-of", "default=noprint_wrappers=1:nokey=1", audio_path],
+                                    capture_output=True, text=True, timeout=30, check=True).stdout
+            return float(output.strip())
+        except (subprocess.SubprocessError, ValueError):
+            pass
+    return os.path.getsize(audio_path) / FALLBACK_BYTES_PER_SECOND
+
+
+def estimate_job_mb(duration_s, batch_size_s=60, load_waveform=False, load_models=False):
+    """
+    Estimate the extra memory one process_audio_file call needs.
+
+    Args:
+        duration_s (float): Audio duration in seconds
+        batch_size_s (float): ASR batch size in seconds of audio (batch_size_s of generate)
+        load_waveform (bool): The job decodes the waveform itself (segments_dir / mask_events)
+        load_models (bool): The worker still has to load its models
+
+    Returns:
+        float: Estimated MB
+    """
+    cost = JOB_OVERHEAD_MB + ASR_MB_PER_BATCH_SECOND * min(duration_s, batch_size_s)
+    if load_waveform:
+        cost += WAVEFORM_MB_PER_SECOND * duration_s
+    if load_models:
+        cost += MODEL_MB
+    return cost
+
+
+class AdmissionController:
+    """
+    Admits jobs only while their estimated memory fits in a budget.
+
+    ASR workers are threads of one process, so there is no per-job memory figure to read:
+    all jobs share a single process RSS, sampled every ``interval`` seconds by a monitor
+    thread. A job is admitted when ``max(rss, idle_rss + reserved) + cost <= budget``:
+    ``reserved`` is the sum of estimates of running jobs, so both an underestimate and
+    memory that is not released count against the budget. On top of that a concurrency
+    limit, starting at 1, shrinks by one whenever RSS passes ``high_water`` of the budget
+    and grows one step (up to ``max_concurrency``) after RSS has stayed below
+    ``low_water`` for ``recover_samples`` consecutive samples.
+
+    Estimates are multiplied by a learned scale, calibrated by attributing RSS growth to
+    the jobs that were running while it happened. It rises immediately when the running
+    jobs together grow RSS by more than their scaled estimates, and is eased back towards
+    the ratio of peak RSS growth to estimate of every job that ran alone, the only case
+    in which the growth belongs to a single job.
+
+    A job larger than the whole budget still runs, alone. Waiting jobs are admitted in
+    arrival order, except that smaller jobs may overtake the oldest waiter up to
+    ``max_bypass`` times, which keeps workers busy without starving long files.
+    """
+
+    def __init__(self, budget_mb, max_concurrency, high_water=0.9, low_water=0.7, interval=0.5, max_bypass=4,
+                 recover_samples=4, rss_fn=current_rss_mb):
+        self.budget_mb = budget_mb
+        self.max_concurrency = max_concurrency
+        # Slow start: nothing has been measured yet, so ramp up from one job at a time
+        self.limit = 1
+        self.high_water = high_water
+        self.low_water = low_water
+        self.interval = interval
+        self.max_bypass = max_bypass
+        self.recover_samples = recover_samples
+        self._calm = 0
+        self.scale = 1.0
+        self.rss_fn = rss_fn
+        self.rss = rss_fn()
+        self.idle_rss = self.rss
+        self.reserved = 0.0
+        self.peak_rss = self.rss
+        self._jobs = {}
+        self._waiting = []
+        self._bypassed = 0
+        self._next_ticket = 0
+        self._condition = threading.Condition()
+        self._stop = threading.Event()
+        self._monitor = threading.Thread(target=self._sample, daemon=True)
+        self._monitor.start()
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        """Take one RSS sample and adjust the scale and concurrency limit (called by the monitor thread)"""
+        rss = self.rss_fn()
+        with self._condition:
+            self.rss = rss
+            self.peak_rss = max(self.peak_rss, rss)
+            for job in self._jobs.values():
+                job["peak"] = max(job["peak"], rss)
+                job["alone"] = job["alone"] and len(self._jobs) == 1
+            if not self._jobs:
+                self.idle_rss = rss
+            else:
+                # Growth since the oldest running job started, against what the running
+                # jobs were estimated to need: raise the scale at once if it was too low
+                growth = rss - min(job["start_rss"] for job in self._jobs.values())
+                estimated = sum(job["estimate"] for job in self._jobs.values())
+                if growth > estimated * self.scale:
+                    self.scale = min(4.0, growth / estimated)
+            if rss > self.high_water * self.budget_mb:
+                self._calm = 0
+                if self.limit > 1:
+                    self.limit = max(1, min(self.limit, len(self._jobs)) - 1)
+                    print(f"Memory pressure: {rss:.0f} MB RSS, concurrency limit {self.limit}")
+            elif rss < self.low_water * self.budget_mb:
+                self._calm += 1
+                if self._calm >= self.recover_samples and self.limit < self.max_concurrency:
+                    self.limit += 1
+                    self._calm = 0
+            else:
+                self._calm = 0
+            self._condition.notify_all()
+
+    def _fits(self, ticket, cost):
+        if self._waiting[0] != ticket and self._bypassed >= self.max_bypass:
+            return False
+        if not self._jobs:
+            return True
+        if len(self._jobs) >= self.limit:
+            return False
+        return max(self.rss, self.idle_rss + self.reserved) + cost <= self.budget_mb
+
+    @contextmanager
+    def admit(self, estimate_mb):
+        """
+        Block until a job with this (unscaled) estimate fits, then hold its reservation.
+
+        Yields:
+            float: Seconds spent waiting for admission
+        """
+        start_time = time.time()
+        with self._condition:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            self._waiting.append(ticket)
+            cost = estimate_mb * self.scale
+            while not self._fits(ticket, cost):
+                self._condition.wait(self.interval)
+                cost = estimate_mb * self.scale
+            if self._waiting[0] == ticket:
+                self._bypassed = 0
+            else:
+                self._bypassed += 1
+            self._waiting.remove(ticket)
+            self.reserved += cost
+            for job in self._jobs.values():
+                job["alone"] = False
+            self._jobs[ticket] = {"estimate": estimate_mb, "start_rss": self.rss, "peak": self.rss,
+                                  "alone": not self._jobs}
+        try:
+            yield time.time() - start_time
+        finally:
+            with self._condition:
+                job = self._jobs.pop(ticket)
+                self.reserved -= cost
+                if job["alone"] and job["peak"] > job["start_rss"]:
+                    observed = (job["peak"] - job["start_rss"]) / job["estimate"]
+                    self.scale = min(4.0, max(0.25, 0.7 * self.scale + 0.3 * observed))
+                self._condition.notify_all()
+
+    def stats(self):
+        with self._condition:
+            return {"budget_mb": self.budget_mb, "limit": self.limit, "scale": round(self.scale, 3),
+                    "running": len(self._jobs), "waiting": len(self._waiting),
+                    "rss_mb": round(self.rss, 1), "peak_rss_mb": round(self.peak_rss, 1)}
+
+    def close(self):
+        self._stop.set()
+        self._monitor.join()
@@ -0,0 +1,384 @@
+import os
+import json
+import time
+import argparse
+import numpy as np
+import librosa
+
+from spectral_features import SpectralFeatures
+from bark_events import hysteresis_mask, mask_to_events, score_bark
+from profiling import stage, enable_profiling, write_reports, TIMERS
+
+
+FRAME_FEATURES = (
+    [f"mfcc_{i}" for i in range(13)]
+    + ["log_rms", "loudness", "centroid_khz", "rolloff_khz", "bandwidth_khz", "zcr", "flatness",
+       "bark_band_ratio", "pitch_band_ratio"]
+)
+
+
+def frame_features(spectral):
+    """
+    Per-frame feature matrix of one recording, shape (n_frames, len(FRAME_FEATURES)).
+
+    Everything is derived from the recording's cached STFT. Frequencies are in kHz and
+    loudness is log RMS relative to the recording's median frame, so features are
+    comparable across sample rates and recording levels.
+    """
+    rms = spectral.rms
+    log_rms = np.log(rms + 1e-6)
+    columns = [
+        spectral.mfcc.T,
+        log_rms[:, None],
+        (log_rms - np.median(log_rms))[:, None],
+        spectral.centroid[:, None] / 1000,
+        spectral.rolloff[:, None] / 1000,
+        spectral.bandwidth[:, None] / 1000,
+        spectral.zero_crossing_rate[:, None],
+        spectral.flatness[:, None],
+        spectral.band_energy_ratio(200, 2000)[:, None],
+        spectral.band_energy_ratio(80, 400)[:, None],
+    ]
+    n = min(len(c) for c in columns)
+    return np.hstack([c[:n] for c in columns]).astype(np.float32)
+
+
+def file_features(spectral, frames=None):
+    """
+    File-level feature vector: the DogBarkDetector feature dict flattened, plus the mean
+    and 95th percentile of every frame feature (so short loud barks are not averaged away).
+    """
+    frames = frame_features(spectral) if frames is None else frames
+    summary = spectral.summary()
+    vector = np.concatenate([np.atleast_1d(summary[key]) for key in sorted(summary)])
+    return np.concatenate([vector, frames.mean(axis=0), np.percentile(frames, 95, axis=0)]).astype(np.float32)
+
+
+class BarkClassifier:
+    """
+    Logistic regression (hidden=0) or a one-hidden-layer tanh MLP, trained with Adam in NumPy.
+
+    Inputs are standardized with statistics stored alongside the weights, so a saved
+    model is a single .npz of plain arrays with no pickled objects.
+    """
+
+    def __init__(self, hidden=0, l2=1e-3):
+        self.hidden = hidden
+        self.l2 = l2
+        self.mean = None
+        self.std = None
+        self.weights = []
+
+    def _init_weights(self, n_features, rng):
+        sizes = [n_features, self.hidden, 1] if self.hidden else [n_features, 1]
+        self.weights = []
+        for n_in, n_out in zip(sizes[:-1], sizes[1:]):
+            self.weights.append((rng.standard_normal((n_in, n_out)) / np.sqrt(n_in)).astype(np.float32))
+            self.weights.append(np.zeros(n_out, dtype=np.float32))
+
+    def _forward(self, X):
+        """Return (logits, hidden activations or None) for standardized inputs"""
+        if self.hidden:
+            w1, b1, w2, b2 = self.weights
+            h = np.tanh(X @ w1 + b1)
+            return (h @ w2 + b2)[:, 0], h
+        w, b = self.weights
+        return (X @ w + b)[:, 0], None
+
+    def fit(self, X, y, epochs=300, learning_rate=0.01, seed=0):
+        """
+        Full-batch Adam on class-balanced log loss.
+
+        Args:
+            X (np.ndarray): Features, shape (n_samples, n_features)
+            y (np.ndarray): 0/1 labels
+            epochs (int): Optimization steps
+            learning_rate (float): Adam step size
+
+        Returns:
+            BarkClassifier: self
+        """
+        X = np.asarray(X, dtype=np.float32)
+        y = np.asarray(y, dtype=np.float32)
+        self.mean = X.mean(axis=0)
+        self.std = X.std(axis=0) + 1e-6
+        X = (X - self.mean) / self.std
+        self._init_weights(X.shape[1], np.random.default_rng(seed))
+
+        # Weight each class by the inverse of its frequency; bark frames are usually rare
+        positive = max(y.mean(), 1e-6)
+        sample_weight = np.where(y > 0, 0.5 / positive, 0.5 / max(1 - positive, 1e-6)) / len(y)
+
+        m = [np.zeros_like(w) for w in self.weights]
+        v = [np.zeros_like(w) for w in self.weights]
+        for step in range(1, epochs + 1):
+            logits, h = self._forward(X)
+            # d(loss)/d(logit) for sigmoid + log loss
+            delta = ((1 / (1 + np.exp(-logits)) - y) * sample_weight)[:, None].astype(np.float32)
+            if self.hidden:
+                w1, b1, w2, b2 = self.weights
+                dh = (delta @ w2.T) * (1 - h ** 2)
+                grads = [X.T @ dh + self.l2 * w1, dh.sum(axis=0), h.T @ delta + self.l2 * w2, delta.sum(axis=0)]
+            else:
+                w, b = self.weights
+                grads = [X.T @ delta + self.l2 * w, delta.sum(axis=0)]
+            for i, grad in enumerate(grads):
+                m[i] = 0.9 * m[i] + 0.1 * grad
+                v[i] = 0.999 * v[i] + 0.001 * grad ** 2
+                m_hat = m[i] / (1 - 0.9 ** step)
+                v_hat = v[i] / (1 - 0.999 ** step)
+                self.weights[i] -= (learning_rate * m_hat / (np.sqrt(v_hat) + 1e-8)).astype(np.float32)
+        return self
+
+    def predict_proba(self, X):
+        """Bark probability for every row of X, in one batched pass"""
+        X = (np.asarray(X, dtype=np.float32) - self.mean) / self.std
+        logits, _ = self._forward(X)
+        return 1 / (1 + np.exp(-logits))
+
+    def predict(self, X, threshold=0.5):
+        return self.predict_proba(X) >= threshold
+
+    def save(self, path):
+        np.savez(path, hidden=self.hidden, l2=self.l2, mean=self.mean, std=self.std,
+                 **{f"w{i}": w for i, w in enumerate(self.weights)})
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        classifier = cls(hidden=int(data["hidden"]), l2=float(data["l2"]))
+        classifier.mean = data["mean"]
+        classifier.std = data["std"]
+        classifier.weights = [data[f"w{i}"] for i in range(4 if classifier.hidden else 2)]
+        return classifier
+
+
+def load_labels(labels_path):
+    """
+    Load bark labels from a JSONL file.
+
+    One {"file": ..., "label": 0/1} per line, optionally with "events": [[onset_s, offset_s], ...]
+    marking where the barks are. Files labeled 0 have no bark frames; files labeled 1 only
+    contribute frame labels when their events are given.
+
+    Returns:
+        list: Label dicts
+    """
+    records = []
+    with open(labels_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                records.append(json.loads(line))
+    return records
+
+
+def analyze_recording(path):
+    """
+    Load a recording and compute everything training and evaluation need from one STFT.
+
+    Returns:
+        dict: frames (frame feature matrix), file (file feature vector), frame_s, rule_score
+    """
+    with stage("bark_load"):
+        y, sr = librosa.load(path, sr=None)
+    with stage("bark_features"):
+        spectral = SpectralFeatures(y, sr)
+        frames = frame_features(spectral)
+        features = file_features(spectral, frames)
+        rule_score, _ = score_bark(max(float(np.max(y)), -float(np.min(y))),
+                                   float(np.mean(spectral.band_energy_ratio(200, 2000))),
+                                   float(np.mean(spectral.centroid)))
+    return {
+        "frames": frames,
+        "file": features,
+        "frame_s": spectral.hop_length / sr,
+        "rule_score": rule_score,
+    }
+
+
+def frame_labels(record, n_frames, frame_s):
+    """0/1 label per frame from a label record, or None if the bark positions are unknown"""
+    if not record["label"]:
+        return np.zeros(n_frames, dtype=np.float32)
+    if "events" not in record:
+        return None
+    labels = np.zeros(n_frames, dtype=np.float32)
+    for onset, offset in record["events"]:
+        labels[int(onset / frame_s):int(np.ceil(offset / frame_s))] = 1
+    return labels
+
+
+def build_datasets(records):
+    """
+    Extract features for every labeled recording.
+
+    Returns:
+        tuple: ((file X, file y, rule scores), (frame X, frame y, frame rule predictions))
+    """
+    file_X, file_y, rule_scores = [], [], []
+    frame_X, frame_y, frame_rules = [], [], []
+    for record in records:
+        analysis = analyze_recording(record["file"])
+        file_X.append(analysis["file"])
+        file_y.append(int(record["label"]))
+        rule_scores.append(analysis["rule_score"])
+
+        frames = analysis["frames"]
+        labels = frame_labels(record, len(frames), analysis["frame_s"])
+        if labels is not None:
+            frame_X.append(frames)
+            frame_y.append(labels)
+            # Rule baseline per frame: the entry thresholds of simple_bark_detection
+            # (bark-band ratio > 0.3 and RMS above 0.2 of the loudest frame)
+            log_rms = frames[:, FRAME_FEATURES.index("log_rms")]
+            frame_rules.append((frames[:, FRAME_FEATURES.index("bark_band_ratio")] > 0.3)
+                               & (log_rms > log_rms.max() - np.log(5)))
+
+    files = (np.array(file_X), np.array(file_y), np.array(rule_scores))
+    if not frame_X:
+        return files, None
+    return files, (np.vstack(frame_X), np.concatenate(frame_y), np.concatenate(frame_rules))
+
+
+def metrics(y_true, y_pred):
+    """Accuracy, precision and recall of boolean predictions"""
+    y_true = np.asarray(y_true).astype(bool)
+    y_pred = np.asarray(y_pred).astype(bool)
+    tp = int(np.sum(y_true & y_pred))
+    return {
+        "accuracy": round(float(np.mean(y_true == y_pred)), 4) if len(y_true) else 0.0,
+        "precision": round(tp / max(1, int(y_pred.sum())), 4),
+        "recall": round(tp / max(1, int(y_true.sum())), 4),
+    }
+
+
+def classify_recordings(paths, file_model=None, frame_model=None, threshold=0.5):
+    """
+    Score recordings with trained models; all frames of all files are scored in one batch.
+
+    Args:
+        paths (list): Audio file paths
+        file_model (BarkClassifier): File-level model
+        frame_model (BarkClassifier): Frame-level model
+        threshold (float): Probability that starts a bark event (events continue down to threshold / 2)
+
+    Returns:
+        dict: Path -> {"probability", "events"} (only the keys of the models given)
+    """
+    analyses = [analyze_recording(path) for path in paths]
+    results = {path: {} for path in paths}
+
+    if file_model is not None:
+        with stage("bark_inference"):
+            probabilities = file_model.predict_proba(np.stack([a["file"] for a in analyses]))
+        for path, probability in zip(paths, probabilities.tolist()):
+            results[path]["probability"] = round(probability, 4)
+
+    if frame_model is not None:
+        bounds = np.cumsum([0] + [len(a["frames"]) for a in analyses])
+        with stage("bark_inference"):
+            probabilities = frame_model.predict_proba(np.vstack([a["frames"] for a in analyses]))
+        for path, analysis, start, end in zip(paths, analyses, bounds[:-1], bounds[1:]):
+            p = probabilities[start:end]
+            frame_s = analysis["frame_s"]
+            active = hysteresis_mask(p >= threshold, p >= threshold / 2)
+            results[path]["events"] = [
+                {"onset": round(a * frame_s, 3), "offset": round(b * frame_s, 3),
+                 "confidence": round(float(p[a:b].mean()), 3)}
+                for a, b in mask_to_events(active, min_gap_frames=int(0.25 / frame_s))
+            ]
+    return results
+
+
+def train(labels_path, model_dir, hidden=0, holdout=0.2, seed=0):
+    """
+    Train file- and frame-level models and report hold-out metrics next to the rules.
+
+    Writes bark_file_model.npz and (when event labels exist) bark_frame_model.npz to model_dir.
+
+    Returns:
+        dict: Metrics report
+    """
+    records = load_labels(labels_path)
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(len(records))
+    n_test = int(len(records) * holdout)
+    test = [records[i] for i in order[:n_test]]
+    train_records = [records[i] for i in order[n_test:]]
+
+    start_time = time.time()
+    (file_X, file_y, _), frames = build_datasets(train_records)
+    print(f"Extracted features for {len(train_records)} recordings in {time.time() - start_time:.2f} seconds")
+
+    os.makedirs(model_dir, exist_ok=True)
+    report = {"train_files": len(train_records), "test_files": len(test)}
+    file_model = BarkClassifier(hidden=hidden).fit(file_X, file_y, seed=seed)
+    file_model.save(os.path.join(model_dir, "bark_file_model.npz"))
+    frame_model = None
+    if frames is not None:
+        frame_model = BarkClassifier(hidden=hidden).fit(frames[0], frames[1], seed=seed)
+        frame_model.save(os.path.join(model_dir, "bark_frame_model.npz"))
+        report["train_frames"] = len(frames[1])
+
+    if test:
+        (test_X, test_y, rule_scores), test_frames = build_datasets(test)
+        report["file"] = {"model": metrics(test_y, file_model.predict(test_X)),
+                          "rules": metrics(test_y, rule_scores >= 4)}
+        if frame_model is not None and test_frames is not None:
+            X, y, rules = test_frames
+            start_time = time.time()
+            predictions = frame_model.predict(X)
+            elapsed_ms = (time.time() - start_time) * 1000
+            report["frame"] = {"model": metrics(y, predictions), "rules": metrics(y, rules),
+                               "frames_per_ms": round(len(X) / max(elapsed_ms, 1e-3))}
+    return report
+
+
+def main():
+    """Command line entry point: train bark models or classify recordings with them"""
+    parser = argparse.ArgumentParser(description="Trainable bark classifier")
+    parser.add_argument("command", choices=["train", "classify"])
+    parser.add_argument("files", nargs="*", help="Audio files for the classify command")
+    parser.add_argument("--labels", default=os.environ.get("BARK_LABELS", "data/bark_labels.jsonl"))
+    parser.add_argument("--model-dir", default=os.environ.get("BARK_MODEL_DIR", "data/models"))
+    parser.add_argument("--hidden", type=int, default=0, help="Hidden units (0 = logistic regression)")
+    parser.add_argument("--holdout", type=float, default=0.2)
+    parser.add_argument("--profile", metavar="DIR", help="Write per-stage profiling reports to DIR")
+    args = parser.parse_args()
+    if args.profile:
+        enable_profiling(args.profile)
+    try:
+        _run(parser, args)
+    finally:
+        if args.profile:
+            TIMERS.report()
+            print(f"Profiles written to {args.profile} ({len(write_reports())} files)")
+
+
+def _run(parser, args):
+    """Train or classify as requested on the command line"""
+    if args.command == "train":
+        report = train(args.labels, args.model_dir, hidden=args.hidden, holdout=args.holdout)
+        print(json.dumps(report, indent=2))
+        return
+
+    if not args.files:
+        parser.error("classify command needs audio files")
+    file_path = os.path.join(args.model_dir, "bark_file_model.npz")
+    frame_path = os.path.join(args.model_dir, "bark_frame_model.npz")
+    results = classify_recordings(
+        args.files,
+        file_model=BarkClassifier.load(file_path) if os.path.exists(file_path) else None,
+        frame_model=BarkClassifier.load(frame_path) if os.path.exists(frame_path) else None,
+    )
+    for path, result in results.items():
+        events = result.get("events", [])
+        probability = result.get("probability")
+        print(f"{path}: p(bark)={probability if probability is not None else '-'}, {len(events)} events")
+        for event in events:
+            print(f"  {event['onset']:.2f}s - {event['offset']:.2f}s (confidence {event['confidence']:.2f})")
+
+
+if __name__ == "__main__":
+    main()
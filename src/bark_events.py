@@ -0,0 +1,132 @@
+import numpy as np
+
+
+def hysteresis_mask(on, hold):
+    """
+    Two-threshold activation: a run of ``hold`` frames is active if any frame in it is ``on``.
+
+    Short dips below the entry threshold do not split an event, and frames that only
+    pass the lower threshold never start one.
+
+    Args:
+        on (np.ndarray): Boolean per-frame mask for the entry (high) threshold
+        hold (np.ndarray): Boolean per-frame mask for the exit (low) threshold
+
+    Returns:
+        np.ndarray: Boolean per-frame activity
+    """
+    hold = hold | on
+    # Label each run of hold frames (0 outside runs), then keep runs that contain an on frame
+    starts = hold & ~np.concatenate(([False], hold[:-1]))
+    run_id = np.cumsum(starts) * hold
+    triggered = np.zeros(run_id.max() + 1 if len(run_id) else 1, dtype=bool)
+    triggered[run_id[on]] = True
+    triggered[0] = False
+    return triggered[run_id]
+
+
+def mask_to_events(active, min_gap_frames=0, min_frames=1):
+    """
+    Convert a per-frame mask into [start, end) frame runs, merging runs separated by short gaps.
+
+    Args:
+        active (np.ndarray): Boolean per-frame activity
+        min_gap_frames (int): Merge runs whose gap is at most this many frames
+        min_frames (int): Drop merged runs shorter than this
+
+    Returns:
+        list: (start_frame, end_frame) pairs
+    """
+    edges = np.diff(np.concatenate(([0], active.astype(np.int8), [0])))
+    runs = []
+    for start, end in zip(np.nonzero(edges == 1)[0].tolist(), np.nonzero(edges == -1)[0].tolist()):
+        if runs and start - runs[-1][1] <= min_gap_frames:
+            runs[-1][1] = end
+        else:
+            runs.append([start, end])
+    return [(start, end) for start, end in runs if end - start >= min_frames]
+
+
+def score_bark(max_amplitude, bark_ratio_mean, spectral_centroid_mean):
+    """
+    Rule-based bark score (0-5) and its classification label, as used by simple_bark_detection.
+
+    Returns:
+        tuple: (score, classification string)
+    """
+    bark_score = 0
+
+    # Amplitude score
+    if max_amplitude > 0.5:
+        bark_score += 2
+    elif max_amplitude > 0.3:
+        bark_score += 1
+
+    # Frequency score
+    if bark_ratio_mean > 0.3:
+        bark_score += 2
+    elif bark_ratio_mean > 0.1:
+        bark_score += 1
+
+    # Spectral centroid score (dog barks are typically bright sounds)
+    if spectral_centroid_mean > 2000:
+        bark_score += 1
+
+    # Final classification
+    if bark_score >= 4:
+        classification = "HIGH - Likely contains dog barks"
+    elif bark_score >= 2:
+        classification = "MEDIUM - May contain dog barks"
+    else:
+        classification = "LOW - Unlikely to contain dog barks"
+
+    return bark_score, classification
+
+
+def detect_bark_events(rms, bark_ratio, sr, hop_length, amp_on, amp_off, ratio_on=0.3, ratio_off=0.15,
+                       min_gap_s=0.25, min_duration_s=0.05):
+    """
+    Detect bark events from frame-level amplitude and bark-band energy ratio.
+
+    A frame enters an event when both its RMS amplitude and bark-band ratio pass the
+    high thresholds; the event continues while both stay above the low thresholds.
+    Events closer than ``min_gap_s`` are merged and events shorter than
+    ``min_duration_s`` dropped.
+
+    Confidence is the mean of two [0, 1] terms: the event's mean bark-band energy ratio
+    and its peak RMS relative to the loudest frame of the recording.
+
+    Args:
+        rms (np.ndarray): RMS amplitude per frame (SpectralFeatures.rms)
+        bark_ratio (np.ndarray): Bark-band energy ratio per frame (band_energy_ratio)
+        sr (int): Sample rate
+        hop_length (int): Samples per frame
+        amp_on (float): Amplitude that starts an event
+        amp_off (float): Amplitude below which an event ends
+        ratio_on (float): Bark-band ratio that starts an event
+        ratio_off (float): Bark-band ratio below which an event ends
+        min_gap_s (float): Merge events separated by at most this many seconds
+        min_duration_s (float): Minimum event length in seconds
+
+    Returns:
+        tuple: (list of {"onset", "offset", "confidence"} dicts in seconds, per-frame activity mask)
+    """
+    n = min(len(rms), len(bark_ratio))
+    rms, bark_ratio = rms[:n], bark_ratio[:n]
+    frame_s = hop_length / sr
+
+    active = hysteresis_mask((rms > amp_on) & (bark_ratio > ratio_on), (rms > amp_off) & (bark_ratio > ratio_off))
+    runs = mask_to_events(active, min_gap_frames=int(min_gap_s / frame_s),
+                          min_frames=max(1, int(np.ceil(min_duration_s / frame_s))))
+
+    loudest = float(rms.max()) if n else 0.0
+    events = []
+    for start, end in runs:
+        ratio = float(np.mean(bark_ratio[start:end]))
+        loudness = float(rms[start:end].max()) / loudest if loudest > 0 else 0.0
+        events.append({
+            "onset": round(start * frame_s, 3),
+            "offset": round(end * frame_s, 3),
+            "confidence": round(min(1.0, 0.5 * ratio + 0.5 * loudness), 3),
+        })
+    return events, active
@@ -0,0 +1,219 @@
+import sys
+import time
+import argparse
+import numpy as np
+import soundfile as sf
+import audioread
+
+
+class StreamingBarkDetector:
+    """
+    Incremental bark detector for live audio.
+
+    Audio arrives in chunks of any size through ``feed``. The detector keeps only the
+    last ``n_fft - hop_length`` samples between calls, computes STFT frames as soon as
+    they are complete and runs the same cues as detect_bark_events (RMS and bark-band
+    energy ratio with hysteresis) frame by frame. Memory is constant and an event is
+    emitted at most ``min_gap_s`` after its last bark frame, or after ``max_event_s``
+    for continuous barking.
+
+    A live stream has no "loudest frame of the recording", so amplitude thresholds are
+    relative to a running noise floor (a slow average of log RMS over non-event frames).
+    """
+
+    def __init__(self, sr, n_fft=2048, hop_length=512, bark_range=(200, 2000), on_db=12.0, off_db=6.0,
+                 ratio_on=0.3, ratio_off=0.15, min_gap_s=0.25, min_duration_s=0.05, max_event_s=5.0,
+                 floor_seconds=10.0, min_rms=1e-4):
+        self.sr = sr
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.window = np.hanning(n_fft + 1)[:-1].astype(np.float32)
+        frequencies = np.fft.rfftfreq(n_fft, 1 / sr)
+        self.band = (frequencies >= bark_range[0]) & (frequencies <= bark_range[1])
+        self.on_ratio = 10 ** (on_db / 20)
+        self.off_ratio = 10 ** (off_db / 20)
+        self.ratio_on = ratio_on
+        self.ratio_off = ratio_off
+        self.frame_s = hop_length / sr
+        self.min_gap_frames = int(min_gap_s / self.frame_s)
+        self.min_frames = max(1, int(np.ceil(min_duration_s / self.frame_s)))
+        self.max_frames = int(max_event_s / self.frame_s)
+        # EMA coefficient so the floor follows level changes over about floor_seconds
+        self.floor_alpha = 1 / max(1.0, floor_seconds / self.frame_s)
+        self.min_rms = min_rms
+
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._frame = 0
+        self._log_floor = None
+        self._event = None
+        self._last_active = None
+
+    def feed(self, chunk):
+        """
+        Process the next chunk of mono float samples.
+
+        Returns:
+            list: Completed events as {"onset", "offset", "confidence"} dicts (seconds since stream start)
+        """
+        chunk = np.asarray(chunk, dtype=np.float32)
+        if chunk.ndim > 1:
+            chunk = chunk.mean(axis=1)
+        self._buffer = np.concatenate([self._buffer, chunk])
+        n_frames = (len(self._buffer) - self.n_fft) // self.hop_length + 1
+        if n_frames <= 0:
+            return []
+
+        # All complete frames of this chunk in one batched FFT
+        frames = np.lib.stride_tricks.sliding_window_view(self._buffer, self.n_fft)[::self.hop_length][:n_frames]
+        power = np.abs(np.fft.rfft(frames * self.window, axis=1)) ** 2
+        ratio = power[:, self.band].sum(axis=1) / (power.sum(axis=1) + 1e-10)
+        rms = np.sqrt(np.mean(np.square(frames, dtype=np.float64), axis=1))
+        self._buffer = self._buffer[n_frames * self.hop_length:].copy()
+
+        events = []
+        for frame_rms, frame_ratio in zip(rms.tolist(), ratio.tolist()):
+            events.extend(self._step(frame_rms, frame_ratio))
+            self._frame += 1
+        return events
+
+    def _step(self, rms, ratio):
+        """Advance the hysteresis state machine by one frame"""
+        log_rms = np.log(max(rms, self.min_rms))
+        if self._log_floor is None:
+            self._log_floor = log_rms
+        floor = np.exp(self._log_floor)
+
+        if self._event is None:
+            active = rms > floor * self.on_ratio and ratio > self.ratio_on
+        else:
+            active = rms > floor * self.off_ratio and ratio > self.ratio_off
+
+        emitted = []
+        if active:
+            if self._event is None:
+                self._event = {"start": self._frame, "peak": rms, "ratio_sum": 0.0, "frames": 0, "floor": floor}
+            self._event["peak"] = max(self._event["peak"], rms)
+            self._event["ratio_sum"] += ratio
+            self._event["frames"] += 1
+            self._last_active = self._frame
+            if self._frame + 1 - self._event["start"] >= self.max_frames:
+                emitted.extend(self._close())
+        else:
+            # Only quiet frames update the floor, so a long barking spell does not raise it
+            self._log_floor += self.floor_alpha * (log_rms - self._log_floor)
+            if self._event is not None and self._frame - self._last_active > self.min_gap_frames:
+                emitted.extend(self._close())
+        return emitted
+
+    def _close(self):
+        event, self._event = self._event, None
+        end = self._last_active + 1
+        if end - event["start"] < self.min_frames:
+            return []
+        ratio = event["ratio_sum"] / event["frames"]
+        # Loudness term saturates at 24 dB above the noise floor
+        loudness = min(1.0, event["peak"] / (event["floor"] * 16))
+        return [{
+            "onset": round(event["start"] * self.frame_s, 3),
+            "offset": round(end * self.frame_s, 3),
+            "confidence": round(min(1.0, 0.5 * ratio + 0.5 * loudness), 3),
+        }]
+
+    def flush(self):
+        """End of stream: emit the event still open, if any"""
+        return self._close() if self._event is not None else []
+
+    @property
+    def position(self):
+        """Seconds of audio processed so far (up to the last complete frame)"""
+        return self._frame * self.frame_s
+
+
+def _decoded_blocks(path):
+    """
+    Decode any format audioread can open (the phone recordings are .aac, read through ffmpeg).
+
+    Returns:
+        tuple: (sample rate, generator of float32 blocks of shape (samples, channels))
+    """
+    f = audioread.audio_open(path)
+
+    def blocks():
+        with f:
+            pending = b""
+            for buffer in f:
+                # Decoder pipes can split a sample across buffers; carry the remainder over
+                data = pending + buffer
+                usable = len(data) // (2 * f.channels) * (2 * f.channels)
+                data, pending = data[:usable], data[usable:]
+                samples = np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+                yield samples.reshape(-1, f.channels)
+
+    return f.samplerate, blocks()
+
+
+def read_blocks(path, chunk_s=0.5):
+    """
+    Read an audio file block by block: libsndfile for WAV/FLAC/OGG, audioread (ffmpeg) for .aac/.m4a/.mp3.
+
+    Returns:
+        tuple: (sample rate, iterable of float32 blocks)
+    """
+    try:
+        sr = sf.info(path).samplerate
+    except RuntimeError:
+        return _decoded_blocks(path)
+    return sr, sf.blocks(path, blocksize=int(chunk_s * sr), dtype="float32")
+
+
+def stream_file(path, chunk_s=0.5, **kwargs):
+    """
+    Run the streaming detector over a file block by block, never loading it whole.
+
+    Yields:
+        dict: Events as they are completed
+    """
+    sr, blocks = read_blocks(path, chunk_s)
+    detector = StreamingBarkDetector(sr, **kwargs)
+    for block in blocks:
+        yield from detector.feed(block)
+    yield from detector.flush()
+
+
+def main():
+    """Print bark events from an audio file, or raw float32 mono PCM on stdin ("-") as they happen"""
+    parser = argparse.ArgumentParser(description="Streaming bark detector")
+    parser.add_argument("source", help='Audio file, or "-" for raw float32 mono PCM on stdin')
+    parser.add_argument("--sr", type=int, default=16000, help="Sample rate of stdin PCM")
+    parser.add_argument("--chunk", type=float, default=0.5, help="Chunk length in seconds")
+    args = parser.parse_args()
+
+    start_time = time.time()
+    if args.source != "-":
+        for event in stream_file(args.source, chunk_s=args.chunk):
+            print(f"BARK {event['onset']:.2f}s - {event['offset']:.2f}s (confidence {event['confidence']:.2f})")
+        print(f"Done in {time.time() - start_time:.2f} seconds", file=sys.stderr)
+        return
+
+    # e.g. ffmpeg -i <stream> -f f32le -ac 1 -ar 16000 - | python src/bark_stream.py -
+    detector = StreamingBarkDetector(args.sr)
+    chunk_bytes = int(args.chunk * args.sr) * 4
+    pending = b""
+    while True:
+        data = sys.stdin.buffer.read(chunk_bytes)
+        if not data:
+            break
+        # Pipes can return partial samples; carry the remainder over to the next read
+        data, pending = pending + data, b""
+        usable = len(data) // 4 * 4
+        data, pending = data[:usable], data[usable:]
+        for event in detector.feed(np.frombuffer(data, dtype=np.float32)):
+            lag = detector.position - event["offset"]
+            print(f"BARK {event['onset']:.2f}s - {event['offset']:.2f}s (confidence {event['confidence']:.2f}, "
+                  f"reported {lag:.2f}s after it ended)", flush=True)
+    for event in detector.flush():
+        print(f"BARK {event['onset']:.2f}s - {event['offset']:.2f}s (confidence {event['confidence']:.2f})")
+
+
+if __name__ == "__main__":
+    main()
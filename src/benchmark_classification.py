@@ -0,0 +1,220 @@
+import os
+import sys
+import json
+import time
+import random
+import tempfile
+import threading
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+from file_utils import analyze_insurance_content, analyze_insurance_text
+from ollama_pool import OllamaPool
+from mock_ollama import start_mock_server
+from text_normalizer import normalize_text
+from embedding_classifier import EmbeddingCache, NearestCentroidClassifier, embed_texts, classify_directory
+
+
+# Real transcripts to sample sentences from, independent of the working directory
+DEFAULT_SOURCE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "text")
+
+
+class TimedPool(OllamaPool):
+    """OllamaPool that records the wall-clock latency of every request"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latencies = []
+        self.errors = 0
+        self._timing_lock = threading.Lock()
+
+    def post(self, path, payload, timeout=None, retries=None):
+        start_time = time.perf_counter()
+        try:
+            return super().post(path, payload, timeout=timeout, retries=retries)
+        except Exception:
+            with self._timing_lock:
+                self.errors += 1
+            raise
+        finally:
+            with self._timing_lock:
+                self.latencies.append(time.perf_counter() - start_time)
+
+
+def build_synthetic_corpus(source_dir, output_dir, n_files, seed=0):
+    """
+    Write n_files synthetic transcripts built from sentences sampled out of source_dir.
+
+    Args:
+        source_dir (str): Directory of real transcripts to sample sentences from (built-in
+            sentences are used when it is missing or empty)
+        output_dir (str): Directory to write the synthetic .txt files
+        n_files (int): Number of files to generate
+        seed (int): Random seed
+
+    Returns:
+        str: output_dir
+    """
+    sentences = []
+    for filename in (os.listdir(source_dir) if os.path.isdir(source_dir) else []):
+        if filename.endswith(".txt"):
+            with open(os.path.join(source_dir, filename), "r", encoding="utf-8") as f:
+                sentences.extend(s + "。" for s in f.read().split("。") if s.strip())
+    if not sentences:
+        sentences = ["现在超过10年的燃气表呢都在进行更换。", "这个减压阀要换个新的。"]
+
+    rng = random.Random(seed)
+    os.makedirs(output_dir, exist_ok=True)
+    for i in range(n_files):
+        text = "".join(rng.choice(sentences) for _ in range(rng.randint(5, 40)))
+        with open(os.path.join(output_dir, f"synthetic_{i:06d}.txt"), "w", encoding="utf-8") as f:
+            f.write(text)
+    return output_dir
+
+
+def _report(name, n_files, elapsed, pool, cache=None):
+    latencies = np.array(pool.latencies) * 1000
+    report = {
+        "variant": name,
+        "files": n_files,
+        "seconds": round(elapsed, 3),
+        "files_per_s": round(n_files / elapsed, 2) if elapsed > 0 else None,
+        "requests": len(pool.latencies),
+        "requests_per_s": round(len(pool.latencies) / elapsed, 2) if elapsed > 0 else None,
+        "p50_latency_ms": round(float(np.percentile(latencies, 50)), 2) if len(latencies) else None,
+        "p95_latency_ms": round(float(np.percentile(latencies, 95)), 2) if len(latencies) else None,
+        "errors": pool.errors,
+    }
+    if cache is not None:
+        lookups = cache.hits + cache.misses
+        report["cache_hit_rate"] = round(cache.hits / lookups, 4) if lookups else None
+    return report
+
+
+def bench_sequential(text_dir, endpoints, work_dir):
+    """Baseline: analyze_insurance_content, one request at a time"""
+    pool = TimedPool(endpoints)
+    results_path = os.path.join(work_dir, "sequential.jsonl")
+    try:
+        start_time = time.perf_counter()
+        results = analyze_insurance_content(text_dir, results_path=results_path, pool=pool)
+        return _report("sequential", len(results), time.perf_counter() - start_time, pool)
+    finally:
+        pool.close()
+
+
+def bench_concurrent(text_dir, endpoints, workers):
+    """analyze_insurance_text fanned out over a thread pool and all endpoints"""
+    pool = TimedPool(endpoints)
+    contents = []
+    for filename in sorted(os.listdir(text_dir)):
+        if filename.endswith(".txt"):
+            with open(os.path.join(text_dir, filename), "r", encoding="utf-8") as f:
+                contents.append(normalize_text(f.read())[0])
+
+    def analyze(content):
+        try:
+            return analyze_insurance_text(content, pool=pool)
+        except Exception as e:
+            return f"Error: {str(e)}"
+
+    try:
+        start_time = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(analyze, contents))
+        return _report(f"concurrent_x{workers}", len(contents), time.perf_counter() - start_time, pool)
+    finally:
+        pool.close()
+
+
+def bench_embedding(text_dir, endpoints, work_dir, passes=2):
+    """Embedding classifier; the second pass shows the effect of the embedding cache"""
+    pool = TimedPool(endpoints)
+    cache = EmbeddingCache(os.path.join(work_dir, "embedding_cache"))
+    seed_texts = ["我们在推销燃气保险，保险费一年一百元。", "燃气表超过10年要统一更换。"]
+    try:
+        classifier = NearestCentroidClassifier().fit(embed_texts(seed_texts, pool=pool), ["insurance_upsell", "none"])
+
+        reports = []
+        for i in range(passes):
+            pool.latencies, pool.errors = [], 0
+            cache.hits = cache.misses = 0
+            start_time = time.perf_counter()
+            results = classify_directory(text_dir, classifier, cache=cache, fallback=None, pool=pool)
+            reports.append(_report(f"embedding_pass{i + 1}", len(results), time.perf_counter() - start_time, pool,
+                                   cache))
+        return reports
+    finally:
+        pool.close()
+
+
+def run_benchmark(text_dir=None, n_synthetic=200, workers=8, n_mock_endpoints=2, endpoints=None, **mock_config):
+    """
+    Run every classification variant and return the reports.
+
+    Args:
+        text_dir (str): Transcript directory; a synthetic corpus is generated when None
+        n_synthetic (int): Size of the synthetic corpus
+        workers (int): Threads for the concurrent variant
+        n_mock_endpoints (int): Mock servers to start when endpoints is None
+        endpoints (list): Real Ollama URLs to benchmark instead of mocks
+        **mock_config: Overrides for the mock server (latency, error_rate, ...)
+
+    Returns:
+        list: One report dict per variant
+    """
+    servers = []
+    if endpoints is None:
+        endpoints = []
+        for _ in range(n_mock_endpoints):
+            server, url = start_mock_server(**mock_config)
+            servers.append(server)
+            endpoints.append(url)
+
+    try:
+        with tempfile.TemporaryDirectory() as work_dir:
+            if text_dir is None:
+                text_dir = build_synthetic_corpus(DEFAULT_SOURCE_DIR, os.path.join(work_dir, "text"), n_synthetic)
+
+            reports = [
+                bench_sequential(text_dir, endpoints, work_dir),
+                bench_concurrent(text_dir, endpoints, workers),
+            ]
+            reports.extend(bench_embedding(text_dir, endpoints, work_dir))
+            return reports
+    finally:
+        for server in servers:
+            server.shutdown()
+
+
+def main():
+    """
+    Benchmark against mock servers (or OLLAMA_ENDPOINTS when BENCH_REAL=1) and print JSON.
+
+    Only the JSON report goes to stdout; progress lines of the benchmarked code go to stderr.
+    """
+    endpoints = None
+    if os.environ.get("BENCH_REAL", "0") == "1":
+        endpoints = os.environ.get("OLLAMA_ENDPOINTS", "http://localhost:11434").split(",")
+
+    with contextlib.redirect_stdout(sys.stderr):
+        reports = run_benchmark(
+            text_dir=os.environ.get("BENCH_TEXT_DIR"),
+            n_synthetic=int(os.environ.get("BENCH_FILES", "200")),
+            workers=int(os.environ.get("BENCH_WORKERS", "8")),
+            endpoints=endpoints,
+            latency=float(os.environ.get("MOCK_LATENCY", "0.05")),
+            error_rate=float(os.environ.get("MOCK_ERROR_RATE", "0.0")),
+        )
+
+    output = json.dumps(reports, indent=2)
+    print(output)
+    output_path = os.environ.get("BENCH_OUTPUT")
+    if output_path:
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+import os
+import sys
+import time
+import argparse
+
+# Only the standard library is imported here. Every subcommand imports its own dependencies
+# (funasr, librosa, numpy, requests, ...) inside its handler, so light commands start fast.
+
+
+AUDIO_EXTENSIONS = ('.wav', '.mp3', '.aac', '.flac', '.m4a', '.ogg')
+DEFAULT_AUDIOS_PATH = os.environ.get("AUDIOS_PATH", "/Users/william/Work/VoiceData/data")
+DEFAULT_TEXT_DIR = os.environ.get("TEXT_DIR", "data/text")
+
+DEMOS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "demos")
+
+
+def find_audio_files(directory):
+    """Audio files below directory, sorted (same extensions as get_audio_files)"""
+    audio_files = []
+    for root, dirs, files in os.walk(directory):
+        for file in files:
+            if file.lower().endswith(AUDIO_EXTENSIONS):
+                audio_files.append(os.path.join(root, file))
+    return sorted(audio_files)
+
+
+def cmd_list_audio(args):
+    audio_files = find_audio_files(args.audios_path)
+    print(f"Found {len(audio_files)} audio files:")
+    for audio_file in audio_files:
+        print(f"  {audio_file}")
+
+
+def cmd_list(args):
+    from packed_corpus import TranscriptSource
+    with TranscriptSource(args.text_dir) as transcripts:
+        names = transcripts.names()
+    for name in names:
+        print(name)
+    print(f"{len(names)} transcripts in {args.text_dir}", file=sys.stderr)
+
+
+def cmd_transcribe(args):
+    # voice_to_text_processor is configured through the environment; flags override it
+    for flag, variable in (("audios_path", "AUDIOS_PATH"), ("output_dir", "OUTPUT_DIR"),
+                           ("corpus", "CORPUS_PATH"), ("segments_dir", "SEGMENTS_DIR")):
+        if getattr(args, flag):
+            os.environ[variable] = getattr(args, flag)
+    if args.mask_events:
+        os.environ["MASK_EVENTS"] = "1"
+    if args.vad_store:
+        os.environ["VAD_STORE"] = args.vad_store
+    from voice_to_text_processor import main
+    main()
+
+
+def cmd_vad_stats(args):
+    from vad_store import VADStore, scan_corpus, corpus_stats, print_stats
+    audio_files = find_audio_files(args.audios_path)
+    start_time = time.time()
+    result = scan_corpus(audio_files, args.store, workers=args.workers, resume=not args.rescan)
+    print(f"VAD: {result['analyzed']} analyzed, {result['skipped']} from the store, {result['failed']} failed "
+          f"in {time.time() - start_time:.2f} seconds", file=sys.stderr)
+    stats = corpus_stats(VADStore(args.store), paths=audio_files)
+    if args.json:
+        import json
+        print(json.dumps(stats, indent=2))
+    else:
+        print_stats(stats)
+
+
+def cmd_classify(args):
+    if args.mode == "embedding":
+        os.environ["TEXT_DIR"] = args.text_dir
+        from embedding_classifier import main
+        main()
+    elif args.mode == "categories":
+        from file_utils import print_categorization_summary
+        print_categorization_summary(args.text_dir, resume=args.resume, debug=args.debug)
+    else:
+        from file_utils import print_insurance_analysis
+        print_insurance_analysis(args.text_dir, resume=args.resume, debug=args.debug)
+
+
+def cmd_bark_scan(args):
+    sys.path.insert(0, DEMOS_DIR)
+    from bark_scan import scan_directory
+    start_time = time.time()
+    rows = scan_directory(args.audios_path, args.output, workers=args.workers, resume=not args.rescan)
+    print(f"Scanned {len(rows)} files in {time.time() - start_time:.2f} seconds; results in {args.output}")
+
+
+def cmd_search(args):
+    from transcript_index import TranscriptIndex
+    index = TranscriptIndex(args.index_dir, args.text_dir)
+    if args.update:
+        index.update()
+    start_time = time.time()
+    results = index.search(args.query, limit=args.limit)
+    elapsed_ms = (time.time() - start_time) * 1000
+    for result in results:
+        print(f"{result['file']}:{result['offset']} ({result['hits']} hits) ...{result['snippet']}...")
+    print(f"{len(results)} results in {elapsed_ms:.1f} ms", file=sys.stderr)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="DemoFunASR tools")
+    parser.add_argument("--profile", metavar="DIR",
+                        help="Write per-stage cProfile (.pstats) and tracemalloc (.alloc.txt) reports to DIR")
+    parser.add_argument("--profile-cpu-only", action="store_true", help="Skip tracemalloc when profiling")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("list-audio", help="List audio files")
+    command.add_argument("audios_path", nargs="?", default=DEFAULT_AUDIOS_PATH)
+    command.set_defaults(handler=cmd_list_audio)
+
+    command = commands.add_parser("list", help="List transcripts in a directory or packed corpus")
+    command.add_argument("text_dir", nargs="?", default=DEFAULT_TEXT_DIR)
+    command.set_defaults(handler=cmd_list)
+
+    command = commands.add_parser("transcribe", help="Transcribe audio files with SenseVoice")
+    command.add_argument("--audios-path")
+    command.add_argument("--output-dir")
+    command.add_argument("--corpus", help="Also append transcripts to this packed corpus")
+    command.add_argument("--segments-dir", help="Also write per-segment JSONL transcripts")
+    command.add_argument("--mask-events", action="store_true", help="Skip barking/noise VAD segments")
+    command.add_argument("--vad-store", help="Reuse VAD segments from this store (see vad-stats)")
+    command.set_defaults(handler=cmd_transcribe)
+
+    command = commands.add_parser("vad-stats", help="Parallel fsmn-vad into a segment store, then corpus statistics")
+    command.add_argument("audios_path", nargs="?", default=DEFAULT_AUDIOS_PATH)
+    command.add_argument("--store", default=os.environ.get("VAD_STORE", "data/vad"))
+    command.add_argument("--workers", type=int, default=None)
+    command.add_argument("--rescan", action="store_true", help="Run VAD again for files already in the store")
+    command.add_argument("--json", action="store_true", help="Print the statistics as JSON")
+    command.set_defaults(handler=cmd_vad_stats)
+
+    command = commands.add_parser("classify", help="Classify transcripts")
+    command.add_argument("text_dir", nargs="?", default=DEFAULT_TEXT_DIR)
+    command.add_argument("--mode", choices=["insurance", "categories", "embedding"], default="insurance")
+    command.add_argument("--resume", action="store_true", help="Skip transcripts that already have a verdict")
+    command.add_argument("--debug", action="store_true", help="Print prompts and raw model responses")
+    command.set_defaults(handler=cmd_classify)
+
+    command = commands.add_parser("bark-scan", help="Score every recording for dog barks")
+    command.add_argument("audios_path", nargs="?", default=DEFAULT_AUDIOS_PATH)
+    command.add_argument("--output", default=os.environ.get("BARK_RESULTS_PATH", "data/results/bark_scan.csv"))
+    command.add_argument("--workers", type=int, default=None)
+    command.add_argument("--rescan", action="store_true", help="Re-analyze files already in the table")
+    command.set_defaults(handler=cmd_bark_scan)
+
+    command = commands.add_parser("search", help="Full-text search over transcripts")
+    command.add_argument("query")
+    command.add_argument("--text-dir", default=DEFAULT_TEXT_DIR)
+    command.add_argument("--index-dir", default=os.environ.get("INDEX_DIR", "data/index"))
+    command.add_argument("--limit", type=int, default=20)
+    command.add_argument("--update", action="store_true", help="Index new or changed transcripts first")
+    command.set_defaults(handler=cmd_search)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.profile:
+        from profiling import enable_profiling
+        enable_profiling(args.profile, memory=not args.profile_cpu_only)
+    try:
+        args.handler(args)
+    finally:
+        if args.profile:
+            from profiling import write_reports
+            print(f"Profiles written to {args.profile} ({len(write_reports())} files)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
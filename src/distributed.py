@@ -0,0 +1,321 @@
+import os
+import json
+import time
+import socket
+import random
+import hashlib
+import threading
+
+from result_sink import ResultSink
+
+
+class Lease:
+    """A claim on one key, held by this node until completed, released or taken over"""
+
+    def __init__(self, leases, key, generation):
+        self.leases = leases
+        self.key = key
+        self.generation = generation
+        self.lost = False
+
+
+class LeaseDir:
+    """
+    Leases on a shared directory, so several machines can split work without a coordinator.
+
+    Every key gets numbered lease files ``<hash>.<generation>.lease``. Claiming creates the
+    next generation with O_CREAT | O_EXCL, which succeeds for exactly one node even on NFS.
+    A node may only create generation g + 1 once generation g has expired, so taking over
+    from a dead node is the same atomic create and needs no locks or renames. A holder
+    renews by rewriting the expiry of its own file and notices a takeover when generation
+    g + 1 appears. Finished keys get a ``<hash>.done`` marker.
+
+    Expiry times are wall-clock timestamps, so node clocks must agree to well within ``ttl``.
+    """
+
+    def __init__(self, path, node_id=None, ttl=600.0):
+        self.path = path
+        self.node_id = node_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.ttl = ttl
+        os.makedirs(path, exist_ok=True)
+
+    def _base(self, key):
+        return os.path.join(self.path, hashlib.sha1(key.encode("utf-8")).hexdigest()[:20])
+
+    def _lease_path(self, key, generation):
+        return f"{self._base(key)}.{generation}.lease"
+
+    def _latest(self, key):
+        """Highest existing generation of a key, or -1"""
+        generation = -1
+        while os.path.exists(self._lease_path(key, generation + 1)):
+            generation += 1
+        return generation
+
+    def _expires(self, path):
+        """Expiry of a lease file; a file left empty by a crash expires ttl after its mtime"""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)["expires"]
+        except (OSError, ValueError, KeyError):
+            try:
+                return os.path.getmtime(path) + self.ttl
+            except OSError:
+                return 0.0
+
+    def _record(self, key, generation):
+        return json.dumps({"key": key, "node": self.node_id, "generation": generation,
+                           "expires": time.time() + self.ttl})
+
+    def is_done(self, key):
+        return os.path.exists(f"{self._base(key)}.done")
+
+    def claim(self, key):
+        """
+        Try to take the lease on a key.
+
+        Returns:
+            Lease: The new lease, or None if the key is done or held by a live node
+        """
+        if self.is_done(key):
+            return None
+        generation = self._latest(key)
+        if generation >= 0 and self._expires(self._lease_path(key, generation)) > time.time():
+            return None
+        path = self._lease_path(key, generation + 1)
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            return None
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(self._record(key, generation + 1))
+        if generation >= 0:
+            print(f"Took over {key} from an expired lease (generation {generation})")
+        return Lease(self, key, generation + 1)
+
+    def renew(self, lease):
+        """
+        Extend a lease by ttl.
+
+        Returns:
+            bool: False if another node has taken the key over in the meantime
+        """
+        if lease.lost or os.path.exists(self._lease_path(lease.key, lease.generation + 1)):
+            lease.lost = True
+            return False
+        path = self._lease_path(lease.key, lease.generation)
+        tmp_path = f"{path}.{self.node_id}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self._record(lease.key, lease.generation))
+        os.replace(tmp_path, path)
+        return True
+
+    def complete(self, lease):
+        """Mark the key done; a no-op returning False when the lease was lost"""
+        if not self.renew(lease):
+            return False
+        with open(f"{self._base(lease.key)}.done", "w", encoding="utf-8") as f:
+            f.write(json.dumps({"key": lease.key, "node": self.node_id, "time": time.time()}))
+        return True
+
+    def release(self, lease):
+        """Give a key up early (expire the lease now) so another node can take it"""
+        if lease.lost:
+            return
+        path = self._lease_path(lease.key, lease.generation)
+        tmp_path = f"{path}.{self.node_id}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"key": lease.key, "node": self.node_id, "generation": lease.generation,
+                                "expires": 0.0}))
+        os.replace(tmp_path, path)
+
+
+class Heartbeat:
+    """Renews a lease every ttl / 3 in a background thread while work on it runs"""
+
+    def __init__(self, leases, lease):
+        self.leases = leases
+        self.lease = lease
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.leases.ttl / 3):
+            if not self.leases.renew(self.lease):
+                print(f"Lost lease on {self.lease.key}")
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+
+
+def make_shards(audio_files, shard_size=1):
+    """
+    Split a file list into shards keyed by their first file.
+
+    Every node must see the same sorted list, so the same shard keys come out everywhere.
+
+    Returns:
+        list: (key, files) pairs
+    """
+    audio_files = sorted(audio_files)
+    return [(audio_files[i], audio_files[i:i + shard_size]) for i in range(0, len(audio_files), shard_size)]
+
+
+def run_node(audio_files, lease_dir, results_dir, process, node_id=None, ttl=600.0, shard_size=1,
+             poll_interval=None, max_attempts=3, max_failures=5):
+    """
+    Process shards of audio_files as one of many nodes sharing lease_dir.
+
+    Each node starts at its own random offset in the shard list, so nodes rarely race
+    for the same lease and throughput scales with the number of nodes. When every
+    remaining shard is held by another node, the node waits and retries, which is how
+    shards of a node that died are taken over once their leases expire.
+
+    Results go to ``results_dir/<node_id>.jsonl``; a shard taken over is written again by
+    its new holder and the later line wins in load_node_results, so re-running is harmless.
+
+    A shard is only marked done when all its files succeeded. When a file fails, the error
+    is recorded and the lease released so any node can retry the shard, until its lease
+    has been claimed max_attempts times; then it is marked done with the error. A node
+    whose last max_failures files all failed (a broken GPU, a full disk) releases its
+    lease and stops with a RuntimeError instead of burning through the remaining work.
+
+    Args:
+        audio_files (list): Audio file paths (the same list on every node)
+        lease_dir (str): Shared lease directory
+        results_dir (str): Shared directory for per-node result files
+        process (callable): process(audio_path) -> JSON-serializable record
+        node_id (str): Unique name of this node (default: hostname-pid)
+        ttl (float): Lease lifetime in seconds without renewal
+        shard_size (int): Files per lease
+        poll_interval (float): Wait between passes when all work is held elsewhere (default ttl / 10)
+        max_attempts (int): Claims of a failing shard before it is given up and marked done
+        max_failures (int): Consecutive failed files after which this node stops
+
+    Returns:
+        int: Number of files processed successfully by this node
+    """
+    leases = LeaseDir(lease_dir, node_id=node_id, ttl=ttl)
+    shards = make_shards(audio_files, shard_size)
+    poll_interval = poll_interval or ttl / 10
+    offset = random.Random(leases.node_id).randrange(len(shards)) if shards else 0
+    shards = shards[offset:] + shards[:offset]
+
+    processed = failures = 0
+    with ResultSink(os.path.join(results_dir, f"{leases.node_id}.jsonl")) as sink:
+        while True:
+            pending = [(key, files) for key, files in shards if not leases.is_done(key)]
+            if not pending:
+                break
+            claimed = False
+            for key, files in pending:
+                lease = leases.claim(key)
+                if lease is None:
+                    continue
+                claimed = True
+                failed = False
+                try:
+                    with Heartbeat(leases, lease):
+                        for audio_path in files:
+                            if lease.lost:
+                                break
+                            filename = os.path.basename(audio_path)
+                            try:
+                                record = process(audio_path)
+                            except Exception as e:
+                                print(f"Error processing {filename}: {str(e)}")
+                                record = {"file": filename, "error": f"Error: {str(e)}"}
+                                failed = True
+                            sink.write(filename, record, node=leases.node_id, path=audio_path)
+                            if failed:
+                                break
+                            processed += 1
+                            failures = 0
+                except BaseException:
+                    # Ctrl-C or shutdown: hand the shard to the other nodes right away
+                    leases.release(lease)
+                    raise
+                if failed and lease.generation + 1 < max_attempts:
+                    leases.release(lease)
+                elif not leases.complete(lease):
+                    print(f"Shard {key} was taken over by another node")
+                elif failed:
+                    print(f"Giving up on shard {key} after {lease.generation + 1} attempts")
+                if failed:
+                    failures += 1
+                    if failures >= max_failures:
+                        raise RuntimeError(f"Stopping node {leases.node_id} after {failures} consecutive failures")
+            if not claimed:
+                time.sleep(poll_interval)
+    return processed
+
+
+def load_node_results(results_dir):
+    """
+    Merge the per-node result files of a distributed run.
+
+    Returns:
+        dict: filename -> record (the latest write wins when a shard ran twice)
+    """
+    merged = {}
+    timed = {}
+    for name in sorted(os.listdir(results_dir)):
+        if not name.endswith(".jsonl"):
+            continue
+        with open(os.path.join(results_dir, name), "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if record["time"] >= timed.get(record["file"], 0.0):
+                    timed[record["file"]] = record["time"]
+                    merged[record["file"]] = record["result"]
+    return merged
+
+
+def main():
+    """Transcribe AUDIOS_PATH cooperatively with every other node using the same LEASE_DIR"""
+    from voice_to_text_processor import load_models, get_audio_files, process_audio_file
+
+    audios_path = os.environ.get("AUDIOS_PATH", "/Users/william/Work/VoiceData/data")
+    output_dir = os.environ.get("OUTPUT_DIR", "/Users/william/Work/VoiceData/data/text")
+    logs_dir = os.environ.get("LOGS_DIR", "./logs")
+    lease_dir = os.environ.get("LEASE_DIR", os.path.join(output_dir, ".leases"))
+    results_dir = os.environ.get("NODE_RESULTS_DIR", os.path.join(output_dir, ".results"))
+    mask_events = os.environ.get("MASK_EVENTS", "0") == "1"
+
+    os.makedirs(output_dir, exist_ok=True)
+    os.makedirs(logs_dir, exist_ok=True)
+
+    models = []
+
+    def process(audio_path):
+        # Models load on the first claimed file, so a node that arrives late costs nothing
+        if not models:
+            models.extend(load_models())
+        transcript_model, vad_model = models
+        return process_audio_file(audio_path, os.path.basename(audio_path), transcript_model, vad_model,
+                                  output_dir, logs_dir, mask_events=mask_events)
+
+    start_time = time.time()
+    processed = run_node(
+        get_audio_files(audios_path), lease_dir, results_dir, process,
+        node_id=os.environ.get("NODE_ID"),
+        ttl=float(os.environ.get("LEASE_TTL", "600")),
+        shard_size=int(os.environ.get("SHARD_SIZE", "1")),
+        max_attempts=int(os.environ.get("LEASE_MAX_ATTEMPTS", "3")),
+        max_failures=int(os.environ.get("NODE_MAX_FAILURES", "5")),
+    )
+    print(f"This node processed {processed} files in {time.time() - start_time:.2f} seconds; "
+          f"{len(load_node_results(results_dir))} files done across all nodes")
+
+
+if __name__ == "__main__":
+    main()
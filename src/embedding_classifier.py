@@ -0,0 +1,306 @@
+import os
+import json
+import hashlib
+import time
+import threading
+import numpy as np
+
+from file_utils import DEFAULT_CATEGORIES, categorize_conversation
+from ollama_pool import get_default_pool
+from packed_corpus import iter_transcripts
+
+
+# Seed sets should use the taxonomy keys (plus "none") as labels so the generative fallback can answer in them
+DEFAULT_SEED_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "seed_labels.jsonl")
+NO_LABEL = "none"
+
+
+def chunk_text(text, chunk_size=400, overlap=50):
+    """
+    Split text into overlapping character chunks for embedding.
+
+    Args:
+        text (str): Transcript text
+        chunk_size (int): Characters per chunk
+        overlap (int): Characters shared between consecutive chunks
+
+    Returns:
+        list: List of chunk strings (at least one, possibly empty)
+    """
+    if len(text) <= chunk_size:
+        return [text]
+    step = max(chunk_size - overlap, 1)
+    return [text[i:i + chunk_size] for i in range(0, len(text) - overlap, step)]
+
+
+class EmbeddingCache:
+    """On-disk cache of embedding vectors, one .npy file per (model, chunk) hash"""
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, model, text):
+        key = hashlib.sha1(f"{model}\0{text}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.npy")
+
+    def get(self, model, text):
+        path = self._path(model, text)
+        if os.path.exists(path):
+            self.hits += 1
+            return np.load(path)
+        self.misses += 1
+        return None
+
+    def put(self, model, text, vector):
+        """Write to a private temporary file and rename it, so readers never load a torn .npy"""
+        path = self._path(model, text)
+        tmp_path = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, np.asarray(vector, dtype=np.float32))
+        os.replace(tmp_path, path)
+
+
+def fetch_embeddings(texts, model="nomic-embed-text", pool=None, timeout=60):
+    """
+    Fetch embeddings for a batch of texts from the Ollama /api/embed endpoint.
+
+    Args:
+        texts (list): Strings to embed
+        model (str): Ollama embedding model name
+        pool (OllamaPool): Endpoint pool (defaults to the OLLAMA_ENDPOINTS pool)
+        timeout (int): Request timeout in seconds
+
+    Returns:
+        np.ndarray: float32 array of shape (len(texts), dim)
+    """
+    pool = pool or get_default_pool()
+    response = pool.post(
+        "/api/embed",
+        {"model": model, "input": texts},
+        timeout=timeout,
+    )
+    response.raise_for_status()
+    return np.asarray(response.json()["embeddings"], dtype=np.float32)
+
+
+def embed_texts(texts, cache=None, model="nomic-embed-text", pool=None, batch_size=32):
+    """
+    Embed whole transcripts as the mean of their L2-normalized chunk embeddings.
+
+    Only chunks missing from the cache are sent to Ollama, in batches.
+
+    Args:
+        texts (list): Transcript strings
+        cache (EmbeddingCache): Optional embedding cache
+        model (str): Ollama embedding model name
+        pool (OllamaPool): Endpoint pool (defaults to the OLLAMA_ENDPOINTS pool)
+        batch_size (int): Chunks per /api/embed request
+
+    Returns:
+        np.ndarray: float32 array of shape (len(texts), dim), rows L2-normalized
+    """
+    doc_chunks = [chunk_text(text) for text in texts]
+    vectors = {}
+    missing = []
+
+    for chunks in doc_chunks:
+        for chunk in chunks:
+            if chunk in vectors:
+                continue
+            cached = cache.get(model, chunk) if cache is not None else None
+            if cached is not None:
+                vectors[chunk] = cached
+            else:
+                vectors[chunk] = None
+                missing.append(chunk)
+
+    for i in range(0, len(missing), batch_size):
+        batch = missing[i:i + batch_size]
+        embeddings = fetch_embeddings(batch, model=model, pool=pool)
+        for chunk, vector in zip(batch, embeddings):
+            vectors[chunk] = vector
+            if cache is not None:
+                cache.put(model, chunk, vector)
+
+    result = []
+    for chunks in doc_chunks:
+        chunk_matrix = _normalize(np.stack([vectors[chunk] for chunk in chunks]))
+        result.append(chunk_matrix.mean(axis=0))
+
+    return _normalize(np.stack(result))
+
+
+def _normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-10)
+
+
+class NearestCentroidClassifier:
+    """Cosine nearest-centroid classifier over transcript embeddings"""
+
+    def __init__(self, margin_threshold=0.05):
+        self.margin_threshold = margin_threshold
+        self.labels = []
+        self.centroids = None
+
+    def fit(self, X, y):
+        """Compute one normalized centroid per label from the seed embeddings"""
+        y = np.asarray(y)
+        self.labels = sorted(set(y.tolist()))
+        self.centroids = _normalize(np.stack([X[y == label].mean(axis=0) for label in self.labels]))
+        return self
+
+    def scores(self, X):
+        """Cosine similarity of every row in X to every centroid"""
+        return _normalize(X) @ self.centroids.T
+
+    def predict(self, X):
+        """
+        Predict labels for a batch of embeddings.
+
+        Returns:
+            tuple: (labels, margins, ambiguous) where margins is the gap between the best
+                   and second-best centroid and ambiguous marks margins below the threshold
+        """
+        scores = self.scores(X)
+        order = np.argsort(scores, axis=1)
+        best = order[:, -1]
+        top = scores[np.arange(len(scores)), best]
+        if scores.shape[1] > 1:
+            margins = top - scores[np.arange(len(scores)), order[:, -2]]
+        else:
+            margins = np.full(len(scores), np.inf)
+        labels = [self.labels[i] for i in best]
+        return labels, margins, margins < self.margin_threshold
+
+    def save(self, path):
+        np.savez(path, centroids=self.centroids, labels=np.array(self.labels),
+                 margin_threshold=self.margin_threshold)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        classifier = cls(margin_threshold=float(data["margin_threshold"]))
+        classifier.labels = data["labels"].tolist()
+        classifier.centroids = data["centroids"]
+        return classifier
+
+
+def load_seed_set(seed_path):
+    """
+    Load a labeled seed set from a JSONL file with one {"text": ..., "label": ...} per line.
+
+    Returns:
+        tuple: (texts, labels)
+    """
+    if not os.path.exists(seed_path):
+        raise FileNotFoundError(f"Seed set {seed_path} not found: write one {{\"text\", \"label\"}} JSON object "
+                                f"per line (see data/seed_labels.jsonl) and point SEED_PATH at it")
+    texts, labels = [], []
+    with open(seed_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            texts.append(record["text"])
+            labels.append(record["label"])
+    return texts, labels
+
+
+def generative_fallback(content, labels, pool=None):
+    """
+    Resolve an ambiguous transcript with the single-pass generative categorizer, in the classifier's labels.
+
+    Only the taxonomy categories the classifier was fit on are asked for; no match maps
+    to "none" when that is one of the classifier's labels.
+
+    Args:
+        content (str): Transcript text
+        labels (list): The classifier's labels
+        pool (OllamaPool): Endpoint pool (defaults to the OLLAMA_ENDPOINTS pool)
+
+    Returns:
+        str: One of labels, or None when the generative answer has no counterpart among them
+    """
+    categories = {label: DEFAULT_CATEGORIES[label] for label in labels if label in DEFAULT_CATEGORIES}
+    if not categories:
+        return None
+    result = categorize_conversation(content, categories, pool=pool)
+    matched = [label for label, hit in result["labels"].items() if hit]
+    if matched:
+        return matched[0]
+    return NO_LABEL if NO_LABEL in labels else None
+
+
+def classify_directory(directory, classifier, cache=None, fallback=generative_fallback,
+                       model="nomic-embed-text", pool=None):
+    """
+    Classify every .txt file in the directory with the embedding classifier.
+
+    All transcripts are embedded and scored in one vectorized pass; only the ambiguous
+    ones are handed to the (slow) generative fallback. A fallback answer is only used
+    when it is one of the classifier's labels, so both sources share one label space.
+
+    Args:
+        directory (str): Path to the directory containing .txt files, or a packed corpus
+        classifier (NearestCentroidClassifier): Fitted classifier
+        cache (EmbeddingCache): Optional embedding cache
+        fallback (callable): fallback(content, labels, pool) -> one of labels or None for ambiguous cases;
+                             None keeps the embedding label
+        model (str): Ollama embedding model name
+        pool (OllamaPool): Endpoint pool (defaults to the OLLAMA_ENDPOINTS pool)
+
+    Returns:
+        dict: Dictionary with filename as key and {"label", "margin", "source"} as value
+    """
+    txt_files, contents = [], []
+    for filename, text in iter_transcripts(directory):
+        txt_files.append(filename)
+        contents.append(text)
+
+    start_time = time.time()
+    X = embed_texts(contents, cache=cache, model=model, pool=pool)
+    labels, margins, ambiguous = classifier.predict(X)
+
+    results = {}
+    for i, filename in enumerate(txt_files):
+        label, source = labels[i], "embedding"
+        if ambiguous[i] and fallback is not None:
+            try:
+                answer = fallback(contents[i], classifier.labels, pool=pool)
+                if answer in classifier.labels:
+                    label, source = answer, "generative"
+            except Exception as e:
+                print(f"Fallback failed for {filename}: {str(e)}")
+        results[filename] = {"label": label, "margin": float(margins[i]), "source": source}
+
+    elapsed = time.time() - start_time
+    print(f"Classified {len(txt_files)} files in {elapsed:.2f} seconds "
+          f"({len(txt_files) / max(elapsed, 1e-9):.1f} files/s, {int(ambiguous.sum())} ambiguous)")
+    if cache is not None:
+        print(f"Embedding cache: {cache.hits} hits, {cache.misses} misses")
+
+    return results
+
+
+def main():
+    """Fit the classifier on the seed set and classify the transcript directory"""
+    text_dir = os.environ.get("TEXT_DIR", "data/text")
+    seed_path = os.environ.get("SEED_PATH", DEFAULT_SEED_PATH)
+    cache_dir = os.environ.get("EMBEDDING_CACHE_DIR", "data/embedding_cache")
+
+    cache = EmbeddingCache(cache_dir)
+    seed_texts, seed_labels = load_seed_set(seed_path)
+    classifier = NearestCentroidClassifier().fit(embed_texts(seed_texts, cache=cache), seed_labels)
+
+    results = classify_directory(text_dir, classifier, cache=cache)
+    for filename, result in results.items():
+        print(f"{filename}: {result['label']} (margin {result['margin']:.3f}, {result['source']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import numpy as np
+
+from spectral_features import SpectralFeatures
+from bark_events import detect_bark_events, mask_to_events
+
+
+# 32 ms windows with a 10 ms hop at 16 kHz, the resolution of fsmn-vad
+N_FFT = 512
+HOP_LENGTH = 160
+
+
+def nonspeech_frames(clip, sr, flatness_threshold=0.3, bark_loudness=4.0, max_bark_s=0.6, max_pitch_ratio=0.2,
+                     quiet_ratio=0.1):
+    """
+    Flag frames of a clip that look like non-speech events rather than speech.
+
+    Two cheap spectral cues, both vectorized over STFT frames:
+
+    - Noise (traffic, machinery, wind): spectral flatness above ``flatness_threshold``.
+      Voiced speech is strongly harmonic and stays well below it.
+    - Barks: short bark-band events from detect_bark_events that are much louder than
+      the clip's median frame (``bark_loudness`` times), no longer than ``max_bark_s``
+      and with little energy in the 80-400 Hz band where voiced speech has its
+      fundamental (a bark's fundamental sits well above it).
+
+    Quiet frames (RMS below ``quiet_ratio`` of the clip's 95th percentile) are reported
+    separately: the noise floor in pauses is flat too, but it is neither speech nor an event.
+
+    Args:
+        clip (np.ndarray): Audio samples of one VAD segment
+        sr (int): Sample rate
+
+    Returns:
+        tuple: (boolean per-frame non-speech mask, boolean per-frame quiet mask)
+    """
+    spectral = SpectralFeatures(clip, sr, n_fft=N_FFT, hop_length=HOP_LENGTH)
+    rms = spectral.rms
+    quiet = rms < quiet_ratio * np.percentile(rms, 95)
+    noise = (spectral.flatness > flatness_threshold) & ~quiet
+
+    floor = float(np.median(rms))
+    events, _ = detect_bark_events(rms, spectral.band_energy_ratio(200, 2000), sr, HOP_LENGTH,
+                                   amp_on=bark_loudness * floor, amp_off=0.5 * bark_loudness * floor)
+    pitch_band = spectral.band_energy_ratio(80, 400)
+    bark = np.zeros(len(rms), dtype=bool)
+    frame_s = HOP_LENGTH / sr
+    for event in events:
+        start, end = int(round(event["onset"] / frame_s)), int(round(event["offset"] / frame_s))
+        if event["offset"] - event["onset"] <= max_bark_s and pitch_band[start:end].mean() < max_pitch_ratio:
+            bark[start:end] = True
+
+    return noise | bark, quiet
+
+
+def mask_segments(waveform, segments, sr=16000, drop_ratio=0.8, min_trim_s=0.5):
+    """
+    Drop or shrink VAD segments that are mostly non-speech events before ASR.
+
+    A segment whose audible frames are at least ``drop_ratio`` non-speech is dropped.
+    Otherwise non-speech or quiet runs of at least ``min_trim_s`` at its start or end are
+    trimmed off; runs inside a segment are left alone so speech is never split.
+
+    Args:
+        waveform (np.ndarray): Full audio at sr
+        segments (list): [start_ms, end_ms] pairs from fsmn-vad
+        sr (int): Sample rate of waveform
+        drop_ratio (float): Non-speech fraction at which a segment is dropped
+        min_trim_s (float): Shortest leading/trailing run that is trimmed
+
+    Returns:
+        tuple: (kept [start_ms, end_ms] pairs, stats dict with seconds_before, seconds_after,
+               seconds_saved, dropped and trimmed)
+    """
+    frame_ms = HOP_LENGTH * 1000 / sr
+    min_trim_frames = int(min_trim_s * 1000 / frame_ms)
+    kept = []
+    stats = {"seconds_before": 0.0, "seconds_after": 0.0, "seconds_saved": 0.0, "dropped": 0, "trimmed": 0}
+
+    for start, end in segments:
+        stats["seconds_before"] += (end - start) / 1000
+        clip = waveform[int(start * sr / 1000):int(end * sr / 1000)]
+        if len(clip) < N_FFT:
+            kept.append([start, end])
+            continue
+
+        nonspeech, quiet = nonspeech_frames(clip, sr)
+        if (nonspeech & ~quiet).sum() >= drop_ratio * max(1, (~quiet).sum()):
+            stats["dropped"] += 1
+            continue
+        flags = nonspeech | quiet
+
+        # Only runs touching either end of the segment are trimmed
+        runs = mask_to_events(flags, min_frames=min_trim_frames)
+        new_start, new_end = start, end
+        if runs and runs[0][0] == 0:
+            new_start = start + runs[0][1] * frame_ms
+        if runs and runs[-1][1] >= len(flags) - 1:
+            new_end = start + runs[-1][0] * frame_ms
+        if new_end <= new_start:
+            stats["dropped"] += 1
+            continue
+        if (new_start, new_end) != (start, end):
+            stats["trimmed"] += 1
+        kept.append([int(new_start), int(new_end)])
+
+    stats["seconds_after"] = sum(end - start for start, end in kept) / 1000
+    stats["seconds_saved"] = stats["seconds_before"] - stats["seconds_after"]
+    return kept, stats
@@ -1,38 +1,41 @@
 import os
-import requests
+import re
 import json
 
+from text_normalizer import normalize_text
+from result_sink import ResultSink, ProgressMeter, file_key
+from ollama_pool import get_default_pool
+from packed_corpus import TranscriptSource
+from profiling import stage
 
-def print_txt_filenames(directory):
-    """Print the name of each .txt file in the given directory, one by one."""
-    txt_files = [f for f in os.listdir(directory) if f.endswith(".txt")]
-    print(f"Number of .txt files: {len(txt_files)}")
-    return txt_files
+# JSONL sink for insurance verdicts (one record per analyzed file)
+DEFAULT_RESULTS_PATH = os.environ.get("RESULTS_PATH", "data/results/insurance_analysis.jsonl")
 
+# JSONL sink for multi-label categorizations (one record per categorized file)
+DEFAULT_CATEGORIES_PATH = os.environ.get("CATEGORIES_PATH", "data/results/categories.jsonl")
 
-def analyze_insurance_content(directory):
-    """
-    Analyze each .txt file in the directory using Ollama to check for insurance selling content.
 
-    Args:
-        directory (str): Path to the directory containing .txt files
+# Default taxonomy for conversation categorization: label -> description used in the prompt
+DEFAULT_CATEGORIES = {
+    "insurance_upsell": "推销燃气保险（保险政策、保险产品、保险报价、保险覆盖范围等）",
+    "meter_replacement": "更换燃气表（例如超过10年的旧表统一更换）",
+    "regulator_change": "更换减压阀或调压器",
+    "safety_hazard": "指出安全隐患（漏气、软管老化、报警器缺失等）",
+    "complaint": "客户投诉或明显不满",
+}
 
-    Returns:
-        dict: Dictionary with filename as key and analysis result as value
-    """
-    txt_files = [f for f in os.listdir(directory) if f.endswith(".txt")]
-    results = {}
 
-    for filename in txt_files:
-        file_path = os.path.join(directory, filename)
+def print_txt_filenames(directory):
+    """Print the name of each .txt file in the given directory (or packed corpus), one by one."""
+    with TranscriptSource(directory) as source:
+        txt_files = source.names()
+    print(f"Number of .txt files: {len(txt_files)}")
+    return txt_files
 
-        try:
-            # Read the content of the .txt file
-            with open(file_path, "r", encoding="utf-8") as file:
-                content = file.read()
 
-            # Prepare the prompt for Ollama
-            prompt = f"""
+def build_insurance_prompt(content):
+    """Build the insurance-selling check prompt for one transcript"""
+    return f"""
             分析以下文本内容，判断是否包含与燃气保险销售相关的内容。
             查找与以下相关的关键词、短语或主题：
             - 保险政策
@@ -49,47 +52,127 @@ def analyze_insurance_content(directory):
             请用清晰的"是"或"否"回答，并简要说明你发现了什么或为什么确定它与保险销售无关。
             """
 
-            print(prompt)
-            # Make request to Ollama API
-            response = requests.post(
-                "http://localhost:11434/api/generate",
-                json={
-                    "model": "gemma3:4b",  # You can change this to your preferred model
-                    "prompt": prompt,
-                    "stream": False,
-                },
-                timeout=30,
-            )
-            print(response)
-
-            if response.status_code == 200:
-                result = response.json()
-                analysis = result.get("response", "No response from model")
-                results[filename] = analysis
+
+def analyze_insurance_text(content, debug=False, pool=None):
+    """
+    Ask Ollama whether a single transcript contains insurance selling content.
+
+    Args:
+        content (str): Transcript text
+        debug (bool): Print the full prompt and raw HTTP response
+        pool (OllamaPool): Endpoint pool (defaults to the OLLAMA_ENDPOINTS pool)
+
+    Returns:
+        str: Model analysis, or an "Error: ..." string for non-200 responses
+    """
+    prompt = build_insurance_prompt(content)
+    if debug:
+        print(prompt)
+
+    # Make request to Ollama API
+    pool = pool or get_default_pool()
+    with stage("llm_request"):
+        response = pool.post(
+            "/api/generate",
+            {
+                "model": "gemma3:4b",  # You can change this to your preferred model
+                "prompt": prompt,
+                "stream": False,
+            },
+            timeout=30,
+        )
+    if debug:
+        print(response)
+
+    if response.status_code == 200:
+        return response.json().get("response", "No response from model")
+    return f"Error: HTTP {response.status_code}"
+
+
+def analyze_insurance_content(directory, normalize=True, results_path=DEFAULT_RESULTS_PATH,
+                              resume=False, debug=False, pool=None, duplicate_of=None):
+    """
+    Analyze each .txt file in the directory using Ollama to check for insurance selling content.
+
+    Each verdict is appended to a JSONL sink as soon as it is available, so an
+    interrupted run can be continued with resume=True. Sink records are keyed by the
+    transcript's absolute path (file_key), so one sink can serve several directories.
+
+    Args:
+        directory (str): Path to the directory containing .txt files, or a packed corpus
+        normalize (bool): Strip fillers, emoji and repeated sentences before prompting
+        results_path (str): JSONL file that receives one record per analyzed file
+        resume (bool): Skip files that already have a non-error result in the sink
+        debug (bool): Print prompts and raw responses
+        pool (OllamaPool): Endpoint pool (defaults to the OLLAMA_ENDPOINTS pool)
+        duplicate_of (dict): Near-duplicate filename -> representative filename; duplicates
+                             are not sent to the model and reuse the representative's verdict
+
+    Returns:
+        dict: Dictionary with filename as key and analysis result as value for the files of this
+              directory (read back from the sink, so including earlier runs)
+    """
+    duplicate_of = duplicate_of or {}
+
+    with ResultSink(results_path) as sink, TranscriptSource(directory) as source:
+        names = source.names()
+        txt_files = [f for f in names if f not in duplicate_of]
+        if resume:
+            txt_files = [f for f in txt_files if not _is_done(sink, file_key(directory, f))]
+            print(f"Resuming: {len(sink)} results on record, {len(txt_files)} files remaining")
+
+        progress = ProgressMeter(len(txt_files))
+
+        for filename in txt_files:
+            try:
+                # Read the content of the .txt file (or corpus record)
+                content = source.read(filename)
+
+                if normalize:
+                    content, _ = normalize_text(content)
+
+                analysis = analyze_insurance_text(content, debug=debug, pool=pool)
+                sink.write(file_key(directory, filename), analysis)
                 print(f"Analyzed {filename}: {analysis}")
-            else:
-                results[filename] = f"Error: HTTP {response.status_code}"
-                print(f"Error analyzing {filename}: HTTP {response.status_code}")
 
-        except FileNotFoundError:
-            results[filename] = "Error: File not found"
-            print(f"Error: File {filename} not found")
-        except Exception as e:
-            results[filename] = f"Error: {str(e)}"
-            print(f"Error analyzing {filename}: {str(e)}")
+            except FileNotFoundError:
+                sink.write(file_key(directory, filename), "Error: File not found")
+                print(f"Error: File {filename} not found")
+            except Exception as e:
+                sink.write(file_key(directory, filename), f"Error: {str(e)}")
+                print(f"Error analyzing {filename}: {str(e)}")
+
+            progress.update()
+
+        for filename, representative in duplicate_of.items():
+            representative_key = file_key(directory, representative)
+            if representative_key in sink.results:
+                sink.write(file_key(directory, filename), sink.results[representative_key],
+                           duplicate_of=representative)
+
+        return {f: sink.results[file_key(directory, f)] for f in names if file_key(directory, f) in sink.results}
 
-    return results
 
+def _is_done(sink, key):
+    """Whether the sink already holds a successful result for the file"""
+    return key in sink and not str(sink.results[key]).startswith("Error")
 
-def print_insurance_analysis(directory):
+
+def print_insurance_analysis(directory, results_path=DEFAULT_RESULTS_PATH, resume=False, debug=False):
     """
     Print a summary of insurance content analysis for all .txt files in the directory.
 
+    The summary is computed from the result sink, so it also covers files of this
+    directory finished by earlier (resumed) runs, and only those.
+
     Args:
         directory (str): Path to the directory containing .txt files
+        results_path (str): JSONL result sink
+        resume (bool): Skip files that already have a result
+        debug (bool): Print prompts and raw responses
     """
     print(f"\n=== Insurance Content Analysis for {directory} ===")
-    results = analyze_insurance_content(directory)
+    results = analyze_insurance_content(directory, results_path=results_path, resume=resume, debug=debug)
 
     print(f"\nSummary:")
     print(f"Total files analyzed: {len(results)}")
@@ -113,9 +196,204 @@ def print_insurance_analysis(directory):
     return results
 
 
+def build_categorization_prompt(content, categories=None):
+    """
+    Build a single prompt asking the model to label a transcript against every category at once.
+
+    Args:
+        content (str): Transcript text
+        categories (dict): Mapping of label -> description (defaults to DEFAULT_CATEGORIES)
+
+    Returns:
+        str: Prompt text
+    """
+    categories = categories or DEFAULT_CATEGORIES
+    category_lines = "\n".join(f"- {label}: {desc}" for label, desc in categories.items())
+    example = json.dumps({label: False for label in categories}, ensure_ascii=False)
+
+    return f"""
+            分析以下燃气入户检查的对话文本，判断它分别属于下面哪些类别（可以同时属于多个类别）：
+            {category_lines}
+
+            文本内容：
+            {content}
+
+            只输出一个 JSON 对象，键为上面的类别名，值为 true 或 false，另加一个 "reason" 字段简要说明依据。例如：
+            {example}
+            """
+
+
+def parse_categorization_response(text, categories=None):
+    """
+    Parse the model's JSON answer into a label -> bool mapping.
+
+    Unknown keys are ignored and missing labels default to False, so a partially
+    malformed answer still yields a complete result.
+
+    Args:
+        text (str): Raw model response
+        categories (dict): Mapping of label -> description (defaults to DEFAULT_CATEGORIES)
+
+    Returns:
+        dict: {"labels": {label: bool}, "reason": str}
+    """
+    categories = categories or DEFAULT_CATEGORIES
+    data = {}
+    match = re.search(r"\{.*\}", text, re.DOTALL)
+    if match:
+        try:
+            data = json.loads(match.group(0))
+        except json.JSONDecodeError:
+            data = {}
+
+    labels = {}
+    for label in categories:
+        value = data.get(label, False)
+        if isinstance(value, str):
+            value = value.strip().lower() in ("true", "yes", "是", "1")
+        labels[label] = bool(value)
+
+    return {"labels": labels, "reason": str(data.get("reason", ""))}
+
+
+def categorize_conversation(content, categories=None, model="gemma3:4b", timeout=60, pool=None, debug=False):
+    """
+    Categorize one transcript against the whole taxonomy with a single Ollama request.
+
+    Args:
+        content (str): Transcript text
+        categories (dict): Mapping of label -> description (defaults to DEFAULT_CATEGORIES)
+        model (str): Ollama model name
+        timeout (int): Request timeout in seconds
+        pool (OllamaPool): Endpoint pool (defaults to the OLLAMA_ENDPOINTS pool)
+        debug (bool): Print the full prompt and raw model response
+
+    Returns:
+        dict: {"labels": {label: bool}, "reason": str}
+    """
+    categories = categories or DEFAULT_CATEGORIES
+    prompt = build_categorization_prompt(content, categories)
+    if debug:
+        print(prompt)
+
+    pool = pool or get_default_pool()
+    with stage("llm_request"):
+        response = pool.post(
+            "/api/generate",
+            {
+                "model": model,
+                "prompt": prompt,
+                "format": "json",
+                "stream": False,
+            },
+            timeout=timeout,
+        )
+    response.raise_for_status()
+    if debug:
+        print(response.json().get("response", ""))
+
+    return parse_categorization_response(response.json().get("response", ""), categories)
+
+
+def categorize_directory(directory, categories=None, model="gemma3:4b", normalize=True, pool=None,
+                         results_path=DEFAULT_CATEGORIES_PATH, resume=False, debug=False):
+    """
+    Categorize every .txt file in the directory, sending each transcript to the model once.
+
+    Like analyze_insurance_content, each result is appended to a JSONL sink keyed by
+    file_key as soon as it is available, so an interrupted run continues with resume=True.
+
+    Args:
+        directory (str): Path to the directory containing .txt files, or a packed corpus
+        categories (dict): Mapping of label -> description (defaults to DEFAULT_CATEGORIES)
+        model (str): Ollama model name
+        normalize (bool): Strip fillers, emoji and repeated sentences before prompting
+        pool (OllamaPool): Endpoint pool (defaults to the OLLAMA_ENDPOINTS pool)
+        results_path (str): JSONL file that receives one record per categorized file
+        resume (bool): Skip files that already have a non-error result in the sink
+        debug (bool): Print prompts and raw responses
+
+    Returns:
+        dict: Dictionary with filename as key and categorization result (or error string) as value
+              for the files of this directory (read back from the sink, so including earlier runs)
+    """
+    categories = categories or DEFAULT_CATEGORIES
+
+    with ResultSink(results_path) as sink, TranscriptSource(directory) as source:
+        names = source.names()
+        txt_files = names
+        if resume:
+            txt_files = [f for f in names if not _is_done(sink, file_key(directory, f))]
+            print(f"Resuming: {len(sink)} results on record, {len(txt_files)} files remaining")
+
+        progress = ProgressMeter(len(txt_files))
+
+        for filename in txt_files:
+            try:
+                content = source.read(filename)
+
+                if normalize:
+                    content, _ = normalize_text(content)
+
+                result = categorize_conversation(content, categories, model=model, pool=pool, debug=debug)
+                sink.write(file_key(directory, filename), result)
+                matched = [label for label, hit in result["labels"].items() if hit]
+                print(f"Categorized {filename}: {', '.join(matched) or 'none'}")
+
+            except Exception as e:
+                sink.write(file_key(directory, filename), f"Error: {str(e)}")
+                print(f"Error categorizing {filename}: {str(e)}")
+
+            progress.update()
+
+        return {f: sink.results[file_key(directory, f)] for f in names if file_key(directory, f) in sink.results}
+
+
+def print_categorization_summary(directory, categories=None, results_path=DEFAULT_CATEGORIES_PATH, resume=False,
+                                 debug=False):
+    """
+    Print per-category counts of a multi-label categorization run over the directory.
+
+    The insurance verdict is the "insurance_upsell" label of the same answer, so each
+    transcript goes to the model once for both.
+
+    Args:
+        directory (str): Path to the directory containing .txt files
+        categories (dict): Mapping of label -> description (defaults to DEFAULT_CATEGORIES)
+        results_path (str): JSONL result sink
+        resume (bool): Skip files that already have a result
+        debug (bool): Print prompts and raw responses
+    """
+    categories = categories or DEFAULT_CATEGORIES
+    print(f"\n=== Conversation Categorization for {directory} ===")
+    results = categorize_directory(directory, categories, results_path=results_path, resume=resume, debug=debug)
+
+    counts = {label: 0 for label in categories}
+    errors = 0
+    for result in results.values():
+        if isinstance(result, str):
+            errors += 1
+            continue
+        for label, hit in result["labels"].items():
+            counts[label] += int(hit)
+
+    print(f"\nTotal files categorized: {len(results) - errors}")
+    for label, count in counts.items():
+        print(f"  {label}: {count}")
+    print(f"Errors: {errors}")
+    if "insurance_upsell" in counts:
+        print(f"\nFiles with insurance content: {counts['insurance_upsell']}")
+        print(f"Files without insurance content: {len(results) - errors - counts['insurance_upsell']}")
+
+    return results
+
+
 # Example usage:
 if __name__ == "__main__":
     txt_files = print_txt_filenames("data/text")
     print(txt_files)
 
-    print_insurance_analysis("data/text")
+    # One multi-label pass; the insurance verdict comes from its insurance_upsell label.
+    # RESUME=1 continues an interrupted run, DEBUG=1 prints prompts and responses
+    print_categorization_summary("data/text", resume=os.environ.get("RESUME", "0") == "1",
+                                 debug=os.environ.get("DEBUG", "0") == "1")
@@ -0,0 +1,144 @@
+import os
+import json
+import time
+import random
+import hashlib
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+DEFAULT_MOCK_CONFIG = {
+    "latency": 0.05,            # seconds before the first token (prompt evaluation)
+    "tokens_per_second": 200.0,  # generation speed
+    "response_tokens": 20,      # tokens in each generated answer
+    "error_rate": 0.0,          # fraction of requests answered with HTTP 500
+    "embedding_dim": 64,        # size of /api/embed vectors
+    "response": "是。YES，文本中提到了燃气保险的销售。",
+}
+
+
+class MockOllamaHandler(BaseHTTPRequestHandler):
+    """Stand-in for the Ollama HTTP API: /api/generate, /api/embed and /api/tags"""
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json(200, {"models": [{"name": "mock"}]})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        config = self.server.config
+
+        with self.server.lock:
+            self.server.request_count += 1
+
+        if random.random() < config["error_rate"]:
+            self._send_json(500, {"error": "injected failure"})
+            return
+
+        if self.path == "/api/generate":
+            self._generate(payload, config)
+        elif self.path == "/api/embed":
+            self._embed(payload, config)
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def _generate(self, payload, config):
+        time.sleep(config["latency"])
+        tokens = config["response"]
+        n_tokens = config["response_tokens"]
+        token_delay = 1.0 / config["tokens_per_second"]
+
+        if payload.get("format") == "json":
+            tokens = json.dumps({"insurance_upsell": True, "reason": "mock"}, ensure_ascii=False)
+
+        if not payload.get("stream", True):
+            time.sleep(n_tokens * token_delay)
+            self._send_json(200, {
+                "model": payload.get("model", "mock"),
+                "response": tokens,
+                "done": True,
+                "eval_count": n_tokens,
+                "prompt_eval_count": len(payload.get("prompt", "")),
+            })
+            return
+
+        # Streaming: one NDJSON line per token, split the text evenly across tokens
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        step = max(len(tokens) // n_tokens, 1)
+        pieces = [tokens[i:i + step] for i in range(0, len(tokens), step)]
+        for piece in pieces:
+            time.sleep(token_delay)
+            self.wfile.write((json.dumps({"response": piece, "done": False}, ensure_ascii=False) + "\n").encode("utf-8"))
+            self.wfile.flush()
+        self.wfile.write((json.dumps({"response": "", "done": True, "eval_count": len(pieces)}) + "\n").encode("utf-8"))
+
+    def _embed(self, payload, config):
+        time.sleep(config["latency"])
+        inputs = payload.get("input", [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        self._send_json(200, {
+            "model": payload.get("model", "mock"),
+            "embeddings": [_hash_embedding(text, config["embedding_dim"]) for text in inputs],
+        })
+
+
+def _hash_embedding(text, dim):
+    """Deterministic pseudo-embedding: identical texts get identical vectors"""
+    seed = int.from_bytes(hashlib.sha1(text.encode("utf-8")).digest()[:8], "little")
+    rng = random.Random(seed)
+    return [rng.uniform(-1.0, 1.0) for _ in range(dim)]
+
+
+def start_mock_server(host="127.0.0.1", port=0, **config):
+    """
+    Start a mock Ollama server in a daemon thread.
+
+    Args:
+        host (str): Interface to bind
+        port (int): Port to bind (0 picks a free port)
+        **config: Overrides for DEFAULT_MOCK_CONFIG
+
+    Returns:
+        tuple: (server, base_url); call server.shutdown() to stop it
+    """
+    server = ThreadingHTTPServer((host, port), MockOllamaHandler)
+    server.daemon_threads = True
+    server.config = dict(DEFAULT_MOCK_CONFIG, **config)
+    server.lock = threading.Lock()
+    server.request_count = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    # Serve in the foreground, e.g. MOCK_PORT=11434 python src/mock_ollama.py
+    server, url = start_mock_server(
+        port=int(os.environ.get("MOCK_PORT", "11434")),
+        latency=float(os.environ.get("MOCK_LATENCY", DEFAULT_MOCK_CONFIG["latency"])),
+        tokens_per_second=float(os.environ.get("MOCK_TOKENS_PER_SECOND", DEFAULT_MOCK_CONFIG["tokens_per_second"])),
+        response_tokens=int(os.environ.get("MOCK_RESPONSE_TOKENS", DEFAULT_MOCK_CONFIG["response_tokens"])),
+        error_rate=float(os.environ.get("MOCK_ERROR_RATE", DEFAULT_MOCK_CONFIG["error_rate"])),
+    )
+    print(f"Mock Ollama listening on {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
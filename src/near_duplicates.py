@@ -0,0 +1,211 @@
+import os
+import json
+from collections import defaultdict
+import numpy as np
+
+from text_normalizer import normalize_text
+from packed_corpus import iter_transcripts
+
+
+# Shingle hashes are folded down to 32 bits
+_MASK32 = np.uint64(0xFFFFFFFF)
+
+
+def shingle_hashes(text, k=5):
+    """
+    Hash every character k-shingle of the text to a uint32, vectorized.
+
+    Args:
+        text (str): Input text
+        k (int): Shingle length in characters
+
+    Returns:
+        np.ndarray: Unique uint64 shingle hashes (values fit in 32 bits)
+    """
+    codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    if len(codes) < k:
+        codes = np.pad(codes, (0, k - len(codes)))
+    # Polynomial hash over a sliding window; uint64 arithmetic wraps mod 2^64
+    windows = np.lib.stride_tricks.sliding_window_view(codes, k)
+    powers = np.uint64(1000003) ** np.arange(k - 1, -1, -1, dtype=np.uint64)
+    hashes = (windows * powers).sum(axis=1, dtype=np.uint64)
+    return np.unique((hashes ^ (hashes >> np.uint64(32))) & _MASK32)
+
+
+class MinHasher:
+    """MinHash signatures with multiply-shift universal hashing"""
+
+    def __init__(self, num_perm=128, seed=1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self.b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+
+    def signature(self, shingles):
+        """
+        Compute the MinHash signature of a set of shingle hashes.
+
+        Returns:
+            np.ndarray: uint32 array of length num_perm
+        """
+        if len(shingles) == 0:
+            return np.full(self.num_perm, 0xFFFFFFFF, dtype=np.uint32)
+        permuted = (self.a[:, None] * shingles[None, :] + self.b[:, None]) >> np.uint64(32)
+        return permuted.min(axis=1).astype(np.uint32)
+
+
+class LSHIndex:
+    """
+    Banded locality-sensitive hashing over MinHash signatures.
+
+    Documents sharing any band bucket become candidate pairs, so only likely
+    near-duplicates are compared instead of all n^2 pairs. A bucket with more than
+    ``max_bucket`` documents (boilerplate shared by many calls) is not expanded into all
+    of its pairs: its documents are sorted by signature and each is paired with the next
+    ``max_bucket - 1`` only, which keeps identical signatures adjacent and the work linear.
+    """
+
+    def __init__(self, num_perm=128, bands=16, max_bucket=100):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.max_bucket = max_bucket
+        self.buckets = defaultdict(list)
+        self.keys = []
+        self.signatures = []
+
+    def add(self, key, signature):
+        doc = len(self.keys)
+        self.keys.append(key)
+        self.signatures.append(signature)
+        for band, rows in enumerate(signature.reshape(self.bands, self.rows)):
+            self.buckets[(band, rows.tobytes())].append(doc)
+
+    def candidate_pairs(self):
+        pairs = set()
+        for docs in self.buckets.values():
+            if len(docs) < 2:
+                continue
+            window = len(docs)
+            if len(docs) > self.max_bucket:
+                docs = sorted(docs, key=lambda doc: self.signatures[doc].tobytes())
+                window = self.max_bucket
+            for i in range(len(docs)):
+                for j in range(i + 1, min(i + window, len(docs))):
+                    pairs.add((min(docs[i], docs[j]), max(docs[i], docs[j])))
+        return pairs
+
+    def clusters(self, threshold=0.8):
+        """
+        Group documents around representatives they are directly similar to.
+
+        Single linkage would chain A ~ B ~ C into one cluster although A and C were never
+        compared. Instead every pair at or above the threshold is an edge, and documents
+        with the most edges become representatives first (star clustering): each cluster
+        is a representative plus unassigned documents whose own estimated similarity to
+        that representative reaches the threshold.
+
+        Args:
+            threshold (float): Minimum estimated Jaccard similarity between a member and its representative
+
+        Returns:
+            list: Clusters (size >= 2) as {"representative", "files" (representative first),
+                  "min_similarity" (weakest member-to-representative similarity)}
+        """
+        signatures = np.stack(self.signatures) if self.signatures else np.zeros((0, 0))
+        neighbors = defaultdict(dict)
+        pairs = np.array(sorted(self.candidate_pairs()), dtype=np.int64).reshape(-1, 2)
+        if len(pairs):
+            # Estimated Jaccard = fraction of equal MinHash values, for all candidates at once
+            similarities = (signatures[pairs[:, 0]] == signatures[pairs[:, 1]]).mean(axis=1)
+            keep = similarities >= threshold
+            for (i, j), similarity in zip(pairs[keep].tolist(), similarities[keep].tolist()):
+                neighbors[i][j] = similarity
+                neighbors[j][i] = similarity
+
+        assigned = set()
+        result = []
+        for rep in sorted(neighbors, key=lambda i: (-len(neighbors[i]), self.keys[i])):
+            if rep in assigned:
+                continue
+            members = {j: sim for j, sim in neighbors[rep].items() if j not in assigned}
+            if not members:
+                continue
+            assigned.add(rep)
+            assigned.update(members)
+            result.append({
+                "representative": self.keys[rep],
+                "files": [self.keys[rep]] + sorted(self.keys[j] for j in members),
+                "min_similarity": min(members.values()),
+            })
+        return sorted(result, key=lambda c: -len(c["files"]))
+
+
+def find_near_duplicates(directory, threshold=0.8, k=5, num_perm=128, bands=16, max_bucket=100):
+    """
+    Find clusters of near-duplicate transcripts in a directory.
+
+    Args:
+        directory (str): Path to the directory containing .txt files, or a packed corpus
+        threshold (float): Minimum estimated Jaccard similarity
+        k (int): Shingle length in characters
+        num_perm (int): MinHash signature length
+        bands (int): LSH bands (rows per band = num_perm / bands)
+        max_bucket (int): LSH bucket size above which only signature-sorted neighbors are paired
+
+    Returns:
+        list: Clusters as {"representative", "files": [...], "min_similarity": float}
+    """
+    hasher = MinHasher(num_perm=num_perm)
+    index = LSHIndex(num_perm=num_perm, bands=bands, max_bucket=max_bucket)
+
+    for filename, text in iter_transcripts(directory):
+        text, _ = normalize_text(text, dedupe_sentences=False)
+        # Empty or near-empty transcripts would all collide; they are not meaningful duplicates
+        if len(text) < k:
+            continue
+        index.add(filename, hasher.signature(shingle_hashes(text, k)))
+
+    return index.clusters(threshold)
+
+
+def duplicate_map(clusters):
+    """
+    Map every non-representative cluster member to its representative.
+
+    The result can be passed as ``duplicate_of`` to analyze_insurance_content so
+    duplicates reuse the representative's verdict instead of being classified again;
+    every member was compared with its representative directly (see LSHIndex.clusters).
+    """
+    mapping = {}
+    for cluster in clusters:
+        representative = cluster["representative"]
+        for filename in cluster["files"][1:]:
+            mapping[filename] = representative
+    return mapping
+
+
+def main():
+    """Report near-duplicate clusters in TEXT_DIR and save them as JSON"""
+    text_dir = os.environ.get("TEXT_DIR", "data/text")
+    output_path = os.environ.get("DUPLICATES_PATH", "data/results/near_duplicates.json")
+    threshold = float(os.environ.get("DUPLICATE_THRESHOLD", "0.8"))
+    copy_threshold = float(os.environ.get("COPY_THRESHOLD", "0.95"))
+
+    clusters = find_near_duplicates(text_dir, threshold=threshold)
+    for cluster in clusters:
+        cluster["copy_paste"] = cluster["min_similarity"] >= copy_threshold
+        flag = " [copy-paste]" if cluster["copy_paste"] else ""
+        print(f"{len(cluster['files'])} files, similarity >= {cluster['min_similarity']:.2f}{flag}: "
+              f"{', '.join(cluster['files'])}")
+
+    print(f"\n{len(clusters)} clusters, {len(duplicate_map(clusters))} duplicates can skip classification")
+
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(clusters, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
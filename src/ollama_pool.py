@@ -0,0 +1,205 @@
+import os
+import time
+import threading
+import requests
+
+
+# Requests that are safe to send again after a read timeout; a generate that timed out may
+# still be running on the instance, and repeating it elsewhere only doubles the load
+IDEMPOTENT_PATHS = ("/api/embed", "/api/embeddings", "/api/tags", "/api/show")
+
+
+class NoHealthyEndpointError(RuntimeError):
+    """Raised when every endpoint in the pool is ejected"""
+
+
+class Endpoint:
+    """One Ollama instance and its routing state"""
+
+    def __init__(self, url):
+        self.url = url.rstrip("/")
+        self.outstanding = 0
+        self.failures = 0
+        self.ejected_until = 0.0
+        self.requests = 0
+
+    def available(self, now):
+        return now >= self.ejected_until
+
+
+class OllamaPool:
+    """
+    Routes Ollama requests across several instances with least-outstanding-requests balancing.
+
+    Endpoints that fail ``max_failures`` times in a row are ejected for ``eject_seconds``
+    or until a health check sees them answer again. A background thread runs the health
+    check every ``health_interval`` seconds (0 disables it), so dead instances are ejected
+    and recovered ones re-admitted without a request having to fail first. Every
+    generate/embed payload carries a ``keep_alive`` hint so the model stays resident on
+    each instance.
+    """
+
+    def __init__(self, endpoints, keep_alive="30m", max_failures=3, eject_seconds=30, timeout=30,
+                 health_interval=30):
+        if not endpoints:
+            raise ValueError("OllamaPool needs at least one endpoint")
+        self.endpoints = [Endpoint(url) for url in endpoints]
+        self.keep_alive = keep_alive
+        self.max_failures = max_failures
+        self.eject_seconds = eject_seconds
+        self.timeout = timeout
+        self.health_interval = health_interval
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._probe_thread = None
+        if health_interval:
+            self._probe_thread = threading.Thread(target=self._probe, daemon=True)
+            self._probe_thread.start()
+
+    def _probe(self):
+        while not self._stop.wait(self.health_interval):
+            for url, healthy in self.health_check().items():
+                if not healthy:
+                    print(f"Health check: Ollama endpoint {url} is down")
+
+    def close(self):
+        """Stop the background health checks and wait for the thread to exit"""
+        self._stop.set()
+        if self._probe_thread is not None:
+            self._probe_thread.join()
+
+    def _acquire(self, tried=()):
+        """Pick the available endpoint with the fewest in-flight requests, preferring ones not tried yet"""
+        endpoint = self._pick(tried)
+        if endpoint is None:
+            # Everything is ejected: probe before giving up
+            self.health_check()
+            endpoint = self._pick(tried)
+        if endpoint is None:
+            raise NoHealthyEndpointError("All Ollama endpoints are ejected")
+        return endpoint
+
+    def _pick(self, tried=()):
+        now = time.time()
+        with self._lock:
+            candidates = [e for e in self.endpoints if e.available(now)]
+            candidates = [e for e in candidates if e not in tried] or candidates
+            if not candidates:
+                return None
+            endpoint = min(candidates, key=lambda e: (e.outstanding, e.requests))
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+            return endpoint
+
+    def _release(self, endpoint, ok):
+        with self._lock:
+            endpoint.outstanding -= 1
+            if ok:
+                endpoint.failures = 0
+                return
+            endpoint.failures += 1
+            # After ejection expires the endpoint gets one trial request; failing it re-ejects at once
+            if endpoint.failures >= self.max_failures:
+                endpoint.ejected_until = time.time() + self.eject_seconds
+                print(f"Ejecting Ollama endpoint {endpoint.url} after {endpoint.failures} failures")
+
+    def _is_healthy(self, endpoint):
+        try:
+            response = requests.get(f"{endpoint.url}/api/tags", timeout=2)
+            return response.status_code == 200
+        except requests.exceptions.RequestException:
+            return False
+
+    def health_check(self):
+        """
+        Probe every endpoint, ejecting unhealthy ones and re-admitting recovered ones.
+
+        Returns:
+            dict: Dictionary with endpoint URL as key and health (bool) as value
+        """
+        status = {}
+        for endpoint in self.endpoints:
+            healthy = self._is_healthy(endpoint)
+            with self._lock:
+                if healthy:
+                    endpoint.ejected_until = 0.0
+                    endpoint.failures = 0
+                else:
+                    endpoint.ejected_until = time.time() + self.eject_seconds
+            status[endpoint.url] = healthy
+        return status
+
+    def post(self, path, payload, timeout=None, retries=None):
+        """
+        POST a JSON payload to the least loaded endpoint, retrying on other endpoints on failure.
+
+        Connection errors, timeouts and 5xx responses count as endpoint failures; 4xx
+        responses are returned to the caller as-is. A read timeout is retried only for
+        IDEMPOTENT_PATHS: a generate request that timed out is raised at once instead of
+        being sent to another instance.
+
+        Args:
+            path (str): API path such as "/api/generate"
+            payload (dict): JSON body; keep_alive is added if missing
+            timeout (int): Request timeout in seconds (defaults to the pool timeout)
+            retries (int): Extra attempts on other endpoints (defaults to len(endpoints) - 1)
+
+        Returns:
+            requests.Response: Response from the endpoint that served the request
+        """
+        payload = dict(payload)
+        payload.setdefault("keep_alive", self.keep_alive)
+        timeout = timeout or self.timeout
+        retries = len(self.endpoints) - 1 if retries is None else retries
+        last_error = None
+        tried = []
+
+        for _ in range(retries + 1):
+            endpoint = self._acquire(tried)
+            tried.append(endpoint)
+            ok = False
+            try:
+                response = requests.post(f"{endpoint.url}{path}", json=payload, timeout=timeout)
+                ok = response.status_code < 500
+                if ok:
+                    return response
+                last_error = requests.exceptions.HTTPError(f"HTTP {response.status_code} from {endpoint.url}")
+            except requests.exceptions.ReadTimeout as e:
+                if path not in IDEMPOTENT_PATHS:
+                    raise
+                last_error = e
+            except requests.exceptions.RequestException as e:
+                last_error = e
+            finally:
+                self._release(endpoint, ok)
+
+        raise last_error
+
+    def stats(self):
+        """Per-endpoint request counts, in-flight requests and ejection state"""
+        now = time.time()
+        with self._lock:
+            return {
+                e.url: {"requests": e.requests, "outstanding": e.outstanding, "available": e.available(now)}
+                for e in self.endpoints
+            }
+
+
+_default_pool = None
+
+
+def get_default_pool():
+    """
+    Return the process-wide pool built from OLLAMA_ENDPOINTS (comma-separated URLs).
+
+    Defaults to the single local instance at http://localhost:11434.
+    """
+    global _default_pool
+    if _default_pool is None:
+        endpoints = os.environ.get("OLLAMA_ENDPOINTS", "http://localhost:11434")
+        _default_pool = OllamaPool(
+            [url.strip() for url in endpoints.split(",") if url.strip()],
+            keep_alive=os.environ.get("OLLAMA_KEEP_ALIVE", "30m"),
+            health_interval=float(os.environ.get("OLLAMA_HEALTH_INTERVAL", "30")),
+        )
+    return _default_pool
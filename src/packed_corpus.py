@@ -0,0 +1,298 @@
+import os
+import mmap
+import json
+import time
+import threading
+import functools
+
+# numpy is imported where records are read or written, so listing a directory of .txt
+# files through TranscriptSource stays a light, fast command
+
+
+# Fixed-size index record: byte range in the data file plus numeric metadata
+INDEX_FIELDS = [
+    ("offset", "<u8"),
+    ("length", "<u4"),
+    ("voice_length", "<f4"),
+    ("created", "<f8"),
+]
+
+DATA_FILE = "transcripts.dat"
+INDEX_FILE = "transcripts.idx"
+META_FILE = "transcripts.meta.jsonl"
+
+
+@functools.lru_cache(maxsize=None)
+def index_dtype():
+    """numpy dtype of INDEX_FIELDS"""
+    import numpy as np
+    return np.dtype(INDEX_FIELDS)
+
+
+def is_packed_corpus(path):
+    """Whether path is a packed corpus directory rather than a directory of .txt files"""
+    return os.path.isfile(os.path.join(path, INDEX_FILE))
+
+
+def recover_appended_files(data_path, meta_path, index_path, index_dtype, record_end):
+    """
+    Cut an append-only data file / JSONL sidecar / fixed-size index triple back to its last committed record.
+
+    Writers append data, then one sidecar line, then one index record. A crash in between
+    leaves data or a sidecar line without an index record, or a torn line or record; the
+    next append would then pair its index record with the orphaned sidecar line. Record i
+    is committed when both index record i and sidecar line i are complete, so all three
+    files are truncated to the first min(index records, complete lines) records.
+
+    Args:
+        data_path (str): Data file
+        meta_path (str): JSONL sidecar, one line per record
+        index_path (str): Index file of index_dtype records
+        index_dtype (np.dtype): Index record type
+        record_end (callable): record_end(index_record) -> end of its data in bytes
+
+    Returns:
+        int: Number of committed records
+    """
+    import numpy as np
+
+    for path in (data_path, meta_path, index_path):
+        if not os.path.exists(path):
+            open(path, "ab").close()
+
+    index_records = os.path.getsize(index_path) // index_dtype.itemsize
+    line_ends = []
+    with open(meta_path, "rb") as f:
+        position = 0
+        for line in f:
+            position += len(line)
+            if line.endswith(b"\n"):
+                line_ends.append(position)
+    count = min(index_records, len(line_ends))
+
+    data_end = 0
+    if count:
+        last = np.fromfile(index_path, dtype=index_dtype, count=1, offset=(count - 1) * index_dtype.itemsize)[0]
+        data_end = record_end(last)
+    for path, end in ((index_path, count * index_dtype.itemsize),
+                      (meta_path, line_ends[count - 1] if count else 0),
+                      (data_path, data_end)):
+        if os.path.getsize(path) > end:
+            with open(path, "rb+") as f:
+                f.truncate(end)
+    return count
+
+
+class CorpusWriter:
+    """
+    Appends transcripts to a packed corpus.
+
+    Text goes to one data file, a fixed-size record to the index and the string metadata
+    (name, source audio, extra fields) to a JSONL sidecar. The index record is written
+    last, so a record only becomes visible to readers once its text is on disk. Opening
+    a writer first cuts off whatever a crash left behind after the last committed record.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        recover_appended_files(os.path.join(path, DATA_FILE), os.path.join(path, META_FILE),
+                               os.path.join(path, INDEX_FILE), index_dtype(),
+                               lambda record: int(record["offset"]) + int(record["length"]))
+        self._data = open(os.path.join(path, DATA_FILE), "ab")
+        self._meta = open(os.path.join(path, META_FILE), "a", encoding="utf-8")
+        self._index = open(os.path.join(path, INDEX_FILE), "ab")
+        self._lock = threading.Lock()
+
+    def append(self, name, text, source_audio=None, voice_length=0.0, **extra):
+        """
+        Append one transcript.
+
+        Args:
+            name (str): Record name, normally the transcript filename (e.g. "xxx.txt")
+            text (str): Transcript text
+            source_audio (str): Path of the audio file the transcript came from
+            voice_length (float): Detected voice activity in seconds
+            **extra: Additional JSON-serializable metadata
+        """
+        import numpy as np
+
+        data = text.encode("utf-8")
+        meta = dict(extra, name=name, source_audio=source_audio)
+        with self._lock:
+            offset = self._data.seek(0, os.SEEK_END)
+            self._data.write(data)
+            self._data.flush()
+            self._meta.write(json.dumps(meta, ensure_ascii=False) + "\n")
+            self._meta.flush()
+            record = np.array([(offset, len(data), voice_length, time.time())], dtype=index_dtype())
+            self._index.write(record.tobytes())
+            self._index.flush()
+
+    def close(self):
+        for f in (self._data, self._meta, self._index):
+            f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class CorpusReader:
+    """
+    Memory-mapped, read-only view of a packed corpus.
+
+    ``raw(i)`` returns a zero-copy memoryview of a record's UTF-8 bytes; ``text(i)``
+    decodes it. Records appended after opening are picked up by ``refresh()``.
+    """
+
+    def __init__(self, path):
+        import numpy as np
+
+        self.path = path
+        self._data_file = open(os.path.join(path, DATA_FILE), "rb")
+        self._data = None
+        self.index = np.zeros(0, dtype=index_dtype())
+        self.meta = []
+        self.refresh()
+
+    def refresh(self):
+        """Re-map the data file and load index records appended since the last refresh"""
+        import numpy as np
+
+        size = os.path.getsize(os.path.join(self.path, DATA_FILE))
+        if self._data is not None:
+            self._data.close()
+        self._data = mmap.mmap(self._data_file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+        # A torn trailing record (crash mid-write) is not part of the mapped index
+        index_size = os.path.getsize(os.path.join(self.path, INDEX_FILE)) // index_dtype().itemsize
+        if index_size:
+            self.index = np.memmap(os.path.join(self.path, INDEX_FILE), dtype=index_dtype(), mode="r",
+                                   shape=(index_size,))
+
+        with open(os.path.join(self.path, META_FILE), "r", encoding="utf-8") as f:
+            self.meta = [json.loads(line) for line in f if line.endswith("\n")]
+
+        # A crash between writes can leave the sidecar ahead of the index (until the next writer
+        # recovers the files); only committed records count
+        self.count = min(len(self.index), len(self.meta))
+        self._by_name = {self.meta[i]["name"]: i for i in range(self.count)}
+
+    def __len__(self):
+        return self.count
+
+    def raw(self, i):
+        record = self.index[i]
+        start = int(record["offset"])
+        return memoryview(self._data)[start:start + int(record["length"])]
+
+    def text(self, i):
+        return str(self.raw(i), "utf-8")
+
+    def record(self, i):
+        """Metadata of record i, including the numeric index fields"""
+        record = self.index[i]
+        return dict(self.meta[i], voice_length=float(record["voice_length"]), created=float(record["created"]))
+
+    def find(self, name):
+        """Index of the latest record with this name, or None"""
+        return self._by_name.get(name)
+
+    def names(self):
+        """Latest record index per name, in append order"""
+        return sorted(self._by_name.items(), key=lambda item: item[1])
+
+    def __iter__(self):
+        """Yield (name, text) for the latest version of every record"""
+        for name, i in self.names():
+            yield name, self.text(i)
+
+    def close(self):
+        if self._data is not None and not isinstance(self._data, bytes):
+            self._data.close()
+        self._data_file.close()
+
+
+class TranscriptSource:
+    """
+    Uniform read access to transcripts stored as a packed corpus or as a directory of .txt files.
+
+    Tools take a path and use ``names()`` / ``read(name)`` without caring which layout it is.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.reader = CorpusReader(path) if is_packed_corpus(path) else None
+
+    def names(self):
+        """Transcript names (filenames such as "xxx.txt")"""
+        if self.reader is not None:
+            return [name for name, _ in self.reader.names()]
+        return sorted(f for f in os.listdir(self.path) if f.endswith(".txt"))
+
+    def read(self, name):
+        """Text of one transcript; raises FileNotFoundError if it does not exist"""
+        if self.reader is not None:
+            i = self.reader.find(name)
+            if i is None:
+                raise FileNotFoundError(name)
+            return self.reader.text(i)
+        with open(os.path.join(self.path, name), "r", encoding="utf-8") as f:
+            return f.read()
+
+    def close(self):
+        if self.reader is not None:
+            self.reader.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def iter_transcripts(source):
+    """
+    Yield (name, text) from a packed corpus or a directory of .txt files.
+
+    Args:
+        source (str): Packed corpus directory or transcript directory
+
+    Yields:
+        tuple: (name, text)
+    """
+    with TranscriptSource(source) as transcripts:
+        for name in transcripts.names():
+            yield name, transcripts.read(name)
+
+
+def pack_directory(text_dir, corpus_path):
+    """
+    Pack every .txt file of a transcript directory into a corpus, skipping names already packed.
+
+    Returns:
+        int: Number of records appended
+    """
+    existing = set()
+    if is_packed_corpus(corpus_path):
+        reader = CorpusReader(corpus_path)
+        existing = {name for name, _ in reader.names()}
+        reader.close()
+
+    added = 0
+    with CorpusWriter(corpus_path) as writer:
+        for name, text in iter_transcripts(text_dir):
+            if name not in existing:
+                writer.append(name, text)
+                added += 1
+    return added
+
+
+if __name__ == "__main__":
+    # Convert an existing transcript directory, e.g. TEXT_DIR=data/text CORPUS_PATH=data/corpus
+    start_time = time.time()
+    added = pack_directory(os.environ.get("TEXT_DIR", "data/text"), os.environ.get("CORPUS_PATH", "data/corpus"))
+    print(f"Packed {added} transcripts in {time.time() - start_time:.2f} seconds")
@@ -0,0 +1,185 @@
+import os
+import time
+import queue
+import threading
+from contextlib import nullcontext
+
+from voice_to_text_processor import load_models, get_audio_files, process_audio_file
+from file_utils import analyze_insurance_text
+from text_normalizer import normalize_text
+from result_sink import ResultSink, ProgressMeter, file_key
+from ollama_pool import get_default_pool
+from packed_corpus import CorpusWriter
+from admission import AdmissionController, audio_duration, estimate_job_mb
+from profiling import stage, TIMERS, profile_from_env, write_reports
+
+
+# Marks the end of the transcript queue for LLM workers
+_DONE = object()
+
+
+def run_pipeline(audio_files, output_dir, logs_dir, results_path, asr_workers=1, llm_workers=4,
+                 pool=None, resume=False, model_factory=load_models, classify=analyze_insurance_text,
+                 corpus=None, mask_events=False, memory_budget_mb=None, postprocess=None):
+    """
+    Transcribe and classify audio files with overlapping ASR and LLM stages.
+
+    ASR workers push each transcript onto a bounded queue as soon as it is written, and
+    LLM workers classify from that queue concurrently, so neither side waits for the
+    other to finish the whole directory. One combined record per audio file is appended
+    to the result sink, keyed by the file's absolute path (file_key), so recordings with
+    the same name in different day folders are tracked separately.
+
+    Args:
+        audio_files (list): Audio file paths
+        output_dir (str): Directory for transcript .txt files
+        logs_dir (str): Directory for processing time CSVs
+        results_path (str): JSONL sink for combined per-file records
+        asr_workers (int): Concurrent ASR workers, each with its own models
+        llm_workers (int): Concurrent classification requests
+        pool (OllamaPool): Endpoint pool (defaults to the OLLAMA_ENDPOINTS pool)
+        resume (bool): Skip audio files that already have a verdict in the sink
+        model_factory (callable): Returns (transcript_model, vad_model) for one ASR worker
+        classify (callable): (content, pool=...) -> verdict string
+        corpus (CorpusWriter): Optional packed corpus that also receives every transcript
+        mask_events (bool): Drop/trim VAD segments that are mostly barking or noise before ASR
+        memory_budget_mb (float): Admit ASR jobs (and model loads) only while their estimated
+            memory fits in this budget; asr_workers is then the upper bound of concurrency
+        postprocess (callable): Raw ASR output to text (defaults to rich_transcription_postprocess)
+
+    Returns:
+        dict: Dictionary with the audio file's absolute path as key and combined record as value
+    """
+    pool = pool or get_default_pool()
+    audio_queue = queue.Queue()
+    # Bounded so a fast ASR stage cannot pile up unlimited transcripts ahead of the LLM
+    transcript_queue = queue.Queue(maxsize=llm_workers * 4)
+
+    with ResultSink(results_path) as sink:
+        pending = [path for path in audio_files if not (resume and _is_done(sink, _key(path)))]
+        if resume:
+            print(f"Resuming: {len(audio_files) - len(pending)} files already done, {len(pending)} remaining")
+        for path in pending:
+            audio_queue.put(path)
+
+        progress = ProgressMeter(len(pending))
+        admission = AdmissionController(memory_budget_mb, asr_workers) if memory_budget_mb else None
+
+        def asr_worker():
+            models = None
+            while True:
+                try:
+                    audio_path = audio_queue.get_nowait()
+                except queue.Empty:
+                    return
+                filename = os.path.basename(audio_path)
+                try:
+                    estimate = estimate_job_mb(audio_duration(audio_path), load_waveform=mask_events,
+                                               load_models=models is None)
+                    with admission.admit(estimate) if admission else nullcontext():
+                        if models is None:
+                            models = model_factory()
+                        transcript_model, vad_model = models
+                        record = process_audio_file(audio_path, filename, transcript_model, vad_model,
+                                                    output_dir, logs_dir, corpus=corpus, mask_events=mask_events,
+                                                    postprocess=postprocess)
+                except Exception as e:
+                    print(f"Error transcribing {filename}: {str(e)}")
+                    sink.write(_key(audio_path), {"file": filename, "verdict": f"Error: {str(e)}"})
+                    progress.update()
+                    continue
+
+                record["audio_path"] = audio_path
+                if record["transcript_path"] is None:
+                    record["verdict"] = None
+                    sink.write(_key(audio_path), record)
+                    progress.update()
+                else:
+                    transcript_queue.put(record)
+
+        def llm_worker():
+            while True:
+                record = transcript_queue.get()
+                if record is _DONE:
+                    return
+                start_time = time.time()
+                try:
+                    with open(record["transcript_path"], "r", encoding="utf-8") as f:
+                        content, _ = normalize_text(f.read())
+                    with stage("classify"):
+                        record["verdict"] = classify(content, pool=pool)
+                except Exception as e:
+                    record["verdict"] = f"Error: {str(e)}"
+                record["llm_time"] = time.time() - start_time
+                sink.write(_key(record["audio_path"]), record)
+                print(f"Classified {record['file']}: {record['verdict']}")
+                progress.update()
+
+        asr_threads = [threading.Thread(target=asr_worker) for _ in range(asr_workers)]
+        llm_threads = [threading.Thread(target=llm_worker) for _ in range(llm_workers)]
+        for thread in asr_threads + llm_threads:
+            thread.start()
+
+        for thread in asr_threads:
+            thread.join()
+        for _ in llm_threads:
+            transcript_queue.put(_DONE)
+        for thread in llm_threads:
+            thread.join()
+        if admission is not None:
+            admission.close()
+            print(f"Memory admission: {admission.stats()}")
+
+        return dict(sink.results)
+
+
+def _key(audio_path):
+    return file_key(os.path.dirname(audio_path), os.path.basename(audio_path))
+
+
+def _is_done(sink, key):
+    """Whether the sink already holds a final record (verdict or skip) for the file"""
+    record = sink.results.get(key)
+    if record is None:
+        return False
+    verdict = record.get("verdict")
+    return not (isinstance(verdict, str) and verdict.startswith("Error"))
+
+
+def main():
+    """Run the streaming transcribe -> classify pipeline over AUDIOS_PATH"""
+    audios_path = os.environ.get("AUDIOS_PATH", "/Users/william/Work/VoiceData/data")
+    output_dir = os.environ.get("OUTPUT_DIR", "/Users/william/Work/VoiceData/data/text")
+    logs_dir = os.environ.get("LOGS_DIR", "./logs")
+    results_path = os.environ.get("PIPELINE_RESULTS_PATH", "data/results/pipeline.jsonl")
+    profiling = profile_from_env()
+
+    os.makedirs(output_dir, exist_ok=True)
+    os.makedirs(logs_dir, exist_ok=True)
+
+    audio_files = get_audio_files(audios_path)
+    print(f"Found {len(audio_files)} audio files to process")
+
+    corpus_path = os.environ.get("CORPUS_PATH")
+    corpus = CorpusWriter(corpus_path) if corpus_path else None
+
+    start_time = time.time()
+    results = run_pipeline(
+        audio_files, output_dir, logs_dir, results_path,
+        asr_workers=int(os.environ.get("ASR_WORKERS", "1")),
+        llm_workers=int(os.environ.get("LLM_WORKERS", "4")),
+        resume=os.environ.get("RESUME", "0") == "1",
+        corpus=corpus,
+        mask_events=os.environ.get("MASK_EVENTS", "0") == "1",
+        memory_budget_mb=float(os.environ.get("ASR_MEMORY_MB", "0")) or None,
+    )
+    if corpus is not None:
+        corpus.close()
+    print(f"Pipeline finished {len(results)} files in {time.time() - start_time:.2f} seconds")
+    TIMERS.report()
+    if profiling:
+        print(f"Profiles written to {os.environ['PROFILE_DIR']} ({len(write_reports())} files)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+import os
+import json
+import time
+import cProfile
+import pstats
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+
+class TimerRegistry:
+    """
+    Always-on, thread-safe wall-clock totals per named stage.
+
+    Recording a timing is two perf_counter calls and a dict update under a lock, cheap
+    enough to leave in every hot path.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._timers = {}
+
+    def add(self, name, seconds):
+        with self._lock:
+            entry = self._timers.get(name)
+            if entry is None:
+                self._timers[name] = [1, seconds, seconds]
+            else:
+                entry[0] += 1
+                entry[1] += seconds
+                entry[2] = max(entry[2], seconds)
+
+    @contextmanager
+    def timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def summary(self):
+        """
+        Returns:
+            dict: name -> {"count", "total", "mean", "max"} in seconds
+        """
+        with self._lock:
+            return {
+                name: {"count": count, "total": round(total, 4), "mean": round(total / count, 4), "max": round(peak, 4)}
+                for name, (count, total, peak) in self._timers.items()
+            }
+
+    def report(self):
+        """Print one line per stage, slowest total first"""
+        for name, entry in sorted(self.summary().items(), key=lambda item: -item[1]["total"]):
+            print(f"  {name:<20} {entry['count']:>6} calls  {entry['total']:>9.2f}s total  "
+                  f"{entry['mean'] * 1000:>8.1f} ms mean  {entry['max'] * 1000:>8.1f} ms max")
+
+    def reset(self):
+        with self._lock:
+            self._timers.clear()
+
+
+TIMERS = TimerRegistry()
+
+
+class _Profiler:
+    """Per-stage cProfile and tracemalloc collection, active only between enable and write_reports"""
+
+    def __init__(self, output_dir, cpu=True, memory=True, top=25):
+        self.output_dir = output_dir
+        self.cpu = cpu
+        self.memory = memory
+        self.top = top
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.profiles = {}
+        self.allocations = {}
+        self.peaks = {}
+        # Stages currently running in any thread, and whether another stage ran since traces were cleared
+        self.active = 0
+        self.shared = False
+        self.calls = {}
+        self.overlapped = {}
+
+
+_profiler = None
+
+
+def enable_profiling(output_dir, cpu=True, memory=True, top=25):
+    """
+    Turn on per-stage profiling for the rest of the process.
+
+    Args:
+        output_dir (str): Where write_reports puts <stage>.pstats and <stage>.alloc.txt
+        cpu (bool): Collect cProfile statistics per stage
+        memory (bool): Record tracemalloc allocations and peak per stage
+        top (int): Allocation sites kept per stage
+    """
+    global _profiler
+    _profiler = _Profiler(output_dir, cpu=cpu, memory=memory, top=top)
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start(1)
+
+
+def is_profiling():
+    return _profiler is not None
+
+
+@contextmanager
+def stage(name):
+    """
+    Time a pipeline stage in TIMERS and, when profiling is enabled, profile it.
+
+    Only the outermost stage of each thread is profiled; nested stages are timed only,
+    since cProfile cannot run two profilers on one thread (on Python 3.12+ not even in
+    one process, so concurrent stages in other threads are timed only as well).
+    Allocations are traced from a cleared tracemalloc state at stage start, so the report
+    lists what the stage allocated and still held at its end, plus the peak. tracemalloc
+    has one trace per process, so traces are only cleared when no other stage is running;
+    a stage that overlaps others (ASR_WORKERS or LLM_WORKERS > 1) also reports what they
+    allocated meanwhile, and the report counts how many calls overlapped. With profiling
+    disabled this is just the timer.
+    """
+    profiler = _profiler
+    if profiler is None or getattr(profiler.local, "active", False):
+        with TIMERS.timer(name):
+            yield
+        return
+
+    profiler.local.active = True
+    profile = cProfile.Profile() if profiler.cpu else None
+    if profiler.memory:
+        with profiler.lock:
+            if profiler.active == 0:
+                # Comparing against a full snapshot is slow once numba/librosa have allocated
+                # hundreds of thousands of blocks; starting from empty traces keeps this cheap
+                tracemalloc.clear_traces()
+                profiler.shared = False
+            else:
+                profiler.shared = True
+            profiler.active += 1
+    start = time.perf_counter()
+    if profile is not None:
+        try:
+            profile.enable()
+        except ValueError:
+            profile = None
+    try:
+        yield
+    finally:
+        if profile is not None:
+            profile.disable()
+        TIMERS.add(name, time.perf_counter() - start)
+        profiler.local.active = False
+        _collect(profiler, name, profile)
+
+
+def _collect(profiler, name, profile):
+    held, peak = [], 0
+    if profiler.memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        held = tracemalloc.take_snapshot().statistics("lineno")[:profiler.top]
+    with profiler.lock:
+        if profile is not None:
+            stats = profiler.profiles.get(name)
+            if stats is None:
+                profiler.profiles[name] = pstats.Stats(profile)
+            else:
+                stats.add(profile)
+        if not profiler.memory:
+            return
+        profiler.active -= 1
+        profiler.calls[name] = profiler.calls.get(name, 0) + 1
+        if profiler.shared:
+            profiler.overlapped[name] = profiler.overlapped.get(name, 0) + 1
+        profiler.peaks[name] = max(profiler.peaks.get(name, 0), peak)
+        allocations = profiler.allocations.setdefault(name, {})
+        for stat in held:
+            key = str(stat.traceback)
+            size, count = allocations.get(key, (0, 0))
+            allocations[key] = (size + stat.size, count + stat.count)
+
+
+def profile_from_env():
+    """
+    Enable profiling when PROFILE_DIR is set (for the environment-configured scripts).
+
+    Returns:
+        bool: True if profiling was enabled here, so the caller should write_reports at the end;
+              False when it is off or a caller further up (cli.py --profile) already owns it
+    """
+    output_dir = os.environ.get("PROFILE_DIR")
+    if not output_dir or is_profiling():
+        return False
+    enable_profiling(output_dir, memory=os.environ.get("PROFILE_MEMORY", "1") == "1")
+    return True
+
+
+def write_reports():
+    """
+    Write everything collected since enable_profiling.
+
+    Files in the output directory: <stage>.pstats (load with pstats.Stats or snakeviz),
+    <stage>.alloc.txt (peak traced memory and top allocation sites by bytes still held at stage
+    end, summed over calls, with the number of calls that overlapped other stages) and
+    timers.json (TIMERS summary).
+
+    Returns:
+        list: Paths written
+    """
+    profiler = _profiler
+    if profiler is None:
+        return []
+    os.makedirs(profiler.output_dir, exist_ok=True)
+    written = []
+    with profiler.lock:
+        for name, stats in profiler.profiles.items():
+            path = os.path.join(profiler.output_dir, f"{name}.pstats")
+            stats.dump_stats(path)
+            written.append(path)
+        for name, allocations in profiler.allocations.items():
+            path = os.path.join(profiler.output_dir, f"{name}.alloc.txt")
+            top = sorted(allocations.items(), key=lambda item: -item[1][0])[:profiler.top]
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(f"peak traced memory: {profiler.peaks[name] / 1024:.1f} KiB\n")
+                overlapped = profiler.overlapped.get(name, 0)
+                if overlapped:
+                    f.write(f"{overlapped} of {profiler.calls[name]} calls overlapped other stages; "
+                            f"their allocations are included\n")
+                for site, (size, count) in top:
+                    f.write(f"{size / 1024:10.1f} KiB {count:8d} blocks  {site}\n")
+            written.append(path)
+
+    path = os.path.join(profiler.output_dir, "timers.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(TIMERS.summary(), f, indent=2)
+    written.append(path)
+    return written
@@ -0,0 +1,123 @@
+import os
+import json
+import time
+import threading
+
+
+class ResultSink:
+    """
+    Append-only JSONL store of per-file results.
+
+    Each completed file is written as one line and flushed immediately, so a crash loses
+    at most the file in flight. Re-opening an existing sink makes the finished files
+    available for resume via ``filename in sink`` and cuts off a line torn by a crash,
+    so the next record starts on a line of its own. Writes are thread-safe.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        _truncate_torn_line(path)
+        self.results = load_results(path)
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def __contains__(self, filename):
+        return filename in self.results
+
+    def __len__(self):
+        return len(self.results)
+
+    def write(self, filename, result, **extra):
+        """Append one result record and flush it to disk"""
+        record = {"file": filename, "result": result, "time": time.time()}
+        record.update(extra)
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            self.results[filename] = result
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _truncate_torn_line(path):
+    """Cut a file back to its last newline, dropping a partial last line"""
+    if not os.path.exists(path):
+        return
+    with open(path, "rb+") as f:
+        size = f.seek(0, os.SEEK_END)
+        end = size
+        while end > 0:
+            start = max(0, end - 4096)
+            f.seek(start)
+            newline = f.read(end - start).rfind(b"\n")
+            if newline >= 0:
+                end = start + newline + 1
+                break
+            end = start
+        if end < size:
+            f.truncate(end)
+
+
+def file_key(directory, filename):
+    """Result key of a file in a directory: its absolute path, so equal names in different directories do not collide"""
+    return os.path.join(os.path.abspath(directory), filename)
+
+
+def load_results(path):
+    """
+    Load a JSONL result file into a filename -> result dict (later lines win).
+
+    A truncated trailing line left by a crash is ignored.
+
+    Args:
+        path (str): Path to the JSONL file
+
+    Returns:
+        dict: Dictionary with filename as key and stored result as value
+    """
+    results = {}
+    if not os.path.exists(path):
+        return results
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            results[record["file"]] = record["result"]
+
+    return results
+
+
+class ProgressMeter:
+    """Prints done/total, throughput and ETA as files complete"""
+
+    def __init__(self, total, every=1):
+        self.total = total
+        self.every = every
+        self.done = 0
+        self.start_time = time.time()
+        self._lock = threading.Lock()
+
+    def update(self, n=1):
+        with self._lock:
+            self.done += n
+            done = self.done
+        if done % self.every and done != self.total:
+            return
+        elapsed = time.time() - self.start_time
+        rate = done / elapsed if elapsed > 0 else 0.0
+        eta = (self.total - done) / rate if rate > 0 else 0.0
+        print(f"[{done}/{self.total}] {rate:.2f} files/s, ETA {eta:.0f}s")
@@ -0,0 +1,153 @@
+import os
+import re
+import json
+
+from text_normalizer import normalize_text
+
+
+# SenseVoice prefixes every decoded segment with <|lang|><|EMOTION|><|Event|><|itn|>
+TAG_RE = re.compile(r"<\|([^|>]*)\|>")
+
+SAMPLE_RATE = 16000
+
+
+def merge_segments(segments, max_length_ms=15000, max_gap_ms=1000):
+    """
+    Greedily merge adjacent VAD segments so ASR sees fewer, longer inputs, without bridging long silences.
+
+    Args:
+        segments (list): [start_ms, end_ms] pairs from fsmn-vad
+        max_length_ms (int): Maximum length of a merged segment
+        max_gap_ms (int): Do not bridge silences longer than this
+
+    Returns:
+        list: Merged [start_ms, end_ms] pairs
+    """
+    merged = []
+    for start, end in segments:
+        if merged and start - merged[-1][1] <= max_gap_ms and end - merged[-1][0] <= max_length_ms:
+            merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def merge_vad_spans(segments, max_length_ms=15000):
+    """
+    FunASR's merge_vad: cut the audio into contiguous spans of up to max_length_ms at VAD boundaries.
+
+    Unlike merge_segments the spans also cover the silences between segments. This is
+    what generate(merge_vad=True) transcribes, so using it keeps segment-level output
+    identical to the plain whole-file transcript.
+
+    Returns:
+        list: [start_ms, end_ms] spans
+    """
+    if len(segments) <= 1:
+        return [list(segment) for segment in segments]
+    boundaries = sorted({t for segment in segments for t in segment})
+    spans = []
+    begin = 0
+    for i in range(len(boundaries) - 1):
+        if boundaries[i + 1] - begin < max_length_ms:
+            continue
+        if boundaries[i] > begin:
+            spans.append([begin, boundaries[i]])
+        begin = boundaries[i]
+    spans.append([begin, boundaries[-1]])
+    return spans
+
+
+def parse_segment(raw_text, start_ms, end_ms, postprocess):
+    """
+    Split a raw SenseVoice segment into its tags and text.
+
+    Args:
+        raw_text (str): Raw model output including <|...|> tags
+        start_ms (int): Segment start in the audio
+        end_ms (int): Segment end in the audio
+        postprocess (callable): rich_transcription_postprocess
+
+    Returns:
+        dict: start_ms, end_ms, language, emotion, event, raw tags, display text, normalized text
+              and the raw model output
+    """
+    tags = TAG_RE.findall(raw_text)
+    text = postprocess(raw_text)
+    return {
+        "start_ms": int(start_ms),
+        "end_ms": int(end_ms),
+        "language": tags[0] if len(tags) > 0 else None,
+        "emotion": tags[1] if len(tags) > 1 else None,
+        "event": tags[2] if len(tags) > 2 else None,
+        "tags": tags,
+        "text": text,
+        "normalized": normalize_text(text, dedupe_sentences=False)[0],
+        "raw": raw_text,
+    }
+
+
+def joined_text(segments, postprocess):
+    """Flat transcript of segments, assembled like generate() does: raw texts joined, then postprocessed"""
+    return postprocess(" ".join(segment["raw"] for segment in segments))
+
+
+def _asr_batches(transcript_model, clips, batch_size_s, **options):
+    """
+    Run ASR on already segmented clips, never through the model's own VAD.
+
+    A SenseVoice AutoModel loaded with vad_model=... runs fsmn-vad again inside generate();
+    its inference() skips that. Clips are batched shortest first up to batch_size_s seconds
+    of audio, as generate() batches VAD segments, and results come back in input order.
+    """
+    if getattr(transcript_model, "vad_model", None) is None:
+        return transcript_model.generate(input=clips, batch_size_s=batch_size_s, **options)
+
+    order = sorted(range(len(clips)), key=lambda i: len(clips[i]))
+    results = [None] * len(clips)
+    batch, batch_samples = [], 0
+    for i in order + [None]:
+        if batch and (i is None or batch_samples + len(clips[i]) > batch_size_s * SAMPLE_RATE):
+            batch_results = transcript_model.inference([clips[j] for j in batch], batch_size=len(batch), **options)
+            for j, result in zip(batch, batch_results):
+                results[j] = result
+            batch, batch_samples = [], 0
+        if i is not None:
+            batch.append(i)
+            batch_samples += len(clips[i])
+    return results
+
+
+def transcribe_segments(waveform, segments, transcript_model, postprocess, batch_size_s=60):
+    """
+    Transcribe selected [start_ms, end_ms] spans of a 16 kHz waveform in one batched call.
+
+    Used both for the initial segment-level transcript and for re-transcribing a few
+    segments later without running ASR over the whole file again.
+
+    Returns:
+        list: One parse_segment() dict per input span
+    """
+    if not segments:
+        return []
+    clips = [waveform[int(start * SAMPLE_RATE / 1000):int(end * SAMPLE_RATE / 1000)] for start, end in segments]
+    res = _asr_batches(transcript_model, clips, batch_size_s, language="auto", use_itn=True, ban_emo_unk=False)
+    return [parse_segment(r["text"], start, end, postprocess) for r, (start, end) in zip(res, segments)]
+
+
+def segments_path(segments_dir, audio_path):
+    base_filename = os.path.splitext(os.path.basename(audio_path))[0]
+    return os.path.join(segments_dir, f"{base_filename}.segments.jsonl")
+
+
+def write_segments(path, segments):
+    """Write one JSON line per segment"""
+    with open(path, "w", encoding="utf-8") as f:
+        for segment in segments:
+            f.write(json.dumps(segment, ensure_ascii=False) + "\n")
+
+
+def load_segments(path):
+    """Read a .segments.jsonl file back into a list of dicts"""
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
@@ -0,0 +1,134 @@
+import numpy as np
+import librosa
+
+
+def frame_rms(y, window_samples):
+    """
+    RMS energy of consecutive non-overlapping windows, using a reshaped view instead of a Python loop.
+
+    The trailing partial window is kept, matching the original loop over range(0, len(y), window).
+
+    Args:
+        y (np.ndarray): Audio samples
+        window_samples (int): Window length in samples
+
+    Returns:
+        np.ndarray: RMS per window
+    """
+    n_full = len(y) // window_samples
+    frames = y[:n_full * window_samples].reshape(n_full, window_samples)
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float64), axis=1))
+    tail = y[n_full * window_samples:]
+    if len(tail):
+        rms = np.append(rms, np.sqrt(np.mean(np.square(tail, dtype=np.float64))))
+    return rms
+
+
+class SpectralFeatures:
+    """
+    Computes the STFT magnitude of a signal once and derives every spectral feature from it.
+
+    librosa's feature functions each recompute the STFT (and MFCC the mel spectrogram)
+    when given raw audio; passing the cached spectrogram via ``S=`` avoids that. All
+    properties are computed lazily and cached.
+    """
+
+    def __init__(self, y, sr, n_fft=2048, hop_length=512):
+        self.y = y
+        self.sr = sr
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self._cache = {}
+
+    def _cached(self, name, compute):
+        if name not in self._cache:
+            self._cache[name] = compute()
+        return self._cache[name]
+
+    @property
+    def magnitude(self):
+        """|STFT|, shape (1 + n_fft/2, n_frames)"""
+        return self._cached("magnitude", lambda: np.abs(
+            librosa.stft(self.y, n_fft=self.n_fft, hop_length=self.hop_length)))
+
+    @property
+    def power(self):
+        return self._cached("power", lambda: self.magnitude ** 2)
+
+    @property
+    def frequencies(self):
+        return self._cached("frequencies", lambda: librosa.fft_frequencies(sr=self.sr, n_fft=self.n_fft))
+
+    @property
+    def mel(self):
+        return self._cached("mel", lambda: librosa.feature.melspectrogram(S=self.power, sr=self.sr))
+
+    @property
+    def mfcc(self):
+        return self._cached("mfcc", lambda: librosa.feature.mfcc(
+            S=librosa.power_to_db(self.mel), sr=self.sr, n_mfcc=13))
+
+    @property
+    def centroid(self):
+        return self._cached("centroid", lambda: librosa.feature.spectral_centroid(
+            S=self.magnitude, sr=self.sr, freq=self.frequencies)[0])
+
+    @property
+    def rolloff(self):
+        return self._cached("rolloff", lambda: librosa.feature.spectral_rolloff(
+            S=self.magnitude, sr=self.sr, freq=self.frequencies)[0])
+
+    @property
+    def bandwidth(self):
+        return self._cached("bandwidth", lambda: librosa.feature.spectral_bandwidth(
+            S=self.magnitude, sr=self.sr, freq=self.frequencies)[0])
+
+    @property
+    def flatness(self):
+        """Spectral flatness per frame; near 1 for noise, near 0 for tonal/harmonic sound"""
+        return self._cached("flatness", lambda: librosa.feature.spectral_flatness(S=self.magnitude)[0])
+
+    @property
+    def rms(self):
+        """
+        Time-domain frame RMS, identical to librosa.feature.rms(y=y) and aligned with the STFT frames.
+
+        Not derived from the spectrogram: the Hann window removes about 39% of a frame's
+        amplitude, and framing the samples is cheap next to the STFT anyway.
+        """
+        return self._cached("rms", lambda: librosa.feature.rms(
+            y=self.y, frame_length=self.n_fft, hop_length=self.hop_length)[0])
+
+    @property
+    def zero_crossing_rate(self):
+        return self._cached("zcr", lambda: librosa.feature.zero_crossing_rate(
+            self.y, frame_length=self.n_fft, hop_length=self.hop_length)[0])
+
+    @property
+    def spectrogram_db(self):
+        """Magnitude in dB relative to the peak, for plotting"""
+        return self._cached("spectrogram_db", lambda: librosa.amplitude_to_db(self.magnitude, ref=np.max))
+
+    def band_energy_ratio(self, low_hz, high_hz):
+        """Fraction of each frame's energy between low_hz and high_hz"""
+        key = ("band_ratio", low_hz, high_hz)
+        if key not in self._cache:
+            mask = (self.frequencies >= low_hz) & (self.frequencies <= high_hz)
+            band = self.power[mask, :].sum(axis=0)
+            total = self.power.sum(axis=0)
+            self._cache[key] = band / (total + 1e-10)
+        return self._cache[key]
+
+    def summary(self):
+        """The DogBarkDetector feature dict (means/stds of the per-frame features)"""
+        return {
+            "mfcc_mean": np.mean(self.mfcc, axis=1),
+            "mfcc_std": np.std(self.mfcc, axis=1),
+            "spectral_centroid_mean": np.mean(self.centroid),
+            "spectral_centroid_std": np.std(self.centroid),
+            "spectral_rolloff_mean": np.mean(self.rolloff),
+            "zero_crossing_rate_mean": np.mean(self.zero_crossing_rate),
+            "rms_mean": np.mean(self.rms),
+            "rms_std": np.std(self.rms),
+            "spectral_bandwidth_mean": np.mean(self.bandwidth),
+        }
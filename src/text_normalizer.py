@@ -0,0 +1,168 @@
+import os
+import re
+
+
+# SenseVoice raw tags such as <|zh|>, <|NEUTRAL|>, <|Speech|>, <|withitn|>
+EVENT_TAG_RE = re.compile(r"<\|[^|>]*\|>")
+
+# Emoji emitted by rich_transcription_postprocess for emotions/events, plus other pictographs
+EMOJI_RE = re.compile("[\U0001F000-\U0001FAFF\u2600-\u27BF\uFE0F\u200D]")
+
+# Any CJK character repeated three or more times in a row ("哦哦哦哦哦" -> "哦"); digits are left alone
+REPEAT_RE = re.compile(r"([\u3400-\u9fff])\1{2,}")
+
+# Filler characters that carry no content for classification, only where they stand alone
+# between punctuation/whitespace ("嗯，" but not the 额 of "金额" or "额外"), with the
+# commas that followed them
+FILLER_RE = re.compile(r"(?<![^\s。！？!?，,.、；;])[嗯呃额]+(?![^\s。！？!?，,.、；;])[\s，,、；;]*")
+
+# Commas left in front of a sentence end once a filler is gone ("然后，。" -> "然后。")
+SOFT_BEFORE_END_RE = re.compile(r"[\s，,、；;]+([。！？!?])")
+
+# Commas and spaces a sentence should neither start nor end with
+SOFT_PUNCT = " \t\r\n，,、；;"
+
+# Runs of mixed sentence punctuation such as "。.。" or "，，", with the whitespace after them
+PUNCT_RUN_RE = re.compile(r"([。！？!?，,.、；;])[。！？!?，,.、；;\s]+")
+
+# Sentence boundary used for de-duplication
+SENTENCE_RE = re.compile(r"[^。！？!?]+[。！？!?]?")
+
+# Sentences consisting only of interjections ("哦。", "啊，"); one-word answers such as "对。" stay
+INTERJECTION_ONLY_RE = re.compile(r"^[哦啊呀哈嘿喂噢唉嗯呃额\s，,。.！!？?]*$")
+
+CJK_RE = re.compile(r"[\u3400-\u9fff]")
+
+
+def estimate_tokens(text):
+    """
+    Roughly estimate LLM prompt tokens: one per CJK character plus one per four other characters.
+
+    Args:
+        text (str): Input text
+
+    Returns:
+        int: Estimated token count
+    """
+    cjk = len(CJK_RE.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def _needs_space(left, right):
+    """Whether two characters are joined with a space: Chinese text needs none, English words do"""
+    return bool(left) and bool(right) and (left.isascii() or right.isascii())
+
+
+def _collapse_punct_run(match):
+    """Keep the first mark of a punctuation run, and one space after it if the run had one between words"""
+    mark = match.group(1)
+    following = match.string[match.end():match.end() + 1]
+    if _needs_space(mark, following) and any(c.isspace() for c in match.group(0)):
+        return mark + " "
+    return mark
+
+
+def _join_sentences(sentences):
+    """Join sentences back together, with a single space where either side is ASCII ("ok. Thanks")"""
+    parts = []
+    for sentence in sentences:
+        if parts and _needs_space(parts[-1][-1], sentence[0]):
+            parts.append(" ")
+        parts.append(sentence)
+    return "".join(parts)
+
+
+def normalize_text(text, dedupe_sentences=True):
+    """
+    Normalize a SenseVoice transcript in linear time.
+
+    Strips raw event tags and emoji, collapses repeated characters and fillers,
+    tidies punctuation runs and drops repeated or interjection-only sentences.
+    Whitespace around punctuation is dropped in Chinese text and kept as a single
+    space where English text needs it.
+
+    Args:
+        text (str): Raw transcript text
+        dedupe_sentences (bool): Drop sentences that already appeared earlier
+
+    Returns:
+        tuple: (normalized_text, stats) where stats holds chars/tokens before and after
+    """
+    result = EVENT_TAG_RE.sub("", text)
+    result = EMOJI_RE.sub("", result)
+    result = REPEAT_RE.sub(r"\1", result)
+    result = FILLER_RE.sub("", result)
+    result = SOFT_BEFORE_END_RE.sub(r"\1", result)
+    result = PUNCT_RUN_RE.sub(_collapse_punct_run, result)
+
+    sentences = []
+    seen = set()
+    for sentence in SENTENCE_RE.findall(result):
+        sentence = sentence.strip(SOFT_PUNCT)
+        if not sentence or INTERJECTION_ONLY_RE.match(sentence):
+            continue
+        if dedupe_sentences:
+            if sentence in seen:
+                continue
+            seen.add(sentence)
+        sentences.append(sentence)
+    result = _join_sentences(sentences)
+
+    stats = {
+        "chars_before": len(text),
+        "chars_after": len(result),
+        "tokens_before": estimate_tokens(text),
+        "tokens_after": estimate_tokens(result),
+    }
+    return result, stats
+
+
+def normalize_directory(input_dir, output_dir=None):
+    """
+    Normalize every .txt file in a directory and report the savings.
+
+    Args:
+        input_dir (str): Directory containing raw transcripts
+        output_dir (str): Directory to write normalized transcripts (defaults to in-place)
+
+    Returns:
+        dict: Aggregated stats over all files
+    """
+    output_dir = output_dir or input_dir
+    os.makedirs(output_dir, exist_ok=True)
+    txt_files = [f for f in os.listdir(input_dir) if f.endswith(".txt")]
+    totals = {"files": 0, "chars_before": 0, "chars_after": 0, "tokens_before": 0, "tokens_after": 0}
+
+    for filename in txt_files:
+        with open(os.path.join(input_dir, filename), "r", encoding="utf-8") as f:
+            text = f.read()
+
+        normalized, stats = normalize_text(text)
+
+        with open(os.path.join(output_dir, filename), "w", encoding="utf-8") as f:
+            f.write(normalized)
+
+        totals["files"] += 1
+        for key, value in stats.items():
+            totals[key] += value
+
+    print_savings(totals)
+    return totals
+
+
+def print_savings(stats):
+    """Print character and token savings from normalization stats"""
+    chars_saved = stats["chars_before"] - stats["chars_after"]
+    tokens_saved = stats["tokens_before"] - stats["tokens_after"]
+    print(f"Characters: {stats['chars_before']} -> {stats['chars_after']} "
+          f"(saved {chars_saved}, {100 * chars_saved / max(stats['chars_before'], 1):.1f}%)")
+    print(f"Estimated tokens: {stats['tokens_before']} -> {stats['tokens_after']} "
+          f"(saved {tokens_saved}, {100 * tokens_saved / max(stats['tokens_before'], 1):.1f}%)")
+
+
+if __name__ == "__main__":
+    # Normalize into a separate directory so the raw transcripts stay untouched
+    normalize_directory(
+        os.environ.get("TEXT_DIR", "data/text"),
+        os.environ.get("NORMALIZED_DIR", "data/text_normalized"),
+    )
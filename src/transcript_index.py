@@ -0,0 +1,402 @@
+import os
+import sys
+import json
+import time
+import argparse
+from collections import defaultdict
+import numpy as np
+
+from packed_corpus import TranscriptSource
+
+
+# Array files that make up one on-disk segment
+SEGMENT_ARRAYS = ("lex", "term_ptr", "docs", "pos_ptr", "positions")
+
+# Bumped when the index terms change; an index of an older format is rebuilt on open
+INDEX_FORMAT = 2
+
+
+def iter_bigrams(text):
+    """
+    Yield (bigram, offset) for every pair of adjacent word characters.
+
+    Chinese has no whitespace tokenization, so overlapping character bigrams are the
+    index terms; pairs that touch punctuation or whitespace are skipped.
+    """
+    for i in range(len(text) - 1):
+        pair = text[i:i + 2]
+        if pair.isalnum():
+            yield pair, i
+
+
+def iter_terms(text):
+    """
+    Yield (term, offset) for every bigram plus every character that stands alone.
+
+    A character between punctuation or whitespace ("你需要吗，对。") is in no bigram,
+    so it is indexed on its own; one-word answers stay searchable.
+    """
+    yield from iter_bigrams(text)
+    for i, char in enumerate(text):
+        if char.isalnum() and not (i > 0 and text[i - 1].isalnum()) \
+                and not (i + 1 < len(text) and text[i + 1].isalnum()):
+            yield char, i
+
+
+def query_bigrams(term):
+    """Bigrams of a query term with their offset relative to the term start"""
+    return [(term[i:i + 2], i) for i in range(len(term) - 1)]
+
+
+class Segment:
+    """
+    Immutable block of postings, memory-mapped from disk.
+
+    Layout (all .npy, loaded with mmap_mode="r"):
+        lex        sorted '<U2' lexicon of bigrams and standalone characters
+        term_ptr   int64[n_terms + 1], slice of ``docs`` per term
+        docs       uint32 doc ids, ascending within each term
+        pos_ptr    int64[n_postings + 1], slice of ``positions`` per (term, doc) posting
+        positions  uint32 character offsets, ascending within each posting
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.arrays = {name: np.load(f"{path}.{name}.npy", mmap_mode="r") for name in SEGMENT_ARRAYS}
+
+    @staticmethod
+    def write(path, docs):
+        """
+        Build a segment from (doc_id, text) pairs and write it to disk.
+
+        Args:
+            path (str): Segment path prefix
+            docs (list): (doc_id, text) pairs
+        """
+        postings = defaultdict(list)
+        for doc_id, text in sorted(docs):
+            local = defaultdict(list)
+            for term, offset in iter_terms(text):
+                local[term].append(offset)
+            for bigram, offsets in local.items():
+                postings[bigram].append((doc_id, offsets))
+
+        terms = sorted(postings)
+        term_ptr = np.zeros(len(terms) + 1, dtype=np.int64)
+        doc_ids, pos_counts, positions = [], [], []
+        for i, term in enumerate(terms):
+            for doc_id, offsets in postings[term]:
+                doc_ids.append(doc_id)
+                pos_counts.append(len(offsets))
+                positions.extend(offsets)
+            term_ptr[i + 1] = len(doc_ids)
+
+        pos_ptr = np.zeros(len(doc_ids) + 1, dtype=np.int64)
+        np.cumsum(pos_counts, out=pos_ptr[1:])
+
+        arrays = {
+            "lex": np.array(terms, dtype="<U2"),
+            "term_ptr": term_ptr,
+            "docs": np.array(doc_ids, dtype=np.uint32),
+            "pos_ptr": pos_ptr,
+            "positions": np.array(positions, dtype=np.uint32),
+        }
+        for name, array in arrays.items():
+            np.save(f"{path}.{name}.npy", array)
+
+    def _term_range(self, term):
+        lex = self.arrays["lex"]
+        i = np.searchsorted(lex, term)
+        if i < len(lex) and lex[i] == term:
+            return i, i + 1
+        return None
+
+    def _prefix_range(self, char):
+        lex = self.arrays["lex"]
+        return np.searchsorted(lex, char), np.searchsorted(lex, char + "\U0010ffff")
+
+    def hits(self, term_index_ranges, shift=0):
+        """
+        Expand the postings of lexicon index ranges into flat (doc_id, offset) hit arrays.
+
+        Args:
+            term_index_ranges (list): (start, stop) ranges into the lexicon
+            shift (int): Added to every offset (aligns bigram hits to the phrase start)
+
+        Returns:
+            tuple: (doc_ids, offsets) int64 arrays
+        """
+        term_ptr, pos_ptr = self.arrays["term_ptr"], self.arrays["pos_ptr"]
+        docs, positions = self.arrays["docs"], self.arrays["positions"]
+        all_docs, all_offsets = [], []
+        for start, stop in term_index_ranges:
+            if start >= stop:
+                continue
+            p0, p1 = term_ptr[start], term_ptr[stop]
+            counts = np.diff(pos_ptr[p0:p1 + 1])
+            all_docs.append(np.repeat(docs[p0:p1].astype(np.int64), counts))
+            all_offsets.append(positions[pos_ptr[p0]:pos_ptr[p1]].astype(np.int64) + shift)
+        if not all_docs:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        return np.concatenate(all_docs), np.concatenate(all_offsets)
+
+    def term_hits(self, term):
+        """(doc_ids, offsets) where the query term starts, as a phrase of bigrams"""
+        if len(term) == 1:
+            # The prefix range holds the standalone character and the bigrams it starts. It also
+            # matches as the second half of a bigram; inside a word it is both, so occurrences
+            # are deduplicated on (doc, offset)
+            start, stop = self._prefix_range(term)
+            lex = self.arrays["lex"][:]
+            ends = np.nonzero((np.char.str_len(lex) == 2) & np.char.endswith(lex, term))[0]
+            docs_a, offs_a = self.hits([(start, stop)])
+            docs_b, offs_b = self.hits([(i, i + 1) for i in ends], shift=1)
+            keys = np.unique((np.concatenate([docs_a, docs_b]) << 32) | np.concatenate([offs_a, offs_b]))
+            return keys >> 32, keys & 0xFFFFFFFF
+
+        keys = None
+        for bigram, rel in query_bigrams(term):
+            term_range = self._term_range(bigram)
+            if term_range is None:
+                return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+            doc_ids, offsets = self.hits([term_range], shift=-rel)
+            valid = offsets >= 0
+            doc_ids, offsets = doc_ids[valid], offsets[valid]
+            # Pack (doc, phrase start) into one int64 so phrase matching is a set intersection
+            bigram_keys = np.unique((doc_ids << 32) | offsets)
+            keys = bigram_keys if keys is None else np.intersect1d(keys, bigram_keys, assume_unique=True)
+            if len(keys) == 0:
+                break
+        return keys >> 32, keys & 0xFFFFFFFF
+
+    def files(self):
+        return [f"{self.path}.{name}.npy" for name in SEGMENT_ARRAYS]
+
+
+class TranscriptIndex:
+    """
+    Incremental bigram inverted index over a directory of transcripts.
+
+    New or changed files are indexed into a fresh segment on each update(); replaced
+    and removed documents are tombstoned and dropped when segments are compacted.
+    ``text_dir`` may also be a packed corpus, in which case record names are indexed.
+    """
+
+    def __init__(self, index_dir, text_dir, max_segments=8):
+        self.index_dir = index_dir
+        self.text_dir = text_dir
+        self.max_segments = max_segments
+        os.makedirs(index_dir, exist_ok=True)
+        self.meta_path = os.path.join(index_dir, "meta.json")
+        self.meta = {"format": INDEX_FORMAT, "docs": {}, "segments": [], "deleted": [], "next_id": 0,
+                     "next_segment": 0}
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("format") == INDEX_FORMAT:
+                self.meta = meta
+            else:
+                # Older segments lack standalone characters: drop them so update() reindexes everything
+                for name in meta["segments"]:
+                    for path in Segment(os.path.join(index_dir, name)).files():
+                        os.remove(path)
+                self.meta["next_segment"] = meta["next_segment"]
+        self.source = TranscriptSource(text_dir)
+        self._load_segments()
+
+    def _load_segments(self):
+        self.segments = [Segment(os.path.join(self.index_dir, name)) for name in self.meta["segments"]]
+        self.deleted = np.array(sorted(self.meta["deleted"]), dtype=np.int64)
+        self.id_to_file = {info["id"]: filename for filename, info in self.meta["docs"].items()}
+
+    def _save_meta(self):
+        tmp_path = self.meta_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.meta, f, ensure_ascii=False)
+        os.replace(tmp_path, self.meta_path)
+
+    def _read(self, filename):
+        return self.source.read(filename)
+
+    def _scan(self):
+        """Current transcripts as name -> (version, size) used to detect changes"""
+        if self.source.reader is not None:
+            reader = self.source.reader
+            return {name: (i, int(reader.index[i]["length"])) for name, i in reader.names()}
+
+        current = {}
+        for filename in os.listdir(self.text_dir):
+            if filename.endswith(".txt"):
+                stat = os.stat(os.path.join(self.text_dir, filename))
+                current[filename] = (stat.st_mtime, stat.st_size)
+        return current
+
+    def update(self):
+        """
+        Index new and changed transcripts and tombstone removed ones.
+
+        Returns:
+            int: Number of documents added to the index
+        """
+        docs = self.meta["docs"]
+        # Re-open the source so records appended to a packed corpus become visible
+        self.source.close()
+        self.source = TranscriptSource(self.text_dir)
+        current = self._scan()
+
+        deleted = set(self.meta["deleted"])
+        for filename in list(docs):
+            if filename not in current:
+                deleted.add(docs.pop(filename)["id"])
+
+        new_docs = []
+        for filename, (mtime, size) in sorted(current.items()):
+            info = docs.get(filename)
+            if info is not None and info["mtime"] == mtime and info["size"] == size:
+                continue
+            if info is not None:
+                deleted.add(info["id"])
+            doc_id = self.meta["next_id"]
+            self.meta["next_id"] += 1
+            docs[filename] = {"id": doc_id, "mtime": mtime, "size": size}
+            new_docs.append((doc_id, self._read(filename)))
+
+        if new_docs:
+            name = f"seg_{self.meta['next_segment']:06d}"
+            self.meta["next_segment"] += 1
+            Segment.write(os.path.join(self.index_dir, name), new_docs)
+            self.meta["segments"].append(name)
+
+        self.meta["deleted"] = sorted(deleted)
+        self._save_meta()
+        self._load_segments()
+
+        if len(self.segments) > self.max_segments:
+            self.compact()
+
+        return len(new_docs)
+
+    def compact(self):
+        """Rewrite all live documents into a single segment and drop tombstones"""
+        old_segments = self.segments
+        live = [(info["id"], self._read(filename)) for filename, info in self.meta["docs"].items()]
+        name = f"seg_{self.meta['next_segment']:06d}"
+        self.meta["next_segment"] += 1
+        Segment.write(os.path.join(self.index_dir, name), live)
+        self.meta["segments"] = [name]
+        self.meta["deleted"] = []
+        self._save_meta()
+        self._load_segments()
+        for segment in old_segments:
+            for path in segment.files():
+                os.remove(path)
+
+    def term_hits(self, term):
+        """(doc_ids, offsets) of every live occurrence of the term across segments"""
+        parts = [segment.term_hits(term) for segment in self.segments]
+        if not parts:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        doc_ids = np.concatenate([p[0] for p in parts])
+        offsets = np.concatenate([p[1] for p in parts])
+        live = ~np.isin(doc_ids, self.deleted)
+        return doc_ids[live], offsets[live]
+
+    def search(self, query, limit=20, context=20):
+        """
+        Run a boolean query and return matching files with snippets.
+
+        Syntax: terms are matched as exact phrases; adjacent terms are ANDed, ``OR``
+        separates alternatives and ``NOT`` excludes the following term, e.g.
+        ``减压阀 报警器``, ``减压阀 OR 报警器``, ``燃气表 NOT 保险``.
+
+        Args:
+            query (str): Query string
+            limit (int): Maximum number of files returned
+            context (int): Characters of context on each side of the snippet
+
+        Returns:
+            list: Dicts with file, offset, snippet and hits, ordered by hit count
+        """
+        all_docs = np.array(sorted(self.id_to_file), dtype=np.int64)
+        matched = np.zeros(0, dtype=np.int64)
+        first_hit = {}
+        hit_counts = defaultdict(int)
+
+        for clause in query.split(" OR "):
+            clause_docs = all_docs
+            negate = False
+            for token in clause.split():
+                if token == "AND":
+                    continue
+                if token == "NOT":
+                    negate = True
+                    continue
+                token = token.strip('"')
+                doc_ids, offsets = self.term_hits(token)
+                if negate:
+                    clause_docs = np.setdiff1d(clause_docs, doc_ids)
+                    negate = False
+                    continue
+                clause_docs = np.intersect1d(clause_docs, doc_ids)
+                # Remember the first positive hit per doc for the snippet
+                order = np.lexsort((offsets, doc_ids))
+                doc_ids, offsets = doc_ids[order], offsets[order]
+                unique_docs, starts, counts = np.unique(doc_ids, return_index=True, return_counts=True)
+                for doc_id, start, count in zip(unique_docs.tolist(), starts.tolist(), counts.tolist()):
+                    first_hit.setdefault(doc_id, (int(offsets[start]), len(token)))
+                    hit_counts[doc_id] += count
+            matched = np.union1d(matched, clause_docs)
+
+        ranked = sorted(matched.tolist(), key=lambda d: -hit_counts.get(d, 0))[:limit]
+        results = []
+        for doc_id in ranked:
+            filename = self.id_to_file[doc_id]
+            offset, length = first_hit.get(doc_id, (0, 0))
+            text = self._read(filename)
+            snippet = text[max(offset - context, 0):offset + length + context].replace("\n", " ")
+            results.append({"file": filename, "offset": offset, "snippet": snippet,
+                            "hits": hit_counts.get(doc_id, 0)})
+        return results
+
+
+def main():
+    """Command line entry point: update, query or watch the transcript index"""
+    parser = argparse.ArgumentParser(description="Full-text search over transcripts")
+    parser.add_argument("command", choices=["update", "query", "watch", "compact"])
+    parser.add_argument("query", nargs="?", help="Query for the query command")
+    parser.add_argument("--text-dir", default=os.environ.get("TEXT_DIR", "data/text"),
+                        help="Transcript directory or packed corpus")
+    parser.add_argument("--index-dir", default=os.environ.get("INDEX_DIR", "data/index"))
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--interval", type=float, default=10.0, help="Seconds between watch scans")
+    args = parser.parse_args()
+
+    index = TranscriptIndex(args.index_dir, args.text_dir)
+
+    if args.command == "update":
+        start_time = time.time()
+        added = index.update()
+        print(f"Indexed {added} new or changed transcripts in {time.time() - start_time:.2f} seconds")
+    elif args.command == "compact":
+        index.compact()
+        print(f"Compacted index into {len(index.segments)} segment")
+    elif args.command == "watch":
+        print(f"Watching {args.text_dir} every {args.interval:.0f}s")
+        while True:
+            added = index.update()
+            if added:
+                print(f"Indexed {added} new or changed transcripts")
+            time.sleep(args.interval)
+    else:
+        if not args.query:
+            parser.error("query command needs a query string")
+        start_time = time.time()
+        results = index.search(args.query, limit=args.limit)
+        elapsed_ms = (time.time() - start_time) * 1000
+        for result in results:
+            print(f"{result['file']}:{result['offset']} ({result['hits']} hits) ...{result['snippet']}...")
+        print(f"{len(results)} results in {elapsed_ms:.1f} ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
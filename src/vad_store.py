@@ -0,0 +1,306 @@
+import os
+import re
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+
+from result_sink import ProgressMeter
+from packed_corpus import recover_appended_files
+
+
+# Fixed-size index record per analyzed file: its slice of the segment array plus what
+# is needed to tell whether the audio changed since
+INDEX_DTYPE = np.dtype([
+    ("offset", "<u8"),
+    ("count", "<u4"),
+    ("duration_ms", "<i4"),
+    ("size", "<u8"),
+    ("mtime", "<f8"),
+])
+
+SEGMENTS_FILE = "segments.i32"
+INDEX_FILE = "files.idx"
+META_FILE = "files.meta.jsonl"
+
+# Recordings are named by their start time, e.g. 20250616151047480.aac
+DAY_RE = re.compile(r"^(\d{8})")
+
+
+class VADStoreWriter:
+    """
+    Appends per-file VAD segments to a segment store.
+
+    Segments go to one flat int32 file as (start_ms, end_ms) pairs, a fixed-size record to
+    the index and the path to a JSONL sidecar, in that order, so a record is visible only
+    once its segments are on disk. Re-analyzing a file appends a new record; the latest wins.
+    Opening a writer cuts the files back to the last committed record, like CorpusWriter.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        recover_appended_files(os.path.join(path, SEGMENTS_FILE), os.path.join(path, META_FILE),
+                               os.path.join(path, INDEX_FILE), INDEX_DTYPE,
+                               lambda record: (int(record["offset"]) + int(record["count"])) * 8)
+        self._segments = open(os.path.join(path, SEGMENTS_FILE), "ab")
+        self._meta = open(os.path.join(path, META_FILE), "a", encoding="utf-8")
+        self._index = open(os.path.join(path, INDEX_FILE), "ab")
+
+    def append(self, audio_path, segments, duration_ms, size=0, mtime=0.0):
+        """
+        Append the segments of one file.
+
+        Args:
+            audio_path (str): Audio file path
+            segments (list): [start_ms, end_ms] pairs from fsmn-vad
+            duration_ms (int): Audio duration in milliseconds
+            size (int): File size, for staleness checks
+            mtime (float): File modification time, for staleness checks
+        """
+        data = np.asarray(segments, dtype="<i4").reshape(-1, 2)
+        offset = self._segments.seek(0, os.SEEK_END) // 8
+        self._segments.write(data.tobytes())
+        self._segments.flush()
+        self._meta.write(json.dumps({"path": audio_path}, ensure_ascii=False) + "\n")
+        self._meta.flush()
+        record = np.array([(offset, len(data), duration_ms, size, mtime)], dtype=INDEX_DTYPE)
+        self._index.write(record.tobytes())
+        self._index.flush()
+
+    def close(self):
+        for f in (self._segments, self._meta, self._index):
+            f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class VADStore:
+    """
+    Read-only view of a segment store.
+
+    ``segments(path)`` returns an (n, 2) int32 array of [start_ms, end_ms] for later stages
+    that would otherwise run VAD again; ``arrays()`` gives the whole corpus as flat arrays
+    for vectorized statistics.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        n_segments = os.path.getsize(os.path.join(path, SEGMENTS_FILE)) // 8
+        self.data = (np.fromfile(os.path.join(path, SEGMENTS_FILE), dtype="<i4", count=n_segments * 2)
+                     .reshape(-1, 2))
+        # A torn trailing record (crash mid-write) is ignored
+        n_records = os.path.getsize(os.path.join(path, INDEX_FILE)) // INDEX_DTYPE.itemsize
+        self.index = np.fromfile(os.path.join(path, INDEX_FILE), dtype=INDEX_DTYPE, count=n_records)
+        with open(os.path.join(path, META_FILE), "r", encoding="utf-8") as f:
+            paths = [json.loads(line)["path"] for line in f if line.endswith("\n")]
+        # A crash between writes can leave the sidecar ahead of the index (until the next writer
+        # recovers the files); only committed records count
+        count = min(len(self.index), len(paths))
+        self.index = self.index[:count]
+        self._latest = {paths[i]: i for i in range(count)}
+
+    @staticmethod
+    def exists(path):
+        return os.path.isfile(os.path.join(path, INDEX_FILE))
+
+    def __len__(self):
+        return len(self._latest)
+
+    def __contains__(self, audio_path):
+        return audio_path in self._latest
+
+    def paths(self):
+        return list(self._latest)
+
+    def is_current(self, audio_path):
+        """Whether the stored record matches the file's current size and mtime"""
+        i = self._latest.get(audio_path)
+        if i is None:
+            return False
+        stat = os.stat(audio_path)
+        return int(self.index[i]["size"]) == stat.st_size and float(self.index[i]["mtime"]) == stat.st_mtime
+
+    def segments(self, audio_path):
+        """[start_ms, end_ms] rows of the latest record for a file, or None"""
+        i = self._latest.get(audio_path)
+        if i is None:
+            return None
+        offset, count = int(self.index[i]["offset"]), int(self.index[i]["count"])
+        return self.data[offset:offset + count]
+
+    def arrays(self, paths=None):
+        """
+        The latest record of every file (or of the given paths that are stored) as flat arrays.
+
+        Returns:
+            dict: paths (list), duration_ms (per file), file_id, start_ms, end_ms (per segment)
+        """
+        if paths is None:
+            paths = list(self._latest)
+        else:
+            paths = [path for path in paths if path in self._latest]
+        records = self.index[[self._latest[path] for path in paths]]
+        counts = records["count"].astype(np.int64)
+        # Gather every file's slice in one fancy-indexing step
+        starts = np.repeat(records["offset"].astype(np.int64), counts)
+        positions = starts + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        segments = self.data[positions]
+        return {
+            "paths": paths,
+            "duration_ms": records["duration_ms"].astype(np.int64),
+            "file_id": np.repeat(np.arange(len(records)), counts),
+            "start_ms": segments[:, 0].astype(np.int64),
+            "end_ms": segments[:, 1].astype(np.int64),
+        }
+
+
+_vad_model = None
+
+
+def _init_worker():
+    # One fsmn-vad model per worker process, reused for every file it analyzes
+    global _vad_model
+    from funasr import AutoModel
+    _vad_model = AutoModel(model="fsmn-vad")
+
+
+def _analyze(audio_path):
+    import librosa
+    stat = os.stat(audio_path)
+    try:
+        segments = _vad_model.generate(input=audio_path)[0]["value"]
+        duration_ms = int(librosa.get_duration(path=audio_path) * 1000)
+        return audio_path, segments, duration_ms, stat.st_size, stat.st_mtime, None
+    except Exception as e:
+        return audio_path, None, 0, stat.st_size, stat.st_mtime, f"Error: {e}"
+
+
+def scan_corpus(audio_files, store_path, workers=None, resume=True):
+    """
+    Run fsmn-vad over many files in a process pool and append the segments to a store.
+
+    Args:
+        audio_files (list): Audio file paths
+        store_path (str): Segment store directory
+        workers (int): Worker processes (default: CPU count)
+        resume (bool): Skip files whose stored record matches their size and mtime
+
+    Returns:
+        dict: Counts of analyzed, skipped and failed files
+    """
+    store = VADStore(store_path) if resume and VADStore.exists(store_path) else None
+    todo = [path for path in audio_files if store is None or not store.is_current(path)]
+    print(f"{len(audio_files)} audio files, {len(audio_files) - len(todo)} already in the store, {len(todo)} to analyze")
+
+    failed = 0
+    progress = ProgressMeter(len(todo), every=50)
+    with VADStoreWriter(store_path) as writer, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        futures = [executor.submit(_analyze, path) for path in todo]
+        for future in as_completed(futures):
+            audio_path, segments, duration_ms, size, mtime, error = future.result()
+            if error:
+                print(f"{audio_path}: {error}")
+                failed += 1
+            else:
+                writer.append(audio_path, segments, duration_ms, size, mtime)
+            progress.update()
+    return {"analyzed": len(todo) - failed, "skipped": len(audio_files) - len(todo), "failed": failed}
+
+
+def recording_day(audio_path):
+    """Recording day (YYYYMMDD) from a timestamp filename; "unknown" for other names"""
+    match = DAY_RE.match(os.path.basename(audio_path))
+    return match.group(1) if match else "unknown"
+
+
+def corpus_stats(store, paths=None, bins=10):
+    """
+    Aggregate voice-activity statistics over a store (or the given paths), vectorized over all segments at once.
+
+    Returns:
+        dict: Totals, speech-ratio histogram, segment and silence length percentiles and
+              histograms, and per-day totals (days parsed from YYYYMMDD... filenames)
+    """
+    arrays = store.arrays(paths)
+    file_id, start, end = arrays["file_id"], arrays["start_ms"], arrays["end_ms"]
+    duration = arrays["duration_ms"]
+    n_files = len(duration)
+    lengths = end - start
+    speech = np.bincount(file_id, weights=lengths, minlength=n_files)
+    ratio = np.divide(speech, duration, out=np.zeros(n_files), where=duration > 0).clip(0, 1)
+
+    # Silences: gaps between consecutive segments of the same file
+    same_file = file_id[1:] == file_id[:-1]
+    gaps = (start[1:] - end[:-1])[same_file]
+
+    ratio_counts, ratio_edges = np.histogram(ratio, bins=bins, range=(0, 1))
+    length_edges = np.array([0, 500, 1000, 2000, 5000, 10000, 30000, 60000, np.inf])
+    percentiles = [50, 90, 99]
+
+    days = np.array([recording_day(path) for path in arrays["paths"]], dtype=str)
+    day_names, day_id = np.unique(days, return_inverse=True)
+    day_speech = np.bincount(day_id, weights=speech, minlength=len(day_names)) / 1000
+    day_audio = np.bincount(day_id, weights=duration, minlength=len(day_names)) / 1000
+    day_files = np.bincount(day_id, minlength=len(day_names))
+
+    def distribution(values):
+        if not len(values):
+            return {"count": 0}
+        counts, _ = np.histogram(values, bins=length_edges)
+        return {
+            "count": int(len(values)),
+            "mean_s": round(float(values.mean()) / 1000, 3),
+            **{f"p{p}_s": round(float(v) / 1000, 3) for p, v in zip(percentiles, np.percentile(values, percentiles))},
+            "histogram_s": {f"<{edge / 1000:g}": int(c) for edge, c in zip(length_edges[1:], counts)},
+        }
+
+    return {
+        "files": n_files,
+        "audio_seconds": round(float(duration.sum()) / 1000, 2),
+        "speech_seconds": round(float(speech.sum()) / 1000, 2),
+        "speech_ratio": round(float(speech.sum() / max(duration.sum(), 1)), 4),
+        "speech_ratio_histogram": {f"{lo:.1f}-{hi:.1f}": int(c)
+                                   for lo, hi, c in zip(ratio_edges[:-1], ratio_edges[1:], ratio_counts)},
+        "segments": distribution(lengths),
+        "silences": distribution(gaps),
+        "days": {
+            str(day): {"files": int(n), "audio_seconds": round(float(a), 2), "speech_seconds": round(float(s), 2)}
+            for day, n, a, s in zip(day_names, day_files, day_audio, day_speech)
+        },
+    }
+
+
+def print_stats(stats):
+    print(f"{stats['files']} files, {stats['audio_seconds'] / 3600:.2f} h audio, "
+          f"{stats['speech_seconds'] / 3600:.2f} h speech ({stats['speech_ratio']:.1%})")
+    print("Speech ratio per file:")
+    for bucket, count in stats["speech_ratio_histogram"].items():
+        print(f"  {bucket}  {count:6d}")
+    for kind in ("segments", "silences"):
+        values = stats[kind]
+        if values["count"]:
+            print(f"{kind.capitalize()}: {values['count']}, median {values['p50_s']:.2f}s, "
+                  f"p90 {values['p90_s']:.2f}s, p99 {values['p99_s']:.2f}s")
+    print("Per day:")
+    for day, values in stats["days"].items():
+        print(f"  {day}  {values['files']:5d} files  {values['speech_seconds'] / 60:8.1f} min speech "
+              f"of {values['audio_seconds'] / 60:8.1f} min")
+
+
+if __name__ == "__main__":
+    # Scan AUDIOS_PATH into VAD_STORE (default data/vad) and print corpus statistics
+    start_time = time.time()
+    store_path = os.environ.get("VAD_STORE", "data/vad")
+    files = []
+    for root, dirs, names in os.walk(os.environ.get("AUDIOS_PATH", "/Users/william/Work/VoiceData/data")):
+        files.extend(os.path.join(root, name) for name in names
+                     if name.lower().endswith(('.wav', '.mp3', '.aac', '.flac', '.m4a', '.ogg')))
+    result = scan_corpus(sorted(files), store_path, workers=int(os.environ.get("VAD_WORKERS", "0")) or None)
+    print(f"VAD: {result} in {time.time() - start_time:.2f} seconds")
+    print_stats(corpus_stats(VADStore(store_path)))
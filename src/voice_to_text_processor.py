@@ -1,13 +1,23 @@
-from funasr import AutoModel
-from funasr.utils.postprocess_utils import rich_transcription_postprocess
+import librosa
 import os
 import time
 import csv
+import socket
 from datetime import datetime
 
+from text_normalizer import normalize_text
+from packed_corpus import CorpusWriter
+from segment_output import (SAMPLE_RATE, merge_segments, merge_vad_spans, transcribe_segments, segments_path,
+                            write_segments, joined_text)
+from event_mask import mask_segments
+from vad_store import VADStore
+from profiling import stage, TIMERS, profile_from_env, write_reports
+
 
 def load_models():
     """Load FunASR models once and return them"""
+    from funasr import AutoModel
+
     print("Loading transcription model...")
     transcript_model = AutoModel(
         model="iic/SenseVoiceSmall",
@@ -32,44 +42,104 @@ def get_audio_files(audios_path):
     return audio_files
 
 
-def process_audio_file(audio_path, filename, transcript_model, vad_model, output_dir, logs_dir):
-    """Process a single audio file"""
+def process_audio_file(audio_path, filename, transcript_model, vad_model, output_dir, logs_dir,
+                       normalize=False, corpus=None, segments_dir=None, mask_events=False, vad_store=None,
+                       postprocess=None):
+    """
+    Process a single audio file, optionally normalizing the transcript before saving.
+
+    When a CorpusWriter is given the transcript is also appended to the packed corpus.
+    When segments_dir is given, ASR runs once per VAD span (the spans generate(merge_vad=True)
+    would use, taken from the VAD result above rather than a second VAD pass) and a
+    <name>.segments.jsonl file with timings, tags and text is written next to the flat
+    transcript, which is assembled from the same raw output as the whole-file path.
+    When mask_events is set, VAD segments that are mostly barking or noise are dropped or
+    trimmed (event_mask.mask_segments) and ASR runs only on what is left.
+    When a VADStore holds up-to-date segments for the file, they are used instead of running VAD.
+    postprocess turns raw SenseVoice output into text and defaults to FunASR's
+    rich_transcription_postprocess; FunASR is only imported when it is needed.
+
+    Returns:
+        dict: {"file", "voice_length", "transcript_path", "elapsed_time", "masked_seconds"};
+              transcript_path is None and elapsed_time -1 when the file is skipped for too
+              little voice activity
+    """
+    if postprocess is None:
+        from funasr.utils.postprocess_utils import rich_transcription_postprocess as postprocess
     timestamp = datetime.now().strftime("%Y%m%d_%H%M")
     log_path = os.path.join(logs_dir, f"process_times_{timestamp}.csv")
 
     # Check voice activity duration
-    voice_length = vad_model.generate(input=audio_path)
-    voice_length = voice_length[0]["value"]
-    voice_length = sum(v[1] - v[0] for v in voice_length) / 1000
+    if vad_store is not None and vad_store.is_current(audio_path):
+        vad_segments = vad_store.segments(audio_path).tolist()
+    else:
+        with stage("vad"):
+            vad_segments = vad_model.generate(input=audio_path)[0]["value"]
+    voice_length = sum(v[1] - v[0] for v in vad_segments) / 1000
     print("voice_length:", voice_length, 's')
 
     if voice_length < 10:
         print(f"Skipping {audio_path} - voice length too short")
         log_processing_time(log_path, filename, voice_length, -1)
-        return None
+        return {"file": filename, "voice_length": voice_length, "transcript_path": None, "elapsed_time": -1,
+                "masked_seconds": 0.0}
 
     start_time = time.time()
     print(f"Processing: {audio_path}")
 
     # Generate transcription
-    res = transcript_model.generate(
-        input=audio_path,
-        cache={},
-        language="auto",
-        use_itn=True,
-        batch_size_s=60,
-        merge_vad=True,
-        merge_length_s=15,
-        ban_emo_unk=False,
-    )
-    text = rich_transcription_postprocess(res[0]["text"])
+    masked_seconds = 0.0
+    if segments_dir is not None or mask_events:
+        with stage("load"):
+            waveform, _ = librosa.load(audio_path, sr=SAMPLE_RATE)
+        if mask_events:
+            with stage("mask"):
+                vad_segments, mask_stats = mask_segments(waveform, vad_segments, sr=SAMPLE_RATE)
+            masked_seconds = mask_stats["seconds_saved"]
+            print(f"Event masking: dropped {mask_stats['dropped']}, trimmed {mask_stats['trimmed']} segments, "
+                  f"saved {masked_seconds:.1f}s of {mask_stats['seconds_before']:.1f}s")
+        # Masked audio must stay out of the spans, so only then are silences not bridged
+        spans = merge_segments(vad_segments) if mask_events else merge_vad_spans(vad_segments)
+        with stage("asr"):
+            segments = transcribe_segments(waveform, spans, transcript_model, postprocess)
+        if segments_dir is not None:
+            write_segments(segments_path(segments_dir, audio_path), segments)
+        text = joined_text(segments, postprocess)
+    else:
+        with stage("asr"):
+            res = transcript_model.generate(
+                input=audio_path,
+                cache={},
+                language="auto",
+                use_itn=True,
+                batch_size_s=60,
+                merge_vad=True,
+                merge_length_s=15,
+                ban_emo_unk=False,
+            )
+        text = postprocess(res[0]["text"])
+    if normalize:
+        with stage("normalize"):
+            text, stats = normalize_text(text)
+        print(f"Normalization saved {stats['chars_before'] - stats['chars_after']} chars, "
+              f"{stats['tokens_before'] - stats['tokens_after']} tokens")
 
     # Save transcription
     base_filename = os.path.splitext(os.path.basename(audio_path))[0]
     output_file_path = os.path.join(output_dir, f"{base_filename}.txt")
 
-    with open(output_file_path, 'w', encoding='utf-8') as f:
-        f.write(text)
+    # Write to a temporary file and rename it, so readers of a shared OUTPUT_DIR never see
+    # a half-written transcript (not even when a node dies or two nodes write the same file)
+    with stage("save"):
+        tmp_path = f"{output_file_path}.{socket.gethostname()}-{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(text)
+            os.replace(tmp_path, output_file_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
 
     # Calculate processing time
     elapsed_time = time.time() - start_time
@@ -77,7 +147,17 @@ def process_audio_file(audio_path, filename, transcript_model, vad_model, output
     print(f"Processing time: {elapsed_time:.2f} seconds")
     log_processing_time(log_path, filename, voice_length, elapsed_time)
 
-    return elapsed_time
+    if corpus is not None:
+        corpus.append(f"{base_filename}.txt", text, source_audio=audio_path, voice_length=voice_length,
+                      elapsed_time=elapsed_time)
+
+    return {
+        "file": filename,
+        "voice_length": voice_length,
+        "transcript_path": output_file_path,
+        "elapsed_time": elapsed_time,
+        "masked_seconds": masked_seconds,
+    }
 
 
 def log_processing_time(log_path, filename, voice_length, elapsed_time):
@@ -93,10 +173,19 @@ def main():
     audios_path = os.environ.get("AUDIOS_PATH", "/Users/william/Work/VoiceData/data")
     output_dir = os.environ.get("OUTPUT_DIR", "/Users/william/Work/VoiceData/data/text")
     logs_dir = os.environ.get("LOGS_DIR", "./logs")
+    normalize = os.environ.get("NORMALIZE_TRANSCRIPTS", "0") == "1"
+    corpus_path = os.environ.get("CORPUS_PATH")
+    segments_dir = os.environ.get("SEGMENTS_DIR")
+    mask_events = os.environ.get("MASK_EVENTS", "0") == "1"
+    vad_store_path = os.environ.get("VAD_STORE")
+    vad_store = VADStore(vad_store_path) if vad_store_path and VADStore.exists(vad_store_path) else None
+    profiling = profile_from_env()
 
     # Create output directories
     os.makedirs(output_dir, exist_ok=True)
     os.makedirs(logs_dir, exist_ok=True)
+    if segments_dir:
+        os.makedirs(segments_dir, exist_ok=True)
 
     # Load models once
     print("Loading models...")
@@ -109,15 +198,31 @@ def main():
     audio_files = get_audio_files(audios_path)
     print(f"Found {len(audio_files)} audio files to process")
 
+    # Optionally append every transcript to a packed corpus as well
+    corpus = CorpusWriter(corpus_path) if corpus_path else None
+
     # Process each audio file
     count = 0
+    masked_seconds = 0.0
 
     for audio_path in audio_files:
         count += 1
         filename = os.path.basename(audio_path)
         print(f"Processing file {count}: {filename}")
         print(audio_path)
-        process_audio_file(audio_path, filename, transcript_model, vad_model, output_dir, logs_dir)
+        record = process_audio_file(audio_path, filename, transcript_model, vad_model, output_dir, logs_dir,
+                                    normalize=normalize, corpus=corpus, segments_dir=segments_dir,
+                                    mask_events=mask_events, vad_store=vad_store)
+        masked_seconds += record["masked_seconds"]
+
+    if corpus is not None:
+        corpus.close()
+    print("Stage timings:")
+    TIMERS.report()
+    if mask_events:
+        print(f"Event masking kept {masked_seconds:.1f} seconds of non-speech audio away from ASR")
+    if profiling:
+        print(f"Profiles written to {os.environ['PROFILE_DIR']} ({len(write_reports())} files)")
 
 
 if __name__ == "__main__":
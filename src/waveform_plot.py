@@ -0,0 +1,208 @@
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import librosa
+import librosa.display
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from spectral_features import SpectralFeatures
+from bark_events import detect_bark_events
+
+
+# Horizontal resolution of rendered plots; nothing is drawn at finer detail than one pixel column
+DEFAULT_WIDTH = 1600
+DPI = 100
+
+
+def _pool(values, factor, reduce, axis=-1):
+    """Reduce consecutive blocks of ``factor`` elements along axis, keeping a partial last block"""
+    values = np.moveaxis(np.asarray(values), axis, -1)
+    n = values.shape[-1]
+    n_full = n // factor
+    head = reduce(values[..., :n_full * factor].reshape(values.shape[:-1] + (n_full, factor)), axis=-1)
+    if n_full * factor < n:
+        head = np.concatenate([head, reduce(values[..., n_full * factor:], axis=-1)[..., None]], axis=-1)
+    return np.moveaxis(head, -1, axis)
+
+
+def waveform_envelope(y, sr, width=DEFAULT_WIDTH):
+    """
+    Per-pixel-column min/max envelope of a waveform.
+
+    Args:
+        y (np.ndarray): Audio samples
+        sr (int): Sample rate
+        width (int): Number of pixel columns
+
+    Returns:
+        tuple: (times, mins, maxs), at most ``width`` points each
+    """
+    factor = max(1, int(np.ceil(len(y) / width)))
+    mins = _pool(y, factor, np.min)
+    maxs = _pool(y, factor, np.max)
+    times = np.arange(len(mins)) * factor / sr
+    return times, mins, maxs
+
+
+def decimate_series(values, frame_s, width=DEFAULT_WIDTH):
+    """
+    Max-pool a per-frame series down to at most ``width`` points, so short peaks stay visible.
+
+    Returns:
+        tuple: (times, values)
+    """
+    factor = max(1, int(np.ceil(len(values) / width)))
+    pooled = _pool(values, factor, np.max)
+    return np.arange(len(pooled)) * factor * frame_s, pooled
+
+
+def reduced_spectrogram(spectral, width=DEFAULT_WIDTH, max_rows=512):
+    """
+    Reuse the cached STFT magnitude at display resolution.
+
+    Time frames are max-pooled to at most ``width`` columns and frequency bins to at most
+    ``max_rows`` rows before the dB conversion. Max-pooling keeps the global peak, so the
+    result equals pooling the full-resolution dB spectrogram, without materializing it
+    or computing a new STFT.
+
+    Returns:
+        tuple: (S_db, frame times in seconds, bin frequencies in Hz)
+    """
+    S = spectral.magnitude
+    col_factor = max(1, int(np.ceil(S.shape[1] / width)))
+    row_factor = max(1, int(np.ceil(S.shape[0] / max_rows)))
+    S = _pool(_pool(S, col_factor, np.max, axis=1), row_factor, np.max, axis=0)
+    S = librosa.amplitude_to_db(S, ref=np.max)
+    times = np.arange(S.shape[1]) * col_factor * spectral.hop_length / spectral.sr
+    frequencies = spectral.frequencies[::row_factor][:S.shape[0]]
+    return S, times, frequencies
+
+
+def new_figure(rows, height, width=DEFAULT_WIDTH, headless=True):
+    """
+    Create a figure with ``rows`` stacked axes.
+
+    Headless figures are bound directly to the Agg canvas, so rendering never touches
+    pyplot or a GUI backend and works in worker processes.
+
+    Returns:
+        tuple: (figure, axes)
+    """
+    figsize = (width / DPI, height)
+    if headless:
+        fig = Figure(figsize=figsize, dpi=DPI)
+        FigureCanvasAgg(fig)
+        axes = fig.subplots(rows, 1)
+    else:
+        import matplotlib.pyplot as plt
+        fig, axes = plt.subplots(rows, 1, figsize=figsize, dpi=DPI)
+    return fig, np.atleast_1d(axes)
+
+
+def plot_envelope(ax, y, sr, width=DEFAULT_WIDTH, **kwargs):
+    times, mins, maxs = waveform_envelope(y, sr, width)
+    ax.fill_between(times, mins, maxs, linewidth=0, **kwargs)
+    ax.set_xlim(0, len(y) / sr)
+
+
+def plot_spectrogram(ax, spectral, width=DEFAULT_WIDTH):
+    S, times, frequencies = reduced_spectrogram(spectral, width)
+    librosa.display.specshow(S, x_coords=times, y_coords=frequencies, x_axis='time', y_axis='log', ax=ax)
+
+
+def finish_figure(fig, output_path=None):
+    """Save to PNG and release the figure, or show it interactively when no path is given"""
+    fig.tight_layout()
+    if output_path is None:
+        import matplotlib.pyplot as plt
+        plt.show()
+        return
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    fig.savefig(output_path, dpi=DPI)
+    fig.clear()
+
+
+def render_file(audio_path, output_path, width=DEFAULT_WIDTH):
+    """
+    Render the bark overview of one recording to PNG: waveform envelope with bark events,
+    spectrogram and bark-band energy ratio, all from one STFT.
+
+    Returns:
+        int: Number of bark events drawn
+    """
+    y, sr = librosa.load(audio_path, sr=None)
+    spectral = SpectralFeatures(y, sr)
+    bark_ratio = spectral.band_energy_ratio(200, 2000)
+    rms = spectral.rms
+    events, _ = detect_bark_events(rms, bark_ratio, sr, spectral.hop_length,
+                                   amp_on=0.2 * np.max(rms), amp_off=0.1 * np.max(rms))
+
+    fig, axes = new_figure(3, 8, width)
+    plot_envelope(axes[0], y, sr, width, color='b', alpha=0.7)
+    for event in events:
+        axes[0].axvspan(event['onset'], event['offset'], color='red', alpha=0.3)
+    axes[0].set_title(f"{os.path.basename(audio_path)} - {len(events)} bark events")
+    axes[0].set_ylabel('Amplitude')
+
+    plot_spectrogram(axes[1], spectral, width)
+    axes[1].set_title('Spectrogram')
+
+    times, ratio = decimate_series(bark_ratio, spectral.hop_length / sr, width)
+    axes[2].plot(times, ratio, 'g-')
+    axes[2].axhline(y=0.3, color='r', linestyle='--', alpha=0.7)
+    axes[2].set_xlim(0, len(y) / sr)
+    axes[2].set_title('Bark Frequency Ratio Over Time')
+    axes[2].set_xlabel('Time (s)')
+
+    finish_figure(fig, output_path)
+    return len(events)
+
+
+def _render_task(audio_path, output_path):
+    try:
+        return audio_path, render_file(audio_path, output_path), None
+    except Exception as e:
+        return audio_path, None, f"Error: {e}"
+
+
+def render_directory(audio_files, plot_dir, workers=None):
+    """
+    Render PNGs for many recordings in a process pool, skipping ones already newer than their audio.
+
+    Returns:
+        dict: audio path -> number of events, or an "Error: ..." string
+    """
+    todo = []
+    for audio_path in audio_files:
+        output_path = os.path.join(plot_dir, os.path.splitext(os.path.basename(audio_path))[0] + ".png")
+        if os.path.exists(output_path) and os.path.getmtime(output_path) >= os.path.getmtime(audio_path):
+            continue
+        todo.append((audio_path, output_path))
+    print(f"Rendering {len(todo)} of {len(audio_files)} recordings to {plot_dir}")
+
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_render_task, audio_path, output_path) for audio_path, output_path in todo]
+        for future in as_completed(futures):
+            audio_path, events, error = future.result()
+            results[audio_path] = error or events
+            if error:
+                print(f"{audio_path}: {error}")
+    return results
+
+
+if __name__ == "__main__":
+    # Batch render: python src/waveform_plot.py [audio files...], or every file below AUDIOS_PATH
+    start_time = time.time()
+    files = sys.argv[1:]
+    if not files:
+        for root, dirs, names in os.walk(os.environ.get("AUDIOS_PATH", "/Users/william/Work/VoiceData/data")):
+            files.extend(os.path.join(root, name) for name in names
+                         if name.lower().endswith(('.wav', '.mp3', '.aac', '.flac', '.m4a', '.ogg')))
+        files.sort()
+    results = render_directory(files, os.environ.get("PLOT_DIR", "data/plots"),
+                               workers=int(os.environ.get("PLOT_WORKERS", "0")) or None)
+    print(f"Rendered {len(results)} plots in {time.time() - start_time:.2f} seconds")
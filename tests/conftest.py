@@ -0,0 +1,10 @@
+import os
+import sys
+
+# Modules in src/ import each other as top-level modules (python src/x.py)
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+# Demo scripts import their sibling modules the same way (python demos/x.py)
+DEMOS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "demos")
+sys.path.insert(1, DEMOS_DIR)
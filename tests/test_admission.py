@@ -0,0 +1,145 @@
+import time
+import threading
+from contextlib import ExitStack
+
+import pytest
+
+from admission import AdmissionController, audio_duration
+
+
+class FakeRSS:
+    """Settable RSS reading in MB"""
+
+    def __init__(self, mb):
+        self.mb = mb
+
+    def __call__(self):
+        return self.mb
+
+
+@pytest.fixture
+def make_controller():
+    controllers = []
+
+    def make(budget_mb=1000, max_concurrency=3, rss=None, **kwargs):
+        # No sampling in the background: tests drive the monitor with sample()
+        controller = AdmissionController(budget_mb, max_concurrency, interval=3600, rss_fn=rss or FakeRSS(0),
+                                         **kwargs)
+        controllers.append(controller)
+        return controller
+
+    yield make
+    for controller in controllers:
+        controller.close()
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline
+        time.sleep(0.01)
+
+
+def test_slow_start_then_shrink_and_recover(make_controller):
+    rss = FakeRSS(100)
+    controller = make_controller(budget_mb=1000, max_concurrency=3, rss=rss, recover_samples=2)
+    assert controller.stats()["limit"] == 1
+
+    # RSS stays below low_water: one more slot every recover_samples samples, up to the maximum
+    for _ in range(6):
+        controller.sample()
+    assert controller.stats()["limit"] == 3
+
+    with ExitStack() as jobs:
+        for _ in range(3):
+            jobs.enter_context(controller.admit(10))
+        assert controller.stats()["running"] == 3
+
+        rss.mb = 950
+        controller.sample()
+        assert controller.stats()["limit"] == 2
+        controller.sample()
+        assert controller.stats()["limit"] == 1
+
+    # Between the water marks the limit holds; below low_water it recovers
+    rss.mb = 800
+    for _ in range(4):
+        controller.sample()
+    assert controller.stats()["limit"] == 1
+    rss.mb = 100
+    controller.sample()
+    assert controller.stats()["limit"] == 1
+    controller.sample()
+    assert controller.stats()["limit"] == 2
+
+
+def test_over_budget_job_runs_alone(make_controller):
+    controller = make_controller(budget_mb=1000, max_concurrency=3)
+    for _ in range(8):
+        controller.sample()
+    order = []
+
+    def small_job():
+        with controller.admit(10):
+            order.append("small")
+
+    with controller.admit(5000):
+        order.append("big")
+        thread = threading.Thread(target=small_job)
+        thread.start()
+        wait_for(lambda: controller.stats()["waiting"] == 1)
+        order.append("big done")
+    thread.join()
+    assert order == ["big", "big done", "small"]
+
+
+def test_small_jobs_overtake_a_large_one_at_most_max_bypass_times(make_controller):
+    controller = make_controller(budget_mb=1000, max_concurrency=3, max_bypass=2)
+    for _ in range(8):
+        controller.sample()
+    order = []
+
+    def job(name, estimate):
+        with controller.admit(estimate):
+            order.append(name)
+
+    with controller.admit(600):
+        large = threading.Thread(target=job, args=("large", 600))
+        large.start()
+        wait_for(lambda: controller.stats()["waiting"] == 1)
+
+        # The large job does not fit next to the running one; small ones may pass it twice
+        for name in ("small 1", "small 2"):
+            small = threading.Thread(target=job, args=(name, 10))
+            small.start()
+            small.join()
+        starved = threading.Thread(target=job, args=("small 3", 10))
+        starved.start()
+        wait_for(lambda: controller.stats()["waiting"] == 2)
+        assert order == ["small 1", "small 2"]
+    large.join()
+    starved.join()
+    assert order == ["small 1", "small 2", "large", "small 3"]
+
+
+def test_scale_learns_from_rss_growth_of_a_job_that_ran_alone(make_controller):
+    rss = FakeRSS(100)
+    controller = make_controller(budget_mb=10000, rss=rss)
+    with controller.admit(100):
+        rss.mb = 300
+        controller.sample()
+    # Growing RSS by twice the estimate raises the scale at once
+    assert controller.stats()["scale"] == 2.0
+
+
+def test_audio_duration_is_read_rather_than_estimated(tmp_path):
+    np = pytest.importorskip("numpy")
+    sf = pytest.importorskip("soundfile")
+    path = str(tmp_path / "call.wav")
+    sf.write(path, np.zeros(16000 * 3, dtype="float32"), 16000)
+    assert audio_duration(path) == pytest.approx(3.0)
+
+    # Unreadable files fall back to the size estimate
+    broken = tmp_path / "broken.m4a"
+    broken.write_bytes(b"\0" * 8000)
+    assert audio_duration(str(broken)) == pytest.approx(1.0)
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+librosa = pytest.importorskip("librosa")
+sf = pytest.importorskip("soundfile")
+
+from bark_classifier import BarkClassifier, FRAME_FEATURES, analyze_recording, classify_recordings, frame_labels
+
+
+def blobs(n=200, seed=0):
+    """Two linearly separable Gaussian blobs in 5 dimensions, one class four times rarer"""
+    rng = np.random.default_rng(seed)
+    y = (rng.random(n) < 0.2).astype(np.float32)
+    X = rng.standard_normal((n, 5)) + 3 * y[:, None] * np.array([1, -1, 0, 0, 0])
+    return X * [1, 10, 100, 1, 1], y
+
+
+@pytest.mark.parametrize("hidden", [0, 8])
+def test_fits_separable_data(hidden):
+    X, y = blobs()
+    model = BarkClassifier(hidden=hidden).fit(X, y)
+    assert np.mean(model.predict(X) == y.astype(bool)) >= 0.97
+
+    X_test, y_test = blobs(seed=1)
+    assert np.mean(model.predict(X_test) == y_test.astype(bool)) >= 0.95
+
+
+def test_mlp_learns_what_logistic_regression_cannot():
+    rng = np.random.default_rng(0)
+    X = rng.uniform(-1, 1, (400, 2))
+    y = ((X[:, 0] > 0) != (X[:, 1] > 0)).astype(np.float32)
+    assert np.mean(BarkClassifier(hidden=0).fit(X, y).predict(X) == y) < 0.7
+    assert np.mean(BarkClassifier(hidden=16).fit(X, y, epochs=1000, learning_rate=0.05).predict(X) == y) > 0.9
+
+
+@pytest.mark.parametrize("hidden", [0, 8])
+def test_save_load_round_trip(tmp_path, hidden):
+    X, y = blobs()
+    model = BarkClassifier(hidden=hidden, l2=0.01).fit(X, y, epochs=50)
+    path = str(tmp_path / "model.npz")
+    model.save(path)
+
+    loaded = BarkClassifier.load(path)
+    assert (loaded.hidden, loaded.l2) == (hidden, 0.01)
+    np.testing.assert_array_equal(loaded.predict_proba(X), model.predict_proba(X))
+
+
+def test_frame_labels_from_events():
+    assert frame_labels({"label": 0}, 4, 0.1).tolist() == [0, 0, 0, 0]
+    assert frame_labels({"label": 1}, 4, 0.1) is None
+    assert frame_labels({"label": 1, "events": [[0.1, 0.25]]}, 5, 0.1).tolist() == [0, 1, 1, 0, 0]
+
+
+def test_batched_inference_matches_file_by_file(tmp_path):
+    sr = 16000
+    rng = np.random.default_rng(0)
+    t = np.arange(sr) / sr
+    paths = []
+    for i, tone_hz in enumerate([300, 900, 1500]):
+        y = 0.05 * rng.standard_normal(2 * sr)
+        y[sr // 2:sr // 2 + sr] += 0.5 * np.sin(2 * np.pi * tone_hz * t)
+        paths.append(str(tmp_path / f"clip{i}.wav"))
+        sf.write(paths[-1], y.astype(np.float32), sr)
+
+    # Models fitted on arbitrary features of the right width: only the batching is under test
+    frame_X = rng.random((400, len(FRAME_FEATURES)))
+    frame_model = BarkClassifier().fit(frame_X, frame_X[:, FRAME_FEATURES.index("bark_band_ratio")] > 0.5)
+    n_file_features = len(analyze_recording(paths[0])["file"])
+    file_model = BarkClassifier().fit(rng.standard_normal((20, n_file_features)), np.arange(20) % 2)
+
+    batched = classify_recordings(paths, file_model=file_model, frame_model=frame_model)
+    assert any(result["events"] for result in batched.values())
+    for path in paths:
+        single = classify_recordings([path], file_model=file_model, frame_model=frame_model)[path]
+        assert single["events"] == batched[path]["events"]
+        assert single["probability"] == pytest.approx(batched[path]["probability"], abs=1e-4)
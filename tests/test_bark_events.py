@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from bark_events import detect_bark_events, hysteresis_mask, mask_to_events
+
+SR = 1000
+HOP = 10  # 10 ms frames
+
+
+def frames(n, spans):
+    """Per-frame rms and bark ratio: quiet broadband everywhere except the given spans"""
+    rms = np.full(n, 0.01)
+    ratio = np.full(n, 0.05)
+    for start, end, level, bark_ratio in spans:
+        rms[start:end] = level
+        ratio[start:end] = bark_ratio
+    return rms, ratio
+
+
+def detect(rms, ratio, **kwargs):
+    # Thresholds as used by simple_bark_detection and the waveform plot
+    return detect_bark_events(rms, ratio, SR, HOP, amp_on=0.2 * rms.max(), amp_off=0.1 * rms.max(), **kwargs)
+
+
+def test_onset_and_offset_follow_hysteresis():
+    rms, ratio = frames(100, [
+        (20, 25, 0.15, 0.2),   # lead-in above the low thresholds only
+        (25, 40, 1.0, 0.6),    # bark
+        (40, 50, 0.15, 0.2),   # decay above the low thresholds
+        (70, 80, 0.15, 0.2),   # never passes the high thresholds on its own
+    ])
+    events, active = detect(rms, ratio)
+    assert [(e["onset"], e["offset"]) for e in events] == [(0.2, 0.5)]
+    assert active.sum() == 30
+    assert 0 < events[0]["confidence"] <= 1
+
+
+def test_loud_broadband_frames_are_not_barks():
+    rms, ratio = frames(100, [(20, 40, 1.0, 0.05), (60, 70, 0.5, 0.6)])
+    events, _ = detect(rms, ratio)
+    assert [(e["onset"], e["offset"]) for e in events] == [(0.6, 0.7)]
+
+
+def test_events_shorter_than_min_duration_are_dropped():
+    rms, ratio = frames(100, [(10, 14, 1.0, 0.6), (50, 60, 1.0, 0.6)])
+    events, _ = detect(rms, ratio, min_duration_s=0.05)
+    assert [(e["onset"], e["offset"]) for e in events] == [(0.5, 0.6)]
+    events, _ = detect(rms, ratio, min_duration_s=0.04)
+    assert len(events) == 2
+
+
+def test_events_separated_by_short_gaps_are_merged():
+    rms, ratio = frames(200, [(10, 20, 1.0, 0.6), (40, 50, 1.0, 0.6), (100, 110, 1.0, 0.6)])
+    events, _ = detect(rms, ratio, min_gap_s=0.25)
+    assert [(e["onset"], e["offset"]) for e in events] == [(0.1, 0.5), (1.0, 1.1)]
+    events, _ = detect(rms, ratio, min_gap_s=0.1)
+    assert [(e["onset"], e["offset"]) for e in events] == [(0.1, 0.2), (0.4, 0.5), (1.0, 1.1)]
+
+
+def test_confidence_grows_with_loudness_and_bark_ratio():
+    rms, ratio = frames(100, [(10, 20, 1.0, 0.9), (50, 60, 0.4, 0.4)])
+    events, _ = detect(rms, ratio)
+    assert events[0]["confidence"] == pytest.approx(0.95)
+    assert events[1]["confidence"] == pytest.approx(0.5 * 0.4 + 0.5 * 0.4)
+
+
+def test_mask_helpers():
+    on = np.array([0, 0, 1, 0, 0, 0, 0, 0], dtype=bool)
+    hold = np.array([0, 1, 1, 1, 0, 1, 1, 0], dtype=bool)
+    assert hysteresis_mask(on, hold).tolist() == [False, True, True, True, False, False, False, False]
+
+    active = np.array([1, 1, 0, 1, 0, 0, 0, 1], dtype=bool)
+    assert mask_to_events(active) == [(0, 2), (3, 4), (7, 8)]
+    assert mask_to_events(active, min_gap_frames=1) == [(0, 4), (7, 8)]
+    assert mask_to_events(active, min_gap_frames=1, min_frames=2) == [(0, 4)]
@@ -0,0 +1,66 @@
+import csv
+import json
+
+import numpy as np
+import pytest
+
+pytest.importorskip("librosa")
+sf = pytest.importorskip("soundfile")
+pytest.importorskip("matplotlib")
+
+from bark_scan import journal_path, scan_directory
+
+
+def write_recordings(directory):
+    sr = 16000
+    rng = np.random.default_rng(0)
+    t = np.arange(sr // 5) / sr
+    for i in range(3):
+        y = 0.02 * rng.standard_normal(2 * sr)
+        # Bark-like bursts: short, loud, in the 200-2000 Hz band
+        for start in range(i):
+            y[start * sr // 2:start * sr // 2 + len(t)] += 0.8 * np.sin(2 * np.pi * 800 * t)
+        sf.write(str(directory / f"clip{i}.wav"), y.astype(np.float32), sr)
+    (directory / "broken.wav").write_bytes(b"not audio")
+
+
+def read_table(path):
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return {row["file"]: row for row in csv.DictReader(f)}
+
+
+def test_scan_writes_rows_as_they_finish_and_resumes(tmp_path):
+    audio = tmp_path / "audio"
+    audio.mkdir()
+    write_recordings(audio)
+    results_path = str(tmp_path / "results" / "bark_scan.csv")
+
+    rows = scan_directory(str(audio), results_path, workers=1)
+    assert len(rows) == 4
+    with open(journal_path(results_path), "r", encoding="utf-8") as f:
+        journal = [json.loads(line) for line in f]
+    assert len(journal) == 4
+    table = read_table(results_path)
+    assert len(table) == 4
+    assert table[str(audio / "broken.wav")]["error"].startswith("Error")
+    assert int(table[str(audio / "clip2.wav")]["bark_score"]) >= int(table[str(audio / "clip0.wav")]["bark_score"])
+
+    # Interrupted after two files: the table was never written and the journal ends in a torn line
+    done = {str(audio / "clip0.wav"), str(audio / "clip1.wav")}
+    with open(journal_path(results_path), "w", encoding="utf-8") as f:
+        f.writelines(json.dumps(record) + "\n" for record in journal if record["file"] in done)
+        f.write('{"file": "torn')
+    (tmp_path / "results" / "bark_scan.csv").unlink()
+
+    rows = scan_directory(str(audio), results_path, workers=1)
+    assert sorted(row["file"] for row in rows) == [str(audio / "broken.wav"), str(audio / "clip2.wav")]
+    assert len(read_table(results_path)) == 4
+
+    # Failed files are retried on resume, finished ones are not
+    rows = scan_directory(str(audio), results_path, workers=1)
+    assert [row["file"] for row in rows] == [str(audio / "broken.wav")]
+
+    # Without resume everything is rescanned and the table holds only this run
+    rows = scan_directory(str(audio), results_path, workers=1, resume=False)
+    assert len(rows) == 4
+    assert len(read_table(results_path)) == 4
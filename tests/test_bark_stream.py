@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+sf = pytest.importorskip("soundfile")
+
+from bark_stream import StreamingBarkDetector, stream_file, _decoded_blocks
+
+SR = 16000
+
+
+def barking_signal(seed=0):
+    """10 s of low noise with three 0.3 s 800 Hz barks"""
+    rng = np.random.default_rng(seed)
+    y = 0.005 * rng.standard_normal(10 * SR)
+    t = np.arange(int(0.3 * SR)) / SR
+    bark = 0.5 * np.sin(2 * np.pi * 800 * t) * np.hanning(len(t))
+    for onset in (3.0, 5.0, 7.5):
+        start = int(onset * SR)
+        y[start:start + len(bark)] += bark
+    return y.astype(np.float32)
+
+
+def run(y, chunk):
+    detector = StreamingBarkDetector(SR)
+    events = []
+    for i in range(0, len(y), chunk):
+        events.extend(detector.feed(y[i:i + chunk]))
+    return events + detector.flush()
+
+
+def test_events_do_not_depend_on_chunk_size():
+    y = barking_signal()
+    reference = run(y, len(y))
+    assert [round(e["onset"], 1) for e in reference] == [2.9, 4.9, 7.4]
+    for chunk in (1, 333, 512, 4096, SR // 2, 3 * SR):
+        assert run(y, chunk) == reference
+
+
+def test_stream_file_matches_in_memory_run(tmp_path):
+    y = barking_signal(1)
+    path = str(tmp_path / "bark.wav")
+    sf.write(path, y, SR, subtype="FLOAT")
+    reference = run(y, len(y))
+    assert len(reference) == 3
+    for chunk_s in (0.05, 0.5, 2.0):
+        assert list(stream_file(path, chunk_s=chunk_s)) == reference
+
+
+def test_decoded_blocks_read_int16_audio(tmp_path):
+    y = barking_signal(2)
+    path = str(tmp_path / "bark.wav")
+    sf.write(path, np.stack([y, y], axis=1), SR, subtype="PCM_16")
+    sr, blocks = _decoded_blocks(path)
+    decoded = np.concatenate(list(blocks))
+    assert sr == SR and decoded.shape == (len(y), 2)
+    np.testing.assert_allclose(decoded[:, 0], y, atol=1 / 32768 + 1e-6)
+    assert len(run(decoded.mean(axis=1), SR)) == 3
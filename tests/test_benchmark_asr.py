@@ -0,0 +1,72 @@
+import random
+import sys
+import wave
+
+import pytest
+
+pytest.importorskip("librosa")
+
+from benchmark_asr import edit_distance, cer, run_benchmark, stub_models, stub_postprocess
+
+
+def dp_edit_distance(a, b):
+    """Textbook Levenshtein DP as the reference"""
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def test_edit_distance_matches_dp_on_random_strings():
+    rng = random.Random(0)
+    for _ in range(500):
+        alphabet = rng.choice(["ab", "abcd", "保险推荐的人", "abcdefghijklmnopqrstuvwxyz"])
+        a = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 90)))
+        b = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 90)))
+        assert edit_distance(a, b) == dp_edit_distance(a, b), (a, b)
+
+
+def test_edit_distance_beyond_one_machine_word():
+    rng = random.Random(1)
+    a = "".join(rng.choice("abc") for _ in range(300))
+    b = "".join(c if rng.random() > 0.1 else "d" for c in a)
+    assert edit_distance(a, b) == dp_edit_distance(a, b)
+
+
+def test_cer_ignores_tags_emoji_punctuation_and_case():
+    assert cer("<|zh|>你好，World! 😊", "你好 world") == (0, 7)
+    assert cer("你好世界", "你们世界。") == (1, 4)
+    assert cer("abc", "") == (3, 3)
+
+
+def write_silent_wav(path, seconds, sr=16000):
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sr)
+        f.writeframes(b"\x00\x00" * int(seconds * sr))
+
+
+def test_stub_run_without_funasr(tmp_path):
+    audio_dir, gold_dir = tmp_path / "audio", tmp_path / "gold"
+    audio_dir.mkdir()
+    gold_dir.mkdir()
+    for i in range(3):
+        write_silent_wav(audio_dir / f"call{i}.wav", 12)
+        (gold_dir / f"call{i}.txt").write_text("您好，这里是保险公司，我们给您推荐一款产品。" * 5, encoding="utf-8")
+    write_silent_wav(audio_dir / "no_gold.wav", 12)
+
+    reports = run_benchmark(str(audio_dir), str(gold_dir),
+                            variants={"baseline": {}, "segments": {"segments_dir": True}},
+                            model_factory=lambda: stub_models(str(gold_dir), error_rate=0.1, rtf=0.0),
+                            postprocess=stub_postprocess)
+
+    assert "funasr" not in sys.modules
+    assert [r["variant"] for r in reports] == ["baseline", "segments"]
+    for report in reports:
+        assert report["files"] == 3 and report["skipped"] == 0
+        assert 0.02 < report["cer"] < 0.2
+    assert reports[1]["cer_delta"] == round(reports[1]["cer"] - reports[0]["cer"], 4)
@@ -0,0 +1,27 @@
+import json
+import os
+import subprocess
+import sys
+
+from benchmark_classification import TimedPool, _report
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "benchmark_classification.py")
+
+
+def test_mock_run_prints_only_json(tmp_path):
+    env = dict(os.environ, BENCH_FILES="5", MOCK_LATENCY="0.001", BENCH_WORKERS="2")
+    result = subprocess.run([sys.executable, SCRIPT], capture_output=True, text=True, env=env, cwd=str(tmp_path),
+                            timeout=120, check=True)
+    reports = json.loads(result.stdout)
+    assert [r["variant"] for r in reports] == ["sequential", "concurrent_x2", "embedding_pass1", "embedding_pass2"]
+    assert all(r["files"] == 5 and r["errors"] == 0 for r in reports)
+    assert reports[1]["requests"] == 5 and reports[1]["p95_latency_ms"] is not None
+    assert reports[3]["cache_hit_rate"] == 1.0
+    assert "Analyzed" in result.stderr
+
+
+def test_report_without_requests_has_no_latency():
+    pool = TimedPool(["http://127.0.0.1:9"], health_interval=0)
+    report = _report("empty", 0, 1.0, pool)
+    assert report["requests"] == 0
+    assert report["p50_latency_ms"] is None and report["p95_latency_ms"] is None
@@ -0,0 +1,66 @@
+import os
+import subprocess
+import sys
+
+CLI = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "cli.py")
+
+HEAVY_MODULES = {"funasr", "librosa", "numpy", "requests", "torch", "scipy"}
+
+# Import time a light command may add on top of interpreter startup; numpy alone costs 100+ ms
+IMPORT_BUDGET_MS = 50
+
+
+def import_times(*args):
+    """Run python -X importtime with args; returns (stdout, {module: self time in microseconds})"""
+    result = subprocess.run([sys.executable, "-X", "importtime", *args], capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line and "self" not in line:
+            self_us, _, module = line[len("import time:"):].split("|")
+            times[module.strip()] = int(self_us)
+    return result.stdout, times
+
+
+def run_cli(*args):
+    """Run cli.py in a fresh interpreter; returns (stdout, top-level packages imported, ms spent importing them)"""
+    _, startup = import_times("-c", "pass")
+    stdout, times = import_times(CLI, *args)
+    extra = {module: us for module, us in times.items() if module not in startup}
+    return stdout, {module.split(".")[0] for module in times}, sum(extra.values()) / 1000
+
+
+def test_help_is_light():
+    stdout, imported, import_ms = run_cli("--help")
+    assert "list-audio" in stdout
+    assert imported & HEAVY_MODULES == set()
+    assert import_ms < IMPORT_BUDGET_MS
+
+
+def test_list_audio_is_light(tmp_path):
+    for name in ("b.wav", "a.mp3", "notes.txt"):
+        (tmp_path / name).write_bytes(b"")
+    stdout, imported, import_ms = run_cli("list-audio", str(tmp_path))
+    assert "Found 2 audio files:" in stdout
+    assert stdout.index("a.mp3") < stdout.index("b.wav")
+    assert imported & HEAVY_MODULES == set()
+    assert import_ms < IMPORT_BUDGET_MS
+
+
+def test_list_is_light(tmp_path):
+    for name in ("b.txt", "a.txt", "call.wav"):
+        (tmp_path / name).write_text("你好", encoding="utf-8")
+    stdout, imported, import_ms = run_cli("list", str(tmp_path))
+    assert stdout.split() == ["a.txt", "b.txt"]
+    assert imported & HEAVY_MODULES == set()
+    assert import_ms < IMPORT_BUDGET_MS
+
+
+def test_list_reads_a_packed_corpus(tmp_path):
+    from packed_corpus import CorpusWriter
+
+    with CorpusWriter(str(tmp_path / "corpus")) as writer:
+        writer.append("x.txt", "一")
+        writer.append("y.txt", "二")
+    result = subprocess.run([sys.executable, CLI, "list", str(tmp_path / "corpus")], capture_output=True, text=True,
+                            check=True)
+    assert result.stdout.split() == ["x.txt", "y.txt"]
@@ -0,0 +1,49 @@
+import numpy as np
+
+from corpus_stats import build_document_term_matrix, tfidf, frequency_table, distinctive_terms
+
+
+def reference_counts(texts, n_values=(2, 3), min_df=2):
+    """Plain Python document x n-gram counts, the behavior the vectorized build must match"""
+    rows = []
+    for text in texts:
+        row = {}
+        for n in n_values:
+            for i in range(len(text) - n + 1):
+                gram = text[i:i + n]
+                if gram.isalnum():
+                    row[gram] = row.get(gram, 0) + 1
+        rows.append(row)
+    df = {}
+    for row in rows:
+        for gram in row:
+            df[gram] = df.get(gram, 0) + 1
+    return rows, {gram for gram, count in df.items() if count >= min_df}
+
+
+TEXTS = ["燃气表要换了，燃气表很旧。", "推荐燃气保险，保险很便宜。", "燃气保险不需要。", "meter ok 燃气表", "", "表"]
+
+
+def test_matrix_matches_plain_counting():
+    for chunk_chars in (5, 10_000_000):
+        counts, terms = build_document_term_matrix(TEXTS, chunk_chars=chunk_chars)
+        rows, kept = reference_counts(TEXTS)
+        assert set(terms) == kept
+        dense = counts.toarray()
+        for i, row in enumerate(rows):
+            assert {terms[j]: int(dense[i, j]) for j in np.flatnonzero(dense[i])} == \
+                {gram: count for gram, count in row.items() if gram in kept}
+
+
+def test_tfidf_rows_are_normalized_and_tables_rank_terms():
+    counts, terms = build_document_term_matrix(TEXTS)
+    weights, idf = tfidf(counts)
+    norms = np.sqrt(np.asarray(weights.multiply(weights).sum(axis=1)).ravel())
+    assert np.allclose(norms[np.diff(counts.indptr) > 0], 1.0)
+
+    table = frequency_table(counts, terms, top=4)
+    assert table[0] == {"term": "燃气", "count": 5, "df": 4}
+    assert {row["term"] for row in table[1:]} == {"保险", "气表", "燃气表"}
+
+    insurance = np.array([False, True, True, False, False, False])
+    assert distinctive_terms(counts, terms, insurance, min_df=2)[0]["term"] in ("保险", "燃气保", "气保险", "气保")
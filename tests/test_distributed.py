@@ -0,0 +1,133 @@
+import multiprocessing
+import os
+import time
+
+import pytest
+
+from distributed import LeaseDir, run_node, load_node_results
+
+
+def append_line(path, line):
+    # One O_APPEND write per line, atomic for short lines across processes
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, (line + "\n").encode("utf-8"))
+    finally:
+        os.close(fd)
+
+
+def node_main(node_id, files, lease_dir, results_dir, log_path):
+    def process(audio_path):
+        append_line(log_path, audio_path)
+        return {"file": os.path.basename(audio_path), "node": node_id}
+
+    run_node(files, lease_dir, results_dir, process, node_id=node_id, ttl=60.0, poll_interval=0.05)
+
+
+def test_four_processes_process_every_file_exactly_once(tmp_path):
+    files = [f"/audio/call{i:03d}.wav" for i in range(200)]
+    lease_dir, results_dir = str(tmp_path / "leases"), str(tmp_path / "results")
+    os.makedirs(results_dir)
+    log_path = str(tmp_path / "processed.log")
+
+    context = multiprocessing.get_context("fork")
+    nodes = [context.Process(target=node_main, args=(f"node{i}", files, lease_dir, results_dir, log_path))
+             for i in range(4)]
+    for node in nodes:
+        node.start()
+    for node in nodes:
+        node.join(120)
+        assert node.exitcode == 0
+
+    with open(log_path, "r", encoding="utf-8") as f:
+        processed = f.read().split()
+    assert sorted(processed) == files
+    results = load_node_results(results_dir)
+    assert sorted(results) == sorted(os.path.basename(path) for path in files)
+    assert len({record["node"] for record in results.values()}) > 1
+
+
+def test_expired_lease_is_taken_over(tmp_path):
+    dead = LeaseDir(str(tmp_path), node_id="dead", ttl=0.3)
+    alive = LeaseDir(str(tmp_path), node_id="alive", ttl=0.3)
+
+    stale = dead.claim("a.wav")
+    assert stale is not None and stale.generation == 0
+    assert alive.claim("a.wav") is None
+
+    time.sleep(0.4)
+    lease = alive.claim("a.wav")
+    assert lease is not None and lease.generation == 1
+    assert dead.claim("a.wav") is None
+
+    # The old holder notices and cannot complete; the new one can
+    assert not dead.renew(stale) and stale.lost
+    assert not dead.complete(stale)
+    assert not alive.is_done("a.wav")
+    assert alive.complete(lease)
+    assert dead.is_done("a.wav")
+
+
+def test_run_node_takes_over_a_dead_nodes_shard(tmp_path):
+    lease_dir, results_dir = str(tmp_path / "leases"), str(tmp_path / "results")
+    os.makedirs(results_dir)
+    LeaseDir(lease_dir, node_id="dead", ttl=0.3).claim("/audio/b.wav")
+
+    files = ["/audio/a.wav", "/audio/b.wav", "/audio/c.wav"]
+    processed = run_node(files, lease_dir, results_dir, lambda path: {"file": path}, node_id="alive",
+                         ttl=0.3, poll_interval=0.05)
+    assert processed == 3
+    assert sorted(load_node_results(results_dir)) == ["a.wav", "b.wav", "c.wav"]
+
+
+def test_failed_file_is_released_and_retried(tmp_path):
+    lease_dir, results_dir = str(tmp_path / "leases"), str(tmp_path / "results")
+    os.makedirs(results_dir)
+    calls = []
+
+    def flaky(audio_path):
+        calls.append(audio_path)
+        if audio_path.endswith("b.wav") and calls.count(audio_path) == 1:
+            raise OSError("disk hiccup")
+        return {"file": os.path.basename(audio_path)}
+
+    files = ["/audio/a.wav", "/audio/b.wav", "/audio/c.wav"]
+    assert run_node(files, lease_dir, results_dir, flaky, node_id="n", poll_interval=0.01) == 3
+    assert calls.count("/audio/b.wav") == 2
+    assert "error" not in load_node_results(results_dir)["b.wav"]
+
+
+def test_failing_file_is_given_up_after_max_attempts(tmp_path):
+    lease_dir, results_dir = str(tmp_path / "leases"), str(tmp_path / "results")
+    os.makedirs(results_dir)
+    calls = []
+
+    def broken_b(audio_path):
+        calls.append(audio_path)
+        if audio_path.endswith("b.wav"):
+            raise ValueError("corrupt file")
+        return {"file": os.path.basename(audio_path)}
+
+    files = ["/audio/a.wav", "/audio/b.wav", "/audio/c.wav"]
+    assert run_node(files, lease_dir, results_dir, broken_b, node_id="n", poll_interval=0.01,
+                    max_attempts=3, max_failures=10) == 2
+    assert calls.count("/audio/b.wav") == 3
+    assert LeaseDir(lease_dir).is_done("/audio/b.wav")
+    assert load_node_results(results_dir)["b.wav"]["error"] == "Error: corrupt file"
+
+
+def test_node_stops_after_consecutive_failures_and_releases(tmp_path):
+    lease_dir, results_dir = str(tmp_path / "leases"), str(tmp_path / "results")
+    os.makedirs(results_dir)
+
+    def broken(audio_path):
+        raise RuntimeError("CUDA error")
+
+    files = [f"/audio/call{i}.wav" for i in range(20)]
+    with pytest.raises(RuntimeError, match="3 consecutive failures"):
+        run_node(files, lease_dir, results_dir, broken, node_id="sick", poll_interval=0.01, max_failures=3)
+
+    # Nothing was marked done and every shard is free for a healthy node
+    healthy = LeaseDir(lease_dir, node_id="healthy")
+    assert not any(healthy.is_done(path) for path in files)
+    assert all(healthy.claim(path) is not None for path in files)
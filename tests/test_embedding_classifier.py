@@ -0,0 +1,145 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from embedding_classifier import (DEFAULT_SEED_PATH, EmbeddingCache, NearestCentroidClassifier, classify_directory,
+                                  embed_texts, generative_fallback, load_seed_set)
+from file_utils import DEFAULT_CATEGORIES
+from mock_ollama import start_mock_server
+from ollama_pool import OllamaPool
+
+
+@pytest.fixture
+def mock_pool():
+    server, url = start_mock_server(latency=0.0)
+    pool = OllamaPool([url], health_interval=0)
+    yield pool, server
+    server.shutdown()
+
+
+def clusters(rng, n=50, dim=16):
+    centers = np.eye(dim, dtype=np.float32)[:3] * 5
+    X = np.concatenate([center + rng.normal(size=(n, dim)) for center in centers]).astype(np.float32)
+    y = ["a"] * n + ["b"] * n + ["c"] * n
+    return X, y
+
+
+def test_nearest_centroid_scores_and_margin_threshold():
+    rng = np.random.default_rng(0)
+    X, y = clusters(rng)
+    classifier = NearestCentroidClassifier(margin_threshold=0.05).fit(X, y)
+    assert classifier.labels == ["a", "b", "c"]
+
+    labels, margins, ambiguous = classifier.predict(X)
+    assert np.mean(np.array(labels) == np.array(y)) > 0.95
+    scores = classifier.scores(X)
+    top_two = np.sort(scores, axis=1)[:, -2:]
+    np.testing.assert_allclose(margins, top_two[:, 1] - top_two[:, 0], rtol=1e-5)
+
+    # Halfway between two centroids is ambiguous; on a centroid it is not
+    midpoint = (classifier.centroids[0] + classifier.centroids[1])[None, :]
+    assert classifier.predict(midpoint)[2][0]
+    assert not classifier.predict(classifier.centroids[2:3])[2][0]
+
+
+def test_save_load_round_trip(tmp_path):
+    rng = np.random.default_rng(1)
+    X, y = clusters(rng)
+    classifier = NearestCentroidClassifier(margin_threshold=0.2).fit(X, y)
+    path = str(tmp_path / "centroids.npz")
+    classifier.save(path)
+    loaded = NearestCentroidClassifier.load(path)
+    assert loaded.labels == classifier.labels and loaded.margin_threshold == 0.2
+    assert loaded.predict(X)[0] == classifier.predict(X)[0]
+
+
+def test_cache_hits_skip_requests(tmp_path, mock_pool):
+    pool, server = mock_pool
+    cache = EmbeddingCache(str(tmp_path / "cache"))
+    texts = ["燃气表要更换。" * 100, "保险一年一百元。", "燃气表要更换。" * 100]
+
+    first = embed_texts(texts, cache=cache, pool=pool)
+    requests_after_first = server.request_count
+    assert cache.hits == 0 and cache.misses > 0
+    np.testing.assert_allclose(first[0], first[2])
+
+    cache.hits = cache.misses = 0
+    second = embed_texts(texts, cache=cache, pool=pool)
+    assert server.request_count == requests_after_first
+    assert cache.misses == 0 and cache.hits > 0
+    np.testing.assert_allclose(first, second)
+    assert not [f for f in os.listdir(cache.cache_dir) if not f.endswith(".npy")]
+
+
+def test_only_ambiguous_files_fall_back_and_answers_stay_in_label_space(tmp_path, mock_pool):
+    pool, _ = mock_pool
+    text_dir = tmp_path / "text"
+    text_dir.mkdir()
+    for i in range(6):
+        (text_dir / f"{i}.txt").write_text(f"第{i}通电话，检查燃气。", encoding="utf-8")
+    seeds = embed_texts(["保险一年一百元。", "检查燃气表。"], pool=pool)
+    calls = []
+
+    def fallback(content, labels, pool=None):
+        calls.append(labels)
+        return "not_a_label" if "第0通" in content else "insurance_upsell"
+
+    classifier = NearestCentroidClassifier(margin_threshold=0.0).fit(seeds, ["insurance_upsell", "none"])
+    results = classify_directory(str(text_dir), classifier, fallback=fallback, pool=pool)
+    assert calls == [] and {r["source"] for r in results.values()} == {"embedding"}
+
+    classifier.margin_threshold = 10.0
+    results = classify_directory(str(text_dir), classifier, fallback=fallback, pool=pool)
+    assert len(calls) == 6 and calls[0] == ["insurance_upsell", "none"]
+    assert results["0.txt"]["source"] == "embedding"
+    for i in range(1, 6):
+        assert (results[f"{i}.txt"]["label"], results[f"{i}.txt"]["source"]) == ("insurance_upsell", "generative")
+
+
+class CategoryPool:
+    def __init__(self, answer):
+        self.answer = answer
+        self.prompts = []
+
+    def post(self, path, payload, timeout=None):
+        self.prompts.append(payload["prompt"])
+        answer = self.answer
+
+        class Response:
+            def raise_for_status(self):
+                pass
+
+            def json(self):
+                return {"response": json.dumps(answer)}
+
+        return Response()
+
+
+def test_generative_fallback_answers_in_classifier_labels():
+    pool = CategoryPool({"insurance_upsell": False, "complaint": True})
+    assert generative_fallback("...", ["insurance_upsell", "none"], pool=pool) == "none"
+    assert "complaint" not in pool.prompts[0] and "insurance_upsell" in pool.prompts[0]
+
+    assert generative_fallback("...", ["complaint", "insurance_upsell"], pool=pool) == "complaint"
+    assert generative_fallback("...", ["insurance_upsell"], pool=pool) is None
+
+    pool.prompts.clear()
+    assert generative_fallback("...", ["spam", "ham"], pool=pool) is None
+    assert pool.prompts == []
+
+
+def test_shipped_seed_set_uses_taxonomy_labels(tmp_path):
+    texts, labels = load_seed_set(DEFAULT_SEED_PATH)
+    assert len(texts) == len(labels) > 0
+    assert set(labels) <= set(DEFAULT_CATEGORIES) | {"none"}
+    with pytest.raises(FileNotFoundError, match="SEED_PATH"):
+        load_seed_set(str(tmp_path / "missing.jsonl"))
+
+
+def test_embedding_pass_is_over_ten_times_faster_than_generation():
+    from benchmark_classification import run_benchmark
+
+    reports = {r["variant"]: r for r in run_benchmark(n_synthetic=20, n_mock_endpoints=1, latency=0.05)}
+    assert reports["embedding_pass1"]["files_per_s"] >= 10 * reports["sequential"]["files_per_s"]
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("librosa")
+
+from event_mask import mask_segments
+
+SR = 16000
+
+
+def voiced(seconds, rng):
+    """Harmonic 'speech': a 150 Hz voice with ten harmonics and a syllable-rate envelope"""
+    t = np.arange(int(seconds * SR)) / SR
+    f0 = 150 * (1 + 0.05 * np.sin(2 * np.pi * 0.5 * t))
+    phase = 2 * np.pi * np.cumsum(f0) / SR
+    y = sum(np.sin(k * phase) / k for k in range(1, 11))
+    envelope = 0.6 + 0.4 * np.sin(2 * np.pi * 4 * t)
+    return 0.2 * envelope * y + 0.002 * rng.standard_normal(len(t))
+
+
+def test_noise_is_dropped_quiet_lead_in_trimmed_and_speech_kept():
+    rng = np.random.default_rng(0)
+    waveform = np.concatenate([
+        0.1 * rng.standard_normal(3 * SR),        # 0-3 s: traffic noise only
+        np.zeros(SR),                             # 3-4 s: outside any segment
+        0.001 * rng.standard_normal(SR),          # 4-5 s: quiet lead-in before the caller speaks
+        voiced(3, rng),                           # 5-8 s: speech
+        np.zeros(SR),                             # 8-9 s: outside any segment
+        voiced(3, rng),                           # 9-12 s: speech
+    ]).astype(np.float32)
+
+    kept, stats = mask_segments(waveform, [[0, 3000], [4000, 8000], [9000, 12000]], sr=SR)
+
+    assert stats["dropped"] == 1 and stats["trimmed"] == 1
+    assert len(kept) == 2
+    start, end = kept[0]
+    assert 4900 <= start <= 5050 and end == 8000
+    assert kept[1] == [9000, 12000]
+    assert stats["seconds_saved"] == pytest.approx(3 + (start - 4000) / 1000)
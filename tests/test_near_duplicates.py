@@ -0,0 +1,59 @@
+import numpy as np
+
+from near_duplicates import LSHIndex, MinHasher, shingle_hashes, duplicate_map, find_near_duplicates
+
+
+def chain(length, step=16, num_perm=128, seed=0):
+    """Signatures where each one differs from the previous in `step` fresh positions"""
+    rng = np.random.default_rng(seed)
+    signature = rng.integers(0, 2 ** 32, size=num_perm, dtype=np.uint64).astype(np.uint32)
+    signatures = [signature]
+    for n in range(1, length):
+        signature = signature.copy()
+        signature[(n - 1) * step:n * step] = rng.integers(0, 2 ** 32, size=step, dtype=np.uint64)
+        signatures.append(signature)
+    return signatures
+
+
+def similarity(a, b):
+    return float((a == b).mean())
+
+
+def test_members_are_directly_similar_to_their_representative():
+    # Neighbors share 112/128 values (0.875); two steps apart only 0.75
+    signatures = chain(4)
+    index = LSHIndex()
+    for key, signature in zip("abcd", signatures):
+        index.add(key, signature)
+
+    mapping = duplicate_map(index.clusters(threshold=0.8))
+    assert mapping == {"a": "b", "c": "b"}
+    by_key = dict(zip("abcd", signatures))
+    for member, representative in mapping.items():
+        assert similarity(by_key[member], by_key[representative]) >= 0.8
+
+
+def test_large_buckets_are_not_expanded_quadratically():
+    signature = chain(1)[0]
+    index = LSHIndex(max_bucket=10)
+    for i in range(500):
+        index.add(f"{i:03d}.txt", signature)
+
+    assert len(index.candidate_pairs()) < 500 * 10
+    mapping = duplicate_map(index.clusters(threshold=0.8))
+    # Nearly every copy is still grouped, each with a representative it was compared with
+    assert len(mapping) + len(set(mapping.values())) >= 490
+    assert len(set(mapping.values())) <= 60
+
+
+def test_find_near_duplicates_on_transcripts(tmp_path):
+    base = "您好，我们是燃气公司的，今天来做入户安全检查，麻烦开一下门。燃气表已经用了十年，需要更换。"
+    (tmp_path / "a.txt").write_text(base, encoding="utf-8")
+    (tmp_path / "b.txt").write_text(base + "好的谢谢。", encoding="utf-8")
+    (tmp_path / "c.txt").write_text("报警器没有装，建议安装一个燃气报警器，另外减压阀也该换了。", encoding="utf-8")
+
+    clusters = find_near_duplicates(str(tmp_path), threshold=0.7)
+    assert [sorted(cluster["files"]) for cluster in clusters] == [["a.txt", "b.txt"]]
+
+    hasher = MinHasher()
+    assert similarity(hasher.signature(shingle_hashes(base)), hasher.signature(shingle_hashes(base))) == 1.0
@@ -0,0 +1,101 @@
+import time
+import socket
+
+import pytest
+import requests
+
+from mock_ollama import start_mock_server
+from ollama_pool import OllamaPool, NoHealthyEndpointError
+
+
+@pytest.fixture
+def servers():
+    started = []
+
+    def start(**config):
+        server, url = start_mock_server(**config)
+        started.append(server)
+        return server, url
+
+    yield start
+    for server in started:
+        server.shutdown()
+        server.server_close()
+
+
+def closed_port_url():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{s.getsockname()[1]}"
+
+
+def generate(pool, **kwargs):
+    return pool.post("/api/generate", {"model": "mock", "prompt": "hi", "stream": False}, **kwargs)
+
+
+def test_requests_are_spread_over_endpoints(servers):
+    (a, url_a), (b, url_b) = servers(latency=0.0), servers(latency=0.0)
+    pool = OllamaPool([url_a, url_b], health_interval=0)
+    for _ in range(10):
+        assert generate(pool).status_code == 200
+    assert a.request_count == 5 and b.request_count == 5
+
+
+def test_failing_endpoint_is_ejected(servers):
+    (bad, bad_url), (good, good_url) = servers(error_rate=1.0), servers(latency=0.0)
+    pool = OllamaPool([bad_url, good_url], max_failures=2, health_interval=0)
+    for _ in range(6):
+        assert generate(pool).status_code == 200
+    assert bad.request_count == 2
+    assert good.request_count == 6
+    assert not pool.stats()[bad_url]["available"]
+
+
+def test_generate_read_timeout_is_not_retried(servers):
+    (slow, slow_url), (fast, fast_url) = servers(latency=1.0), servers(latency=0.0)
+    pool = OllamaPool([slow_url, fast_url], health_interval=0)
+    pool.endpoints[1].requests = 1  # make the slow endpoint the first pick
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        generate(pool, timeout=0.2)
+    assert fast.request_count == 0
+
+
+def test_embed_read_timeout_is_retried(servers):
+    (slow, slow_url), (fast, fast_url) = servers(latency=1.0), servers(latency=0.0)
+    pool = OllamaPool([slow_url, fast_url], health_interval=0)
+    pool.endpoints[1].requests = 1
+    response = pool.post("/api/embed", {"model": "mock", "input": ["hi"]}, timeout=0.2)
+    assert response.status_code == 200
+    assert fast.request_count == 1
+
+
+def test_background_probe_ejects_dead_and_readmits_recovered(servers):
+    flaky, flaky_url = servers(latency=0.0)
+    port = flaky.server_address[1]
+    flaky.shutdown()
+    flaky.server_close()
+    _, live_url = servers(latency=0.0)
+    pool = OllamaPool([flaky_url, live_url], health_interval=0.05, eject_seconds=60)
+    try:
+        deadline = time.time() + 5
+        while pool.stats()[flaky_url]["available"] and time.time() < deadline:
+            time.sleep(0.02)
+        assert not pool.stats()[flaky_url]["available"]
+        assert pool.stats()[live_url]["available"]
+
+        # The endpoint comes back on the same port: the next probe re-admits it long before eject_seconds
+        servers(port=port, latency=0.0)
+        deadline = time.time() + 5
+        while not pool.stats()[flaky_url]["available"] and time.time() < deadline:
+            time.sleep(0.02)
+        assert all(entry["available"] for entry in pool.stats().values())
+    finally:
+        pool.close()
+
+
+def test_all_endpoints_down_raises():
+    pool = OllamaPool([closed_port_url()], max_failures=1, health_interval=0)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        generate(pool)
+    with pytest.raises(NoHealthyEndpointError):
+        generate(pool)
@@ -0,0 +1,69 @@
+import os
+import json
+
+import pytest
+
+from packed_corpus import CorpusWriter, CorpusReader, TranscriptSource, DATA_FILE, META_FILE, INDEX_FILE
+
+
+def crash_after_meta(path, name, text):
+    """Write a record's data and sidecar line but not its index record, as a crash would"""
+    with open(os.path.join(path, DATA_FILE), "ab") as f:
+        f.write(text.encode("utf-8"))
+    with open(os.path.join(path, META_FILE), "a", encoding="utf-8") as f:
+        f.write(json.dumps({"name": name, "source_audio": None}) + "\n")
+
+
+def read_all(path):
+    reader = CorpusReader(path)
+    try:
+        return list(reader)
+    finally:
+        reader.close()
+
+
+def test_append_and_read_back(tmp_path):
+    path = str(tmp_path / "corpus")
+    with CorpusWriter(path) as writer:
+        writer.append("a.txt", "燃气表")
+        writer.append("b.txt", "减压阀", voice_length=12.5)
+        writer.append("a.txt", "燃气表更换")
+    assert read_all(path) == [("b.txt", "减压阀"), ("a.txt", "燃气表更换")]
+    with TranscriptSource(path) as source:
+        assert source.read("a.txt") == "燃气表更换"
+        with pytest.raises(FileNotFoundError):
+            source.read("c.txt")
+
+
+def test_crash_between_sidecar_and_index_is_recovered(tmp_path):
+    path = str(tmp_path / "corpus")
+    with CorpusWriter(path) as writer:
+        writer.append("a.txt", "AAA")
+    crash_after_meta(path, "b.txt", "BBB")
+    assert read_all(path) == [("a.txt", "AAA")]
+
+    with CorpusWriter(path) as writer:
+        writer.append("c.txt", "CCC")
+    assert read_all(path) == [("a.txt", "AAA"), ("c.txt", "CCC")]
+    assert os.path.getsize(os.path.join(path, DATA_FILE)) == 6
+
+
+@pytest.mark.parametrize("tear", ["meta", "index"])
+def test_torn_sidecar_line_or_index_record_is_recovered(tmp_path, tear):
+    path = str(tmp_path / "corpus")
+    with CorpusWriter(path) as writer:
+        writer.append("a.txt", "AAA")
+        writer.append("b.txt", "BBB")
+    if tear == "meta":
+        crash_after_meta(path, "x.txt", "XXX")
+        with open(os.path.join(path, META_FILE), "rb+") as f:
+            f.truncate(os.path.getsize(os.path.join(path, META_FILE)) - 5)
+    else:
+        with open(os.path.join(path, INDEX_FILE), "rb+") as f:
+            f.truncate(os.path.getsize(os.path.join(path, INDEX_FILE)) - 3)
+    expected = [("a.txt", "AAA"), ("b.txt", "BBB")] if tear == "meta" else [("a.txt", "AAA")]
+    assert read_all(path) == expected
+
+    with CorpusWriter(path) as writer:
+        writer.append("c.txt", "CCC")
+    assert read_all(path) == expected + [("c.txt", "CCC")]
@@ -0,0 +1,104 @@
+import os
+import threading
+import wave
+
+from pipeline import run_pipeline
+from result_sink import load_results
+
+TAGS = "<|zh|><|NEUTRAL|><|Speech|><|withitn|>"
+
+
+def write_wav(path, seconds=1.0, sr=16000):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sr)
+        f.writeframes(b"\x00\x00" * int(seconds * sr))
+
+
+class StubVAD:
+    """Claims 12 s of speech, or 2 s (too short, skipped) for files named short*"""
+
+    def generate(self, input, **kwargs):
+        seconds = 2 if os.path.basename(input).startswith("short") else 12
+        return [{"value": [[0, seconds * 1000]]}]
+
+
+class StubASR:
+    """'Transcribes' a file as its day folder and name; files named broken* fail"""
+
+    def __init__(self, order):
+        self.order = order
+
+    def generate(self, input, **kwargs):
+        self.order.append(input)
+        if os.path.basename(input).startswith("broken"):
+            raise RuntimeError("decoder crashed")
+        day = os.path.basename(os.path.dirname(input))
+        return [{"text": f"{TAGS}{day} {os.path.basename(input)}。"}]
+
+
+def strip_tags(text):
+    return text.replace(TAGS, "")
+
+
+class StubClassifier:
+    """YES for day1 transcripts; raises for files named flaky* until healed"""
+
+    def __init__(self):
+        self.calls = []
+        self.healed = False
+        self.lock = threading.Lock()
+
+    def __call__(self, content, pool=None):
+        with self.lock:
+            self.calls.append(content)
+        if "flaky" in content and not self.healed:
+            raise ConnectionError("ollama went away")
+        return "YES" if "day1" in content else "NO"
+
+
+def run(tmp_path, audio_files, order, classify, resume=False, asr_workers=1):
+    return run_pipeline(audio_files, str(tmp_path / "text"), str(tmp_path / "logs"),
+                        str(tmp_path / "pipeline.jsonl"), asr_workers=asr_workers, llm_workers=2, pool=object(),
+                        resume=resume, model_factory=lambda: (StubASR(order), StubVAD()), classify=classify,
+                        postprocess=strip_tags)
+
+
+def test_pipeline_keys_by_path_orders_work_and_resumes(tmp_path):
+    audio = tmp_path / "audio"
+    files = [str(audio / "day1" / "call.wav"), str(audio / "day1" / "short.wav"),
+             str(audio / "day2" / "broken.wav"), str(audio / "day2" / "flaky.wav")]
+    for path in files:
+        write_wav(path)
+    os.makedirs(tmp_path / "text")
+    os.makedirs(tmp_path / "logs")
+
+    order = []
+    classify = StubClassifier()
+    results = run(tmp_path, files, order, classify)
+
+    # One ASR worker takes files in order; short files are skipped before ASR
+    assert order == [files[0], files[2], files[3]]
+    assert sorted(results) == sorted(os.path.abspath(path) for path in files)
+    assert results[files[0]]["verdict"] == "YES" and results[files[0]]["audio_path"] == files[0]
+    assert results[files[1]]["verdict"] is None
+    assert results[files[2]]["verdict"] == "Error: decoder crashed"
+    assert results[files[3]]["verdict"] == "Error: ollama went away"
+    assert load_results(str(tmp_path / "pipeline.jsonl")) == results
+
+    # A recording with the same name in another day folder is new work, not a resumed file
+    same_name = str(audio / "day2" / "call.wav")
+    write_wav(same_name)
+    order.clear()
+    classify.calls.clear()
+    classify.healed = True
+    results = run(tmp_path, files + [same_name], order, classify, resume=True)
+
+    # Only the failed files and the new one are redone
+    assert order == [files[2], files[3], same_name]
+    assert len(classify.calls) == 2
+    assert results[files[3]]["verdict"] == "NO"
+    assert results[same_name]["verdict"] == "NO" and results[files[0]]["verdict"] == "YES"
+    assert results[files[2]]["verdict"] == "Error: decoder crashed"
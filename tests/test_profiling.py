@@ -0,0 +1,117 @@
+import os
+import sys
+import pstats
+import threading
+import subprocess
+import tracemalloc
+
+import pytest
+
+import profiling
+from profiling import TIMERS, TimerRegistry, enable_profiling, stage, write_reports
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+
+@pytest.fixture
+def profiler(tmp_path, monkeypatch):
+    """Profiling enabled into tmp_path for one test, with fresh timers"""
+    monkeypatch.setattr(profiling, "_profiler", None)
+    was_tracing = tracemalloc.is_tracing()
+    TIMERS.reset()
+    enable_profiling(str(tmp_path / "profile"))
+    yield str(tmp_path / "profile")
+    TIMERS.reset()
+    if not was_tracing:
+        tracemalloc.stop()
+
+
+def test_timer_registry_counts_totals_and_max():
+    timers = TimerRegistry()
+    timers.add("asr", 0.5)
+    timers.add("asr", 1.5)
+    with timers.timer("vad"):
+        pass
+    summary = timers.summary()
+    assert summary["asr"] == {"count": 2, "total": 2.0, "mean": 1.0, "max": 1.5}
+    assert summary["vad"]["count"] == 1
+    timers.reset()
+    assert timers.summary() == {}
+
+
+def test_stage_only_times_when_profiling_is_off(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "_profiler", None)
+    TIMERS.reset()
+    with stage("load"):
+        with stage("load"):
+            pass
+    assert TIMERS.summary()["load"]["count"] == 2
+    assert write_reports() == []
+    TIMERS.reset()
+
+
+def test_reports_per_stage(profiler):
+    with stage("load"):
+        held = [bytearray(1000) for _ in range(100)]
+        with stage("inner"):
+            sum(range(1000))
+    with stage("load"):
+        pass
+
+    written = write_reports()
+    assert sorted(os.path.basename(path) for path in written) == ["load.alloc.txt", "load.pstats", "timers.json"]
+    assert TIMERS.summary()["inner"]["count"] == 1
+    stats = pstats.Stats(os.path.join(profiler, "load.pstats"))
+    assert stats.total_calls > 0
+    with open(os.path.join(profiler, "load.alloc.txt"), "r", encoding="utf-8") as f:
+        report = f.read()
+    assert "test_profiling.py" in report and "overlapped" not in report
+    del held
+
+
+def test_concurrent_stages_do_not_wipe_each_others_traces(profiler):
+    started, finished = threading.Event(), threading.Event()
+    kept = {}
+
+    def outer():
+        with stage("asr"):
+            kept["asr"] = [bytearray(1000) for _ in range(200)]
+            started.set()
+            finished.wait(5)
+
+    def inner():
+        started.wait(5)
+        with stage("classify"):
+            kept["classify"] = [bytearray(10) for _ in range(10)]
+        finished.set()
+
+    threads = [threading.Thread(target=outer), threading.Thread(target=inner)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    write_reports()
+
+    with open(os.path.join(profiler, "asr.alloc.txt"), "r", encoding="utf-8") as f:
+        report = f.read()
+    # The asr stage still holds its 200 KB after classify ran next to it
+    assert "test_profiling.py" in report
+    assert float(report.splitlines()[0].split()[3]) >= 195
+    assert "1 of 1 calls overlapped other stages" in report
+
+
+def test_profile_flag_writes_one_report_pair_per_stage(tmp_path):
+    np = pytest.importorskip("numpy")
+    sf = pytest.importorskip("soundfile")
+    pytest.importorskip("librosa")
+    audio_path = str(tmp_path / "clip.wav")
+    sf.write(audio_path, np.zeros(16000, dtype=np.float32), 16000)
+    profile_dir = tmp_path / "profile"
+
+    subprocess.run([sys.executable, os.path.join(SRC_DIR, "bark_classifier.py"), "classify", audio_path,
+                    "--model-dir", str(tmp_path / "models"), "--profile", str(profile_dir)],
+                   check=True, capture_output=True, timeout=300)
+
+    files = sorted(os.listdir(profile_dir))
+    assert files == ["bark_features.alloc.txt", "bark_features.pstats", "bark_load.alloc.txt", "bark_load.pstats",
+                     "timers.json"]
@@ -0,0 +1,107 @@
+import json
+
+from result_sink import ResultSink, load_results, file_key
+from file_utils import analyze_insurance_content
+
+
+def test_resume_after_torn_line_starts_a_new_line(tmp_path):
+    path = str(tmp_path / "results.jsonl")
+    with ResultSink(path) as sink:
+        sink.write("a.txt", "YES")
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"file": "b.txt", "res')
+
+    with ResultSink(path) as sink:
+        assert "b.txt" not in sink
+        sink.write("c.txt", "NO")
+
+    assert load_results(path) == {"a.txt": "YES", "c.txt": "NO"}
+    with open(path, "r", encoding="utf-8") as f:
+        assert [json.loads(line)["file"] for line in f] == ["a.txt", "c.txt"]
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, text):
+        self.text = text
+
+    def json(self):
+        return {"response": self.text}
+
+
+class FakePool:
+    def __init__(self):
+        self.prompts = []
+
+    def post(self, path, payload, timeout=None):
+        self.prompts.append(payload["prompt"])
+        return FakeResponse("YES" if "推荐" in payload["prompt"] else "NO")
+
+
+def test_verdicts_are_keyed_by_path_and_reported_per_directory(tmp_path, capsys):
+    results_path = str(tmp_path / "results.jsonl")
+    for directory, text in (("one", "我们推荐燃气保险。"), ("two", "检查一下燃气表。")):
+        (tmp_path / directory).mkdir()
+        (tmp_path / directory / "same.txt").write_text(text, encoding="utf-8")
+        (tmp_path / directory / f"{directory}.txt").write_text(text, encoding="utf-8")
+
+    pool = FakePool()
+    one = analyze_insurance_content(str(tmp_path / "one"), results_path=results_path, pool=pool)
+    two = analyze_insurance_content(str(tmp_path / "two"), results_path=results_path, pool=pool)
+
+    assert one == {"one.txt": "YES", "same.txt": "YES"}
+    assert two == {"same.txt": "NO", "two.txt": "NO"}
+    assert load_results(results_path)[file_key(str(tmp_path / "one"), "same.txt")] == "YES"
+
+    # Resuming the first directory sends nothing and reports only its own files
+    pool.prompts.clear()
+    results = analyze_insurance_content(str(tmp_path / "one"), results_path=results_path, pool=pool, resume=True)
+    assert pool.prompts == []
+    assert results == one
+
+
+class CategoryResponse(FakeResponse):
+    def raise_for_status(self):
+        pass
+
+
+class FlakyCategoryPool:
+    """Answers insurance_upsell for "推荐" transcripts; fails on "坏" ones until fixed"""
+
+    def __init__(self):
+        self.prompts = []
+        self.broken = True
+
+    def post(self, path, payload, timeout=None):
+        self.prompts.append(payload["prompt"])
+        content = payload["prompt"].split("文本内容：")[1]
+        if self.broken and "坏" in content:
+            raise ConnectionError("connection reset")
+        return CategoryResponse(json.dumps({"insurance_upsell": "推荐" in content, "reason": ""}))
+
+
+def test_categorizations_are_written_per_file_and_resumed(tmp_path):
+    from file_utils import categorize_directory
+
+    results_path = str(tmp_path / "categories.jsonl")
+    text_dir = tmp_path / "text"
+    text_dir.mkdir()
+    (text_dir / "a.txt").write_text("我们推荐燃气保险。", encoding="utf-8")
+    (text_dir / "b.txt").write_text("燃气表坏了。", encoding="utf-8")
+    (text_dir / "c.txt").write_text("检查一下燃气表。", encoding="utf-8")
+
+    pool = FlakyCategoryPool()
+    results = categorize_directory(str(text_dir), results_path=results_path, pool=pool)
+    assert results["a.txt"]["labels"]["insurance_upsell"] is True
+    assert results["b.txt"] == "Error: connection reset"
+    assert results["c.txt"]["labels"]["insurance_upsell"] is False
+    assert set(load_results(results_path)) == {file_key(str(text_dir), f) for f in ("a.txt", "b.txt", "c.txt")}
+
+    # Resume re-sends only the failed file
+    pool.prompts.clear()
+    pool.broken = False
+    results = categorize_directory(str(text_dir), results_path=results_path, pool=pool, resume=True)
+    assert len(pool.prompts) == 1 and "坏" in pool.prompts[0]
+    assert results["b.txt"]["labels"]["insurance_upsell"] is False
+    assert sorted(results) == ["a.txt", "b.txt", "c.txt"]
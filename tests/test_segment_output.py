@@ -0,0 +1,92 @@
+import numpy as np
+
+from segment_output import SAMPLE_RATE, merge_vad_spans, transcribe_segments, joined_text
+
+
+def merge_vad(vad_result, max_length=15000, min_length=0):
+    """funasr.utils.vad_utils.merge_vad, copied verbatim as the reference"""
+    new_result = []
+    if len(vad_result) <= 1:
+        return vad_result
+    time_step = [t[0] for t in vad_result] + [t[1] for t in vad_result]
+    time_step = sorted(list(set(time_step)))
+    if len(time_step) == 0:
+        return []
+    bg = 0
+    for i in range(len(time_step) - 1):
+        time = time_step[i]
+        if time_step[i + 1] - bg < max_length:
+            continue
+        if time - bg > min_length:
+            new_result.append([bg, time])
+        bg = time
+    new_result.append([bg, time_step[-1]])
+    return new_result
+
+
+class FakeSenseVoice:
+    """Records how it is called; text encodes each clip's length so order can be checked"""
+
+    def __init__(self, with_vad):
+        self.vad_model = object() if with_vad else None
+        self.generate_calls = []
+        self.inference_calls = []
+
+    def _decode(self, clips):
+        return [{"text": f"<|zh|><|NEUTRAL|><|Speech|><|withitn|>{len(clip)}"} for clip in clips]
+
+    def generate(self, input, **kwargs):
+        self.generate_calls.append(kwargs)
+        return self._decode(input)
+
+    def inference(self, data_in, **kwargs):
+        self.inference_calls.append((len(data_in), kwargs))
+        return self._decode(data_in)
+
+
+def strip_tags(text):
+    return text.replace("<|zh|><|NEUTRAL|><|Speech|><|withitn|>", "")
+
+
+def test_merge_vad_spans_matches_funasr():
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        bounds = np.sort(rng.choice(600000, size=2 * rng.integers(0, 30), replace=False)).tolist()
+        segments = [[bounds[i], bounds[i + 1]] for i in range(0, len(bounds), 2)]
+        assert merge_vad_spans(segments) == merge_vad([list(s) for s in segments])
+
+
+def test_model_with_embedded_vad_is_not_run_through_generate():
+    waveform = np.zeros(SAMPLE_RATE * 200, dtype=np.float32)
+    spans = [[0, 14000], [14000, 29000], [29000, 31000], [40000, 55000], [60000, 130000]]
+    model = FakeSenseVoice(with_vad=True)
+
+    segments = transcribe_segments(waveform, spans, model, strip_tags, batch_size_s=60)
+
+    assert model.generate_calls == []
+    assert sum(n for n, _ in model.inference_calls) == len(spans)
+    for n, kwargs in model.inference_calls:
+        assert kwargs["batch_size"] == n
+    # Results come back in span order although batches are sorted by length
+    assert [int(s["text"]) for s in segments] == [(end - start) * SAMPLE_RATE // 1000 for start, end in spans]
+
+
+def test_model_without_vad_uses_generate():
+    waveform = np.zeros(SAMPLE_RATE * 20, dtype=np.float32)
+    model = FakeSenseVoice(with_vad=False)
+    segments = transcribe_segments(waveform, [[0, 1000], [2000, 5000]], model, strip_tags)
+    assert len(model.generate_calls) == 1 and model.inference_calls == []
+    assert [s["text"] for s in segments] == ["16000", "48000"]
+
+
+def test_joined_text_postprocesses_raw_output_once():
+    calls = []
+
+    def postprocess(text):
+        calls.append(text)
+        return strip_tags(text)
+
+    segments = [{"raw": "<|zh|><|NEUTRAL|><|Speech|><|withitn|>你好。"},
+                {"raw": "<|zh|><|NEUTRAL|><|Speech|><|withitn|>再见。"}]
+    assert joined_text(segments, postprocess) == "你好。 再见。"
+    assert calls == [" ".join(s["raw"] for s in segments)]
@@ -0,0 +1,20 @@
+import numpy as np
+import pytest
+
+librosa = pytest.importorskip("librosa")
+
+from spectral_features import SpectralFeatures
+
+
+@pytest.mark.parametrize("n_fft,hop_length", [(2048, 512), (512, 160)])
+def test_rms_matches_librosa_time_domain(n_fft, hop_length):
+    rng = np.random.default_rng(0)
+    sr = 16000
+    t = np.arange(3 * sr) / sr
+    y = (0.3 * np.sin(2 * np.pi * 440 * t) * (t > 1) + 0.05 * rng.standard_normal(len(t))).astype(np.float32)
+
+    spectral = SpectralFeatures(y, sr, n_fft=n_fft, hop_length=hop_length)
+    expected = librosa.feature.rms(y=y, frame_length=n_fft, hop_length=hop_length)[0]
+
+    np.testing.assert_allclose(spectral.rms, expected, rtol=1e-5)
+    assert spectral.rms.shape[0] == spectral.magnitude.shape[1]
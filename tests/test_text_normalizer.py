@@ -0,0 +1,39 @@
+import pytest
+
+from text_normalizer import normalize_text
+
+
+@pytest.mark.parametrize("text", ["保险金额是多少。", "额外收费吗？", "我说嗯嗯，这样。"])
+def test_filler_characters_inside_words_are_kept(text):
+    assert normalize_text(text)[0] == text
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("嗯，我们来检查一下。", "我们来检查一下。"),
+    ("好的，嗯，这个表要换。", "好的，这个表要换。"),
+    ("然后，呃。好的。", "然后。好的。"),
+    ("额 你好。", "你好。"),
+])
+def test_standalone_fillers_are_removed_with_their_punctuation(text, expected):
+    assert normalize_text(text)[0] == expected
+
+
+def test_one_word_answers_are_kept():
+    assert normalize_text("要换表吗？对。嗯。好。")[0] == "要换表吗？对。好。"
+
+
+def test_tags_emoji_repeats_and_duplicate_sentences():
+    text = "<|zh|><|NEUTRAL|>你好😊。哦哦哦哦。你好。"
+    assert normalize_text(text)[0] == "你好。"
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("ok. Thanks.", "ok. Thanks."),
+    ("Really?  Yes!", "Really? Yes!"),
+    ("ok,  thanks.", "ok, thanks."),
+    ("好的。 Thanks!", "好的。 Thanks!"),
+    ("WiFi密码是多少？ 好的。", "WiFi密码是多少？好的。"),
+    ("好的， 谢谢。 再见。", "好的，谢谢。再见。"),
+])
+def test_spaces_are_kept_between_english_words_only(text, expected):
+    assert normalize_text(text)[0] == expected
@@ -0,0 +1,70 @@
+import os
+import json
+
+from transcript_index import TranscriptIndex
+
+
+def make_index(tmp_path, texts):
+    text_dir = tmp_path / "text"
+    text_dir.mkdir()
+    for name, text in texts.items():
+        (text_dir / name).write_text(text, encoding="utf-8")
+    index = TranscriptIndex(str(tmp_path / "index"), str(text_dir))
+    index.update()
+    return index
+
+
+def test_single_character_hits_are_counted_once(tmp_path):
+    index = make_index(tmp_path, {
+        "a.txt": "燃气表要换了，旧表用了十年。表在厨房。",
+        "b.txt": "没有燃气表的问题。",
+    })
+    doc_ids, offsets = index.term_hits("表")
+    assert len(doc_ids) == 4
+    assert {(index.id_to_file[d], o) for d, o in zip(doc_ids.tolist(), offsets.tolist())} == {
+        ("a.txt", 2), ("a.txt", 8), ("a.txt", 14), ("b.txt", 4)}
+
+    hits = {result["file"]: result["hits"] for result in index.search("表")}
+    assert hits == {"a.txt": 3, "b.txt": 1}
+
+
+def test_phrase_and_boolean_queries(tmp_path):
+    index = make_index(tmp_path, {
+        "a.txt": "需要更换减压阀。",
+        "b.txt": "报警器坏了，减压阀正常。",
+        "c.txt": "推荐燃气保险。",
+    })
+    assert {r["file"] for r in index.search("减压阀")} == {"a.txt", "b.txt"}
+    assert {r["file"] for r in index.search("减压阀 报警器")} == {"b.txt"}
+    assert {r["file"] for r in index.search("减压阀 NOT 报警器")} == {"a.txt"}
+    assert {r["file"] for r in index.search("报警器 OR 保险")} == {"b.txt", "c.txt"}
+
+
+def test_standalone_characters_are_searchable(tmp_path):
+    index = make_index(tmp_path, {
+        "a.txt": "你需要吗，对。好的",
+        "b.txt": "对的，没问题。",
+        "c.txt": "不需要。",
+    })
+    assert {r["file"] for r in index.search("对")} == {"a.txt", "b.txt"}
+    doc_ids, offsets = index.term_hits("对")
+    assert sorted((index.id_to_file[d], o) for d, o in zip(doc_ids.tolist(), offsets.tolist())) == [
+        ("a.txt", 5), ("b.txt", 0)]
+    # Multi-character queries are unaffected by the extra terms
+    assert {r["file"] for r in index.search("需要")} == {"a.txt", "c.txt"}
+    assert {r["file"] for r in index.search("对 需要")} == {"a.txt"}
+
+
+def test_index_of_an_older_format_is_rebuilt(tmp_path):
+    index = make_index(tmp_path, {"a.txt": "好吗，对。"})
+    with open(index.meta_path, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    del meta["format"]
+    with open(index.meta_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+    reopened = TranscriptIndex(index.index_dir, index.text_dir)
+    assert reopened.segments == []
+    assert reopened.update() == 1
+    assert [r["file"] for r in reopened.search("对")] == ["a.txt"]
+    assert len([f for f in os.listdir(index.index_dir) if f.endswith(".npy")]) == 5
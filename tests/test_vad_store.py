@@ -0,0 +1,52 @@
+import os
+import json
+
+import numpy as np
+
+from vad_store import VADStoreWriter, VADStore, corpus_stats, SEGMENTS_FILE, META_FILE, INDEX_FILE
+
+
+def segments_of(store):
+    return {path: store.segments(path).tolist() for path in store.paths()}
+
+
+def test_crash_between_sidecar_and_index_is_recovered(tmp_path):
+    path = str(tmp_path / "vad")
+    with VADStoreWriter(path) as writer:
+        writer.append("a.wav", [[0, 100]], 1000)
+    # Crash while appending b.wav: segments and sidecar line written, index record not
+    with open(os.path.join(path, SEGMENTS_FILE), "ab") as f:
+        f.write(np.array([[5, 900]], dtype="<i4").tobytes())
+    with open(os.path.join(path, META_FILE), "a", encoding="utf-8") as f:
+        f.write(json.dumps({"path": "b.wav"}) + "\n")
+    assert segments_of(VADStore(path)) == {"a.wav": [[0, 100]]}
+
+    with VADStoreWriter(path) as writer:
+        writer.append("c.wav", [[10, 20], [30, 40]], 2000)
+    assert segments_of(VADStore(path)) == {"a.wav": [[0, 100]], "c.wav": [[10, 20], [30, 40]]}
+
+
+def test_torn_index_record_is_ignored_and_recovered(tmp_path):
+    path = str(tmp_path / "vad")
+    with VADStoreWriter(path) as writer:
+        writer.append("a.wav", [[0, 100]], 1000)
+        writer.append("b.wav", [[0, 50]], 1000)
+    with open(os.path.join(path, INDEX_FILE), "rb+") as f:
+        f.truncate(os.path.getsize(os.path.join(path, INDEX_FILE)) - 7)
+    assert segments_of(VADStore(path)) == {"a.wav": [[0, 100]]}
+
+    with VADStoreWriter(path) as writer:
+        writer.append("b.wav", [[0, 60]], 1000)
+    assert segments_of(VADStore(path)) == {"a.wav": [[0, 100]], "b.wav": [[0, 60]]}
+
+
+def test_corpus_stats(tmp_path):
+    path = str(tmp_path / "vad")
+    with VADStoreWriter(path) as writer:
+        writer.append("20250616151047480.wav", [[0, 1000], [3000, 4000]], 10000)
+        writer.append("20250617090000000.wav", [[0, 5000]], 5000)
+    stats = corpus_stats(VADStore(path))
+    assert stats["files"] == 2
+    assert stats["speech_seconds"] == 7.0
+    assert stats["silences"]["count"] == 1
+    assert list(stats["days"]) == ["20250616", "20250617"]
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+librosa = pytest.importorskip("librosa")
+matplotlib = pytest.importorskip("matplotlib")
+matplotlib.use("Agg")
+sf = pytest.importorskip("soundfile")
+
+from spectral_features import SpectralFeatures
+from waveform_plot import decimate_series, reduced_spectrogram, render_directory, render_file, waveform_envelope
+
+
+def test_envelope_keeps_every_bin_min_and_max():
+    rng = np.random.default_rng(0)
+    y = 0.1 * rng.standard_normal(10_007)
+    y[1234], y[8765] = 0.9, -0.95   # single-sample spikes must survive decimation
+    times, mins, maxs = waveform_envelope(y, sr=1000, width=100)
+
+    factor = int(np.ceil(len(y) / 100))
+    assert len(mins) == len(maxs) == len(times) <= 100
+    for i in range(len(mins)):
+        block = y[i * factor:(i + 1) * factor]
+        assert (mins[i], maxs[i]) == (block.min(), block.max())
+    assert maxs.max() == 0.9 and mins.min() == -0.95
+    np.testing.assert_allclose(times[:2], [0, factor / 1000])
+
+    # Signals shorter than the width are not resampled
+    _, short_mins, short_maxs = waveform_envelope(y[:50], sr=1000, width=100)
+    np.testing.assert_array_equal(short_mins, y[:50])
+    np.testing.assert_array_equal(short_maxs, y[:50])
+
+
+def test_decimated_series_and_spectrogram_keep_peaks():
+    values = np.zeros(1001)
+    values[777] = 1.0
+    times, pooled = decimate_series(values, frame_s=0.01, width=100)
+    assert len(pooled) <= 100 and pooled.max() == 1.0 and times[1] == pytest.approx(0.11)
+
+    sr = 16000
+    t = np.arange(5 * sr) / sr
+    spectral = SpectralFeatures((0.5 * np.sin(2 * np.pi * 1000 * t)).astype(np.float32), sr)
+    S, times, frequencies = reduced_spectrogram(spectral, width=50, max_rows=64)
+    assert S.shape == (len(frequencies), len(times))
+    assert S.shape[1] <= 50 and S.shape[0] <= 64
+    assert S.max() == 0.0
+
+
+def test_render_under_agg(tmp_path):
+    sr = 16000
+    rng = np.random.default_rng(0)
+    y = 0.02 * rng.standard_normal(3 * sr)
+    t = np.arange(sr // 5) / sr
+    y[sr:sr + len(t)] += 0.8 * np.sin(2 * np.pi * 800 * t)
+    audio_path = str(tmp_path / "clip.wav")
+    sf.write(audio_path, y.astype(np.float32), sr)
+
+    output_path = str(tmp_path / "plots" / "clip.png")
+    assert render_file(audio_path, output_path, width=400) >= 1
+    with open(output_path, "rb") as f:
+        assert f.read(8) == b"\x89PNG\r\n\x1a\n"
+
+    (tmp_path / "broken.wav").write_bytes(b"not audio")
+    results = render_directory([audio_path, str(tmp_path / "broken.wav")], str(tmp_path / "plots"), workers=1)
+    # The existing plot is newer than its audio and is skipped
+    assert list(results) == [str(tmp_path / "broken.wav")]
+    assert results[str(tmp_path / "broken.wav")].startswith("Error")